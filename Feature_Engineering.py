@@ -1,9 +1,15 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import seaborn as sns
-import matplotlib.pyplot as plt
 import time
+import data_loader
+import ui_components
+import jobs
+import correlation
+import feature_engine
+import hashlib
+import incremental
+import reports
 
 def upload_files():
     col1, col2, col4, col3 = st.columns([1, 1, 0.2, 1]) 
@@ -14,7 +20,8 @@ def upload_files():
         uploaded_file1 = st.file_uploader("Upload Excel File 1", type=["xlsx"], key="file1")
         
         if uploaded_file1 is not None:
-            df1 = pd.read_excel(uploaded_file1)
+            options = ui_components.excel_upload_options(uploaded_file1, key="file1")
+            df1 = data_loader.load_excel(uploaded_file1, **options)
             st.write("**:orange[DataSet 1 Overview]**")
             st.write(f"Total Rows: {df1.shape[0]} || Total Columns: {df1.shape[1]}")
             st.dataframe(df1.head(16))  
@@ -23,7 +30,8 @@ def upload_files():
         uploaded_file2 = st.file_uploader("Upload Excel File 2", type=["xlsx"], key="file2")
         
         if uploaded_file2 is not None:
-            df2 = pd.read_excel(uploaded_file2)
+            options = ui_components.excel_upload_options(uploaded_file2, key="file2")
+            df2 = data_loader.load_excel(uploaded_file2, **options)
             st.write("**:orange[DataSet 2 Overview]**")
             st.write(f"Total Rows: {df2.shape[0]} || Total Columns: {df2.shape[1]}")
             st.dataframe(df2.head(16))  
@@ -35,6 +43,55 @@ def upload_files():
         
     return df1, df2
 
+# The derived features, correlation report and heatmap are computed in
+# reports.py, shared with the batch runner (batch.py)
+
+# Heatmaps by the values they show (rounded as annotated), so an append that
+# leaves the displayed correlations unchanged doesn't draw it again
+heatmap_cache = data_loader.MemoryLRUCache(max_bytes=64 * 1024 * 1024, sizeof=len)
+
+def cached_heatmap(correlation_matrix):
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr(list(correlation_matrix.columns)).encode())
+    digest.update(np.round(correlation_matrix.to_numpy(dtype=float), 2).tobytes())
+    key = digest.hexdigest()
+    heatmap = heatmap_cache.get(key)
+    if heatmap is None:
+        heatmap = heatmap_cache.put(key, reports.render_heatmap(correlation_matrix))
+    return heatmap
+
+def appended_report(dataset, clustered):
+    # Append mode: derived features of the new rows only, correlations from
+    # the co-moment sums of all rows
+    st.write(f"Rows: {dataset.rows:,} in {len(dataset.parts)} file(s); "
+             f"the last append added {dataset.delta_rows:,} rows")
+    if dataset.missing or dataset.extra:
+        st.warning(f"Last delta: missing columns {dataset.missing} were left empty; "
+                   f"extra columns {dataset.extra} were dropped.")
+    correlation_matrix = dataset.stats.correlation()
+    if clustered:
+        correlation_matrix = correlation.reorder(correlation_matrix, correlation.cluster_order(correlation_matrix))
+    show_results(dataset.parts[-1], correlation_matrix, cached_heatmap(correlation_matrix))
+
+    # All rows are merged only when the download is requested
+    ui_components.download_frame(dataset.frame, "Download Updated Dataset", "Updated_Covid_Data",
+                                 key="updated_dataset", cache_key=("appended",) + dataset.key + (dataset.spec,))
+
+def show_results(covid_data, correlation_matrix, heatmap):
+    # Display results
+    st.write("### Updated Dataset with New Features:")
+    st.dataframe(covid_data.head())
+
+    st.write("### Correlation Matrix:")
+    ui_components.paged_table(correlation_matrix, key="correlation")
+
+    st.write(f"### Strongest Correlations (top {reports.TOP_PAIRS}):")
+    st.dataframe(correlation.top_pairs(correlation_matrix, reports.TOP_PAIRS), hide_index=True)
+
+    # Display heatmap
+    st.write("### Correlation Heatmap:")
+    ui_components.show_image(heatmap, "heatmap")
+
 def app():
     st.title("COVID-19 Data Analysis with Feature Engineering & Heatmap")
     st.write('---')
@@ -80,53 +137,57 @@ def app():
     st.write('---')
         
     uploaded_file = st.file_uploader("Upload the COVID-19 dataset (CSV)", type=["csv"])
+    streaming_mode = st.checkbox("Streaming mode (for files larger than memory)")
+    clustered = st.checkbox("Order heatmap by correlation clusters")
+    append_mode = st.checkbox("Append mode (add new rows to this dataset)")
     
-    if uploaded_file is not None:
-        covid_data = pd.read_csv(uploaded_file)
+    if uploaded_file is not None and streaming_mode:
+        st.write("### Performing Feature Engineering (streaming)...")
+        # Keyed by the file hash, so reruns and other sessions share the job
+        job = jobs.submit("feature-correlation-streaming", (data_loader.file_digest(uploaded_file), clustered),
+                          reports.streaming_correlation_report, uploaded_file.getvalue(), clustered)
+
+        def render(result):
+            correlation_matrix, heatmap, head, rows = result
+            st.write(f"Rows processed: {rows}")
+            show_results(head, correlation_matrix, heatmap)
+
+        ui_components.show_job(job, "Streaming correlation", render)
+
+    elif uploaded_file is not None and append_mode:
+        covid_data = data_loader.load_csv(uploaded_file)
+        deltas = st.file_uploader("New rows (CSV files, applied in upload order)", type=["csv"],
+                                  accept_multiple_files=True, key="feature_deltas")
+        # The base is summarised once in the background; deltas then apply in place
+        digest = data_loader.file_digest(uploaded_file)
+        job = jobs.submit("append-base", (digest, reports.DERIVED_FEATURES),
+                          incremental.start, digest, covid_data, reports.DERIVED_FEATURES)
+        ui_components.show_job(job, "Summarising dataset",
+                               lambda base: appended_report(incremental.extend_files(base, deltas), clustered))
+
+    elif uploaded_file is not None:
+        covid_data = data_loader.load_csv(uploaded_file)
         st.write("**Dataset Overview:**")
         st.dataframe(covid_data.head(16))
 
         # Feature Engineering
         st.write("### Performing Feature Engineering...")
-        
-        # Add derived metrics: Cases and Deaths per 100k population
-        covid_data['Cases per 100k Population'] = (covid_data['Total Cases'] / covid_data['Population']) * 100000
-        covid_data['Deaths per 100k Population'] = (covid_data['Deaths'] / covid_data['Population']) * 100000
-
-        # Select only numeric columns for correlation
-        numeric_columns = covid_data.select_dtypes(include=[np.number])  # Select only numeric data
-        correlation_matrix = numeric_columns.corr()
-
-        # Display results
-        st.write("### Updated Dataset with New Features:")
-        st.dataframe(covid_data.head())
-
-        st.write("### Correlation Matrix:")
-        st.write(correlation_matrix)
-
-        # Generate and display heatmap
-        st.write("### Correlation Heatmap:")
-        plt.figure(figsize=(10, 6))
-        sns.heatmap(
-            correlation_matrix, 
-            annot=True, 
-            fmt=".2f", 
-            cmap="coolwarm", 
-            cbar=True,
-            square=True, 
-            linewidths=0.5,
-            xticklabels=correlation_matrix.columns,
-            yticklabels=correlation_matrix.columns
-        )
-        st.pyplot(plt)
-
-        # Save the updated dataset
-        st.download_button(
-            label="Download Updated Dataset",
-            data=covid_data.to_csv(index=False).encode('utf-8'),
-            file_name="Updated_Covid_Data.csv",
-            mime="text/csv",
-        )
+        covid_data, timings = feature_engine.apply(covid_data, reports.DERIVED_FEATURES,
+                                                   key=data_loader.file_digest(uploaded_file))
+        with st.expander("Feature compute times"):
+            if timings and not any(timings.values()):
+                st.caption("Reused from the cache; nothing was recomputed.")
+            st.write(pd.Series(timings, name="Seconds"))
+
+        # Correlation matrix and heatmap run in the background
+        job = jobs.submit("feature-correlation", (data_loader.file_digest(uploaded_file), clustered),
+                          reports.correlation_report, covid_data, clustered)
+        ui_components.show_job(job, "Correlation", lambda result: show_results(covid_data, *result))
+
+        # Save the updated dataset: the file is written only when requested
+        ui_components.download_frame(covid_data, "Download Updated Dataset", "Updated_Covid_Data",
+                                     key="updated_dataset",
+                                     cache_key=(data_loader.file_digest(uploaded_file), reports.DERIVED_FEATURES))
 
 # Run the app
 if __name__ == "__main__":
@@ -1,28 +1,162 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import seaborn as sns
-import matplotlib.pyplot as plt
+import data_loader
+import profiling
+import os
+import parallel_plots
+import jobs
+import ui_components
+import sampling
+import outliers
+import instrumentation
+import incremental
+import charts
+import reports
+
+def streaming_report(job):
+    def render(result):
+        stats_table, outlier_counts, head, rows = result
+        st.write("**Dataset Overview:**")
+        st.dataframe(head)
+        st.write(f"Rows processed: {rows}")
+
+        st.write("### Skewness and Kurtosis:")
+        st.write(stats_table)
+
+        st.write("### Outliers Detection Using IQR:")
+        st.write(f"Outliers detected in each column:")
+        st.write(outlier_counts)
+        st.info("Histograms and boxplots need the full dataset in memory and are skipped in streaming mode.")
+
+    ui_components.show_job(job, "Streaming profile", render)
+
+def appended_report(dataset):
+    # Append mode: everything below comes from the version's accumulators,
+    # updated from each delta's rows only
+    st.write(f"Rows: {dataset.rows:,} in {len(dataset.parts)} file(s); "
+             f"the last append added {dataset.delta_rows:,} rows")
+    if dataset.missing or dataset.extra:
+        st.warning(f"Last delta: missing columns {dataset.missing} were left empty; "
+                   f"extra columns {dataset.extra} were dropped.")
+
+    st.write("### Skewness and Kurtosis:")
+    stats_table = dataset.stats.skew_kurt_table()
+    st.write(stats_table)
+
+    st.write("### Outliers Detection Using IQR:")
+    st.write("Outliers detected in each column (estimated from the quartile sketches):")
+    st.write(dataset.outlier_estimates())
+
+    st.write("### Histograms of Numerical Columns:")
+    st.caption(f"{len(dataset.changed)} of {len(dataset.histograms)} histograms changed with the last append; "
+               "unchanged ones are not drawn again")
+    col1, col2 = st.columns(2)
+    for i, column in enumerate(dataset.histograms):
+        with (col1, col2)[i % 2]:
+            ui_components.show_chart(charts.prepare(dataset.histogram(column), "raster"))
+    st.info("Boxplots need the full dataset in memory and are skipped in append mode.")
+
+    ui_components.download_frame(reports.skewness_table_file(stats_table),
+                                 "Download Skewness, Outliers and Kurtosis Report", "skewness_kurtosis_report",
+                                 key="skewness_report")
+
+def outlier_drilldown(data, key, sample=None):
+    # Any detection method over all rows of ``data`` (identified by ``key``),
+    # in the background; outlier rows of one column can then be browsed
+    st.write("### Outlier Drill-down:")
+    if sample is not None:
+        st.caption(f"Fast preview: outliers among the {sample.rows:,} sampled rows, "
+                   "not all rows; compute exact statistics for the full scan.")
+    method = st.selectbox("Detection method", list(outliers.METHODS),
+                          format_func=lambda m: outliers.METHODS[m][0], key="outlier_method")
+    default = outliers.METHODS[method][1]
+    if method == "mahalanobis":
+        threshold = st.number_input("Confidence level", min_value=0.5, max_value=0.9999, value=default,
+                                    step=0.005, format="%.4f", key="outlier_confidence")
+    else:
+        threshold = st.number_input("Fence multiplier", min_value=0.1, value=default, step=0.5,
+                                    key=f"outlier_threshold_{method}")
+    job = jobs.submit("outliers", (key, method, threshold), outliers.detect, data, method, threshold)
+
+    def render(result):
+        if not result.columns:
+            st.info("No numeric columns to check for outliers.")
+            return
+        col1, col2 = st.columns(2)
+        with col1:
+            st.write(pd.DataFrame({"Outliers": result.counts}))
+        with col2:
+            st.write(result.fences())
+        column = st.selectbox("Show outlier rows of", result.columns, key="outlier_column")
+        if column in result.truncated:
+            st.caption(f"Showing the first {result.max_indices:,} of {result.counts[column]:,} outlier rows.")
+        ui_components.paged_table(result.rows_of(data, column), key="outlier_rows")
+
+    ui_components.show_job(job, "Outlier detection", render)
 
 def app():
     st.title("Analysis of Skewness, Kurtosis, and Outliers (IQR)")
 
     uploaded_file = st.file_uploader("Upload your dataset (CSV)", type=["csv"])
-    
-    if uploaded_file is not None:
-        data = pd.read_csv(uploaded_file)
+    streaming_mode = st.checkbox("Streaming mode (for files larger than memory)")
+    append_mode = st.checkbox("Append mode (add new rows to this dataset)")
+
+    if uploaded_file is not None and streaming_mode:
+        # Keyed by the file hash, so reruns and other sessions share the job
+        job = jobs.submit("skewness-streaming", data_loader.file_digest(uploaded_file),
+                          reports.streaming_profile, uploaded_file.getvalue())
+        streaming_report(job)
+        if job.status == "done":
+            ui_components.download_frame(reports.skewness_table_file(job.result[0]),
+                                         "Download Skewness, Outliers and Kurtosis Report",
+                                         "skewness_kurtosis_report", key="skewness_report")
+
+    elif uploaded_file is not None and append_mode:
+        data = data_loader.load_csv(uploaded_file)
+        deltas = st.file_uploader("New rows (CSV files, applied in upload order)", type=["csv"],
+                                  accept_multiple_files=True, key="skewness_deltas")
+        # The base is summarised once in the background; deltas then apply in place
+        job = jobs.submit("append-base", (data_loader.file_digest(uploaded_file), ()),
+                          incremental.start, data_loader.file_digest(uploaded_file), data)
+        ui_components.show_job(job, "Summarising dataset",
+                               lambda base: appended_report(incremental.extend_files(base, deltas)))
+
+    elif uploaded_file is not None:
+        data = data_loader.load_csv(uploaded_file)
         st.write("**Dataset Overview:**")
         st.dataframe(data.head(16))
         
+        # Fast preview: statistics and plots come from a stratified sample
+        # drawn once per file; the exact profile runs only when asked for
+        digest = data_loader.file_digest(uploaded_file)
+        preview = len(data) > sampling.PREVIEW_ROWS and st.checkbox(
+            "Fast preview (statistics and plots from a stratified sample)", value=True)
+        if preview:
+            sample = sampling.preview_sample(uploaded_file, data)
+            sample_profile = sample.profile()
+            bounds = sample.bounds(sample_profile)
+            exact = st.button("Compute exact statistics") or jobs.get("skewness-profile", digest) is not None
+        else:
+            exact = True
+
         # Select only numeric columns
-        numeric_data = data.select_dtypes(include=[np.number])
+        numeric_data = (sample.frame if preview else data).select_dtypes(include=[np.number])
+
+        # Moments, quartiles and outlier counts in one pass over the numeric
+        # block, computed in the background while the plots below render
+        profile_job = jobs.submit("skewness-profile", digest, profiling.profile_frame, data) if exact else None
 
         # Calculate skewness and kurtosis
         st.write("### Skewness and Kurtosis:")
-        skewness = numeric_data.skew()
-        kurtosis = numeric_data.kurt()
-        stats = pd.DataFrame({"Skewness": skewness, "Kurtosis": kurtosis})
-        st.write(stats)
+        if preview:
+            st.write(sample_profile.skew_kurt_table())
+            ui_components.show_sample_bounds(sample, bounds)
+        if profile_job is not None:
+            if preview:
+                st.write("Exact (all rows):")
+            ui_components.show_job(profile_job, "Skewness and kurtosis",
+                                   lambda profile: st.write(profile.skew_kurt_table()))
 
         # Descriptions and Conclusions for Skewness
         st.write("### Skewness Analysis:")
@@ -56,68 +190,55 @@ def app():
           - None of the columns show flat distributions.
         """)
 
-        # Calculate IQR and identify outliers using IQR method
-        Q1 = numeric_data.quantile(0.25)
-        Q3 = numeric_data.quantile(0.75)
-        IQR = Q3 - Q1
-
-        # Calculate the lower and upper bounds for outliers
-        lower_bound = Q1 - 1.5 * IQR
-        upper_bound = Q3 + 1.5 * IQR
-
-        # Identify outliers (values outside the IQR bounds)
-        outliers = (numeric_data < lower_bound) | (numeric_data > upper_bound)
-        outlier_counts = outliers.sum()
-
+        # Outliers are values outside Q1 - 1.5*IQR and Q3 + 1.5*IQR
         st.write("### Outliers Detection Using IQR:")
         st.write(f"Outliers detected in each column:")
-        st.write(outlier_counts)
+        if preview:
+            st.write(bounds[["Outliers (est.)", "Outliers low", "Outliers high"]])
+        if profile_job is not None:
+            ui_components.show_job(profile_job, "Outlier counts",
+                                   lambda profile: st.write(profile.outlier_counts()))
+
+        # Full-data detection only once exact statistics are requested; the
+        # fast preview scans the sample instead
+        if exact:
+            outlier_drilldown(data, digest)
+        else:
+            outlier_drilldown(sample.frame, (digest, "preview"), sample)
 
         st.write("### Histograms of Numerical Columns:")
+        workers = int(st.number_input("Histogram rendering workers", min_value=1, max_value=os.cpu_count() or 1,
+                                      value=parallel_plots.DEFAULT_WORKERS))
         col1, col2 = st.columns(2)
 
-        # Plot histograms for distributions in two columns
+        # One placeholder per column, in the original two-column layout; plots
+        # are rendered in a process pool and fill in as each one finishes
+        half = len(numeric_data.columns)//2
+        placeholders = {}
         with col1:
-            for column in numeric_data.columns[:len(numeric_data.columns)//2]:
-                plt.figure(figsize=(6, 4))
-                sns.histplot(numeric_data[column], kde=True, bins=20, color='blue')
-                plt.title(f"Distribution of {column}")
-                plt.xlabel(column)
-                plt.ylabel("Frequency")
-                st.pyplot(plt)
-
+            for column in numeric_data.columns[:half]:
+                placeholders[column] = st.empty()
         with col2:
-            for column in numeric_data.columns[len(numeric_data.columns)//2:]: 
-                plt.figure(figsize=(6, 4))
-                sns.histplot(numeric_data[column], kde=True, bins=20, color='blue')
-                plt.title(f"Distribution of {column}")
-                plt.xlabel(column)
-                plt.ylabel("Frequency")
-                st.pyplot(plt)
-                
-        # Apply log transformation to skewed columns
-        log_columns = ['Total Cases', 'Deaths', 'Population']
-        for col in log_columns:
-            if col in numeric_data.columns:
-                numeric_data[f'log_{col}'] = np.log1p(numeric_data[col])  # log1p handles zero values.
-
-        # Create Normal Boxplots
+            for column in numeric_data.columns[half:]:
+                placeholders[column] = st.empty()
+
+        timings = {}
+        with instrumentation.span("histograms", "render") as span:
+            span.payload_bytes = 0
+            for column, png, seconds in parallel_plots.render_histograms(numeric_data, max_workers=workers):
+                placeholders[column].image(png, caption=f"Rendered in {seconds:.2f}s")
+                timings[column] = seconds
+                span.payload_bytes += len(png)
+        with st.expander("Histogram rendering times"):
+            st.write(pd.Series(timings, name="Seconds").sort_values(ascending=False))
+
+        # Boxplots of the original and log-transformed skewed columns
+        boxplot, log_boxplot = reports.boxplots(numeric_data)
         st.write("### Normal Boxplots (Without Log Transformation)")
-        plt.figure(figsize=(6, 4))
-        sns.boxplot(data=numeric_data[['Total Cases', 'Active', 'Discharged', 'Deaths', 'Active Ratio', 'Discharge Ratio', 'Death Ratio', 'Population']], orient="h", palette="Set2")
-        plt.title("Boxplot of Original Numerical Features")
-        plt.xlabel("Features")
-        plt.ylabel("Values")
-        st.pyplot(plt)
-
-        # Create Log-Transformed Boxplots
+        ui_components.show_image(boxplot, "boxplot")
+
         st.write("### Outliers Detection with Log-Transformed Boxplots")
-        plt.figure(figsize=(6, 4))
-        sns.boxplot(data=numeric_data[['log_Total Cases', 'log_Deaths', 'log_Population']], orient="h", palette="Set2")
-        plt.title("Boxplot of Log-Transformed Numerical Features")
-        plt.xlabel("Features")
-        plt.ylabel("Log-Transformed Values")
-        st.pyplot(plt)
+        ui_components.show_image(log_boxplot, "log boxplot")
 
         # Descriptions and Conclusions for Outliers
         st.write("""
@@ -130,14 +251,10 @@ def app():
         """)
 
         # Save the dataset with skewness and kurtosis included
-        stats_file = stats.reset_index().rename(columns={"index": "Feature"})
-        csv_data = stats_file.to_csv(index=False).encode('utf-8')
-        st.download_button(
-            label="Download Skewness, Outliers and Kurtosis Report",
-            data=csv_data,
-            file_name="skewness_kurtosis_report.csv",
-            mime="text/csv",
-        )
+        if profile_job is not None and profile_job.status == "done":
+            ui_components.download_frame(reports.skewness_table_file(profile_job.result.skew_kurt_table()),
+                                         "Download Skewness, Outliers and Kurtosis Report",
+                                         "skewness_kurtosis_report", key="skewness_report")
 
 if __name__ == "__main__":
     app()
@@ -0,0 +1,277 @@
+import hashlib
+import threading
+
+import numpy as np
+import pandas as pd
+
+import data_loader
+import instrumentation
+
+# Group-bys are served from a per-dataset index of group codes, built once,
+# and from per-group rollups (count, shifted sums, min, max) of the value
+# columns. A cleaning step that edits values updates the rollups from the
+# changed rows only; a different row set or edited keys rebuild the index.
+AGGREGATES = ("sum", "mean", "count", "min", "max", "std", "var")
+# Groups whose min/max was replaced are re-scanned one by one up to this
+# many; beyond it the whole column is reduced again
+MAX_RESCANNED_GROUPS = 64
+ALL_ROWS = "All rows"
+
+
+def _values(series):
+    # An owned float copy: rollups keep it, and it must not pin the frame
+    return np.array(pd.to_numeric(series, errors="coerce").to_numpy(dtype=float, na_value=np.nan), copy=True)
+
+
+def _keys_digest(df, keys):
+    # Hash of the key columns, to tell edited keys from unchanged ones
+    # without keeping the columns themselves
+    if not keys:
+        return None
+    hashes = pd.util.hash_pandas_object(df[keys], index=False).to_numpy()
+    return hashlib.blake2b(hashes.tobytes(), digest_size=16).hexdigest()
+
+
+class GroupIndex:
+    """Group codes of ``keys`` for every row, in sorted group order.
+
+    ``codes[i]`` is the group of row i; ``labels`` holds the key values of
+    each group. Missing keys form their own group. With no keys every row
+    is in a single group.
+    """
+
+    def __init__(self, df, keys):
+        self.keys = list(keys)
+        self.rows = len(df)
+        if not self.keys:
+            self.codes = np.zeros(self.rows, dtype=np.intp)
+            self.labels = pd.Index([ALL_ROWS])
+        else:
+            # Key by key, re-factorizing the running code each time, so it
+            # stays below the number of groups however many keys there are
+            per_key = [pd.factorize(df[key], sort=True, use_na_sentinel=False) for key in self.keys]
+            combined = per_key[0][0].astype(np.int64)
+            for codes, uniques in per_key[1:]:
+                combined, _ = pd.factorize(combined * len(uniques) + codes, sort=True)
+                combined = combined.astype(np.int64)
+            self.codes = combined.astype(np.intp, copy=False)
+            # Labels from one row of each group
+            first = np.empty(int(self.codes.max()) + 1 if self.rows else 0, dtype=np.intp)
+            first[self.codes[::-1]] = np.arange(self.rows - 1, -1, -1)
+            arrays = [uniques.take(codes[first]) for codes, uniques in per_key]
+            self.labels = (pd.MultiIndex.from_arrays(arrays, names=self.keys) if len(arrays) > 1
+                           else pd.Index(arrays[0], name=self.keys[0]))
+        self.ngroups = len(self.labels)
+        self._order = None
+
+    @property
+    def order(self):
+        # Row positions sorted by group (stable); group g is
+        # order[starts[g]:starts[g + 1]]
+        if self._order is None:
+            self._order = np.argsort(self.codes, kind="stable")
+            self._starts = np.concatenate([[0], np.cumsum(np.bincount(self.codes, minlength=self.ngroups))])
+        return self._order
+
+    def group_rows(self, group):
+        order = self.order
+        return order[self._starts[group]:self._starts[group + 1]]
+
+    def select(self, where=None):
+        """Boolean mask over groups whose key values are in ``where[key]``."""
+        mask = np.ones(self.ngroups, dtype=bool)
+        for key, allowed in (where or {}).items():
+            level = self.labels.get_level_values(key) if self.keys else self.labels
+            mask &= level.isin(list(allowed))
+        return mask
+
+    def nbytes(self):
+        return self.codes.nbytes * (2 if self._order is not None else 1)
+
+
+class Rollup:
+    """count, sums around ``shift``, min and max of one column per group.
+
+    ``values`` is the column as last synced, so an update can tell which
+    rows changed.
+    """
+
+    def __init__(self, index, values):
+        self.index = index
+        self.values = values
+        finite = np.isfinite(values)
+        self.shift = float(np.mean(values[finite])) if finite.any() else 0.0
+        self.count = np.zeros(index.ngroups)
+        self.s1 = np.zeros(index.ngroups)
+        self.s2 = np.zeros(index.ngroups)
+        self._add(index.codes, values, 1)
+        self._extremes(values)
+
+    def _add(self, codes, values, sign):
+        finite = np.isfinite(values)
+        codes, x = codes[finite], values[finite] - self.shift
+        n = self.index.ngroups
+        self.count += sign * np.bincount(codes, minlength=n)
+        self.s1 += sign * np.bincount(codes, weights=x, minlength=n)
+        self.s2 += sign * np.bincount(codes, weights=x * x, minlength=n)
+
+    def _extremes(self, values):
+        self.min = np.full(self.index.ngroups, np.nan)
+        self.max = np.full(self.index.ngroups, np.nan)
+        if len(values):
+            order = self.index.order
+            starts = self.index._starts[:-1]
+            present = starts < len(order)
+            self.min[present] = np.fmin.reduceat(values[order], starts[present])
+            self.max[present] = np.fmax.reduceat(values[order], starts[present])
+
+    def update(self, new):
+        """Apply the rows where ``new`` differs from the synced values; returns how many."""
+        old, self.values = self.values, new
+        changed = np.flatnonzero(~((old == new) | (np.isnan(old) & np.isnan(new))))
+        if not changed.size:
+            return 0
+        codes = self.index.codes[changed]
+        self._add(codes, old[changed], -1)
+        self._add(codes, new[changed], 1)
+        # A group whose old extreme was overwritten must be re-scanned;
+        # other groups only move towards the new values
+        removed = old[changed]
+        stale = np.unique(codes[(removed == self.min[codes]) | (removed == self.max[codes])])
+        np.fmin.at(self.min, codes, new[changed])
+        np.fmax.at(self.max, codes, new[changed])
+        if len(stale) > MAX_RESCANNED_GROUPS:
+            self._extremes(new)
+        else:
+            for group in stale:
+                rows = new[self.index.group_rows(group)]
+                finite = rows[np.isfinite(rows)]
+                self.min[group] = finite.min() if finite.size else np.nan
+                self.max[group] = finite.max() if finite.size else np.nan
+        return changed.size
+
+    def aggregate(self, func):
+        n = self.count
+        with np.errstate(invalid="ignore", divide="ignore"):
+            if func == "count":
+                return n.astype(np.int64)
+            if func == "sum":
+                return self.s1 + n * self.shift
+            if func == "mean":
+                return np.where(n > 0, self.s1 / n + self.shift, np.nan)
+            if func in ("var", "std"):
+                var = np.where(n > 1, (self.s2 - self.s1 ** 2 / n) / (n - 1), np.nan)
+                var = np.maximum(var, 0)
+                return np.sqrt(var) if func == "std" else var
+            if func == "min":
+                return self.min
+            if func == "max":
+                return self.max
+        raise ValueError(f"unknown aggregate {func!r}; expected one of {AGGREGATES}")
+
+    def nbytes(self):
+        return 5 * self.count.nbytes + self.values.nbytes
+
+
+class Aggregator:
+    """Group index and rollups for one dataset and one set of keys.
+
+    Every query takes the current version of the data (e.g. after a
+    cleaning step) and first brings the index and rollups in line with it,
+    under the same lock; the query then reads the rollups, so its cost
+    depends on the number of groups rather than rows. ``version`` names the
+    content of the frame (e.g. the cleaning steps applied to the dataset):
+    a query with the version of the last sync skips comparing the data. The
+    frame itself is not kept.
+    """
+
+    def __init__(self, keys):
+        self._lock = threading.Lock()
+        self.keys = list(keys)
+        self.builds = 0
+        self.updated_rows = 0
+        self.index = None
+        self.rollups = {}
+        self._version = None
+        self._keys_digest = None
+
+    @instrumentation.traced("aggregation.build_index")
+    def _build(self, df):
+        self.index = GroupIndex(df, self.keys)
+        self._keys_digest = _keys_digest(df, self.keys)
+        self.rollups = {}
+        self.builds += 1
+
+    def _rebuild_needed(self, df):
+        if self.index is None or len(df) != self.index.rows or not all(key in df.columns for key in self.keys):
+            return True
+        return _keys_digest(df, self.keys) != self._keys_digest
+
+    def _sync(self, df, version):
+        # Called with the lock held. Pages get a new frame object on every
+        # rerun, so the version, not the object, tells an unchanged dataset
+        if version is not None and version == self._version and self.index is not None:
+            return
+        if self._rebuild_needed(df):
+            self._build(df)
+        else:
+            with instrumentation.span("aggregation.update", "compute"):
+                for column in list(self.rollups):
+                    if column not in df.columns:
+                        del self.rollups[column]
+                    else:
+                        self.updated_rows += self.rollups[column].update(_values(df[column]))
+        self._version = version
+
+    def _rollup(self, df, column):
+        rollup = self.rollups.get(column)
+        if rollup is None:
+            rollup = self.rollups[column] = Rollup(self.index, _values(df[column]))
+        return rollup
+
+    def labels(self, df, version=None):
+        """Key values of every group of ``df``."""
+        with self._lock:
+            self._sync(df, version)
+            return self.index.labels
+
+    def aggregate(self, df, columns, funcs=("sum", "mean"), where=None, version=None):
+        """Like ``df.groupby(keys)[columns].agg(funcs)``; ``where`` keeps
+        only the groups whose key values are listed (``{key: values}``)."""
+        with self._lock:
+            self._sync(df, version)
+            keep = self.index.select(where)
+            data = {(column, func): self._rollup(df, column).aggregate(func)[keep]
+                    for column in columns for func in funcs}
+            labels = self.index.labels[keep]
+        return pd.DataFrame(data, index=labels)
+
+    def series(self, df, column, func="sum", where=None, version=None):
+        return self.aggregate(df, [column], [func], where, version)[(column, func)].rename(column)
+
+    def top(self, df, column, func="sum", n=10, where=None, largest=True, version=None):
+        """The ``n`` groups with the largest (or smallest) ``func(column)``."""
+        values = self.series(df, column, func, where, version).dropna()
+        return values.nlargest(n) if largest else values.nsmallest(n)
+
+    def nbytes(self):
+        index = self.index.nbytes() if self.index is not None else 0
+        return index + sum(rollup.nbytes() for rollup in self.rollups.values())
+
+
+# Keyed by (dataset digest, keys, scope). Pages pass their session as the
+# scope: sessions clean the same file differently, and a shared aggregator
+# would be re-synced back and forth between their versions on every rerun.
+aggregator_cache = data_loader.MemoryLRUCache(max_bytes=256 * 1024 * 1024, sizeof=Aggregator.nbytes)
+_cache_lock = threading.Lock()
+
+
+def aggregator(source_key, keys, scope=None):
+    """The Aggregator for ``keys`` over dataset ``source_key`` in ``scope``."""
+    key = (source_key, tuple(keys), scope)
+    with _cache_lock:
+        agg = aggregator_cache.get(key)
+        # Put back on every lookup, so the cache re-measures the rollups
+        # the previous queries added
+        agg = aggregator_cache.put(key, agg if agg is not None else Aggregator(keys))
+    return agg
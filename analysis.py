@@ -1,12 +1,190 @@
 import streamlit as st
+import io
 import pandas as pd
-import matplotlib.pyplot as plt
+import numpy as np
 import seaborn as sns
 import time
+from matplotlib.figure import Figure
+import data_loader
+import fast_plots
+import correlation
+import sampling
+import charts
+import jobs
+import ui_components
+import instrumentation
 
 # Set the style for seaborn
 sns.set(style="whitegrid")
 
+# Above this many rows the grid switches to binned / downsampled drawing
+LARGE_DATASET_ROWS = 50_000
+SCATTER_SAMPLE_ROWS = 20_000
+
+# Rendered grids as PNG bytes, shared by every session
+grid_cache = data_loader.MemoryLRUCache(max_bytes=256 * 1024 * 1024, sizeof=len)
+
+
+def render_grid(df):
+    # Build the 3x3 grid with the object-oriented Figure API (no pyplot global
+    # state) and return it as PNG bytes
+    with instrumentation.span("grid", "render"):
+        fig = draw_grid(df)
+    with instrumentation.span("grid png", "serialize") as span:
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="png", bbox_inches="tight")
+        span.payload_bytes = buffer.tell()
+    return buffer.getvalue()
+
+
+def draw_grid(df):
+    # Artists only; matplotlib rasterises them in savefig
+    large = len(df) > LARGE_DATASET_ROWS
+    first, second = df.columns[0], df.columns[1] if df.shape[1] > 1 else None
+
+    # Create 3x3 grid of subplots with increased figure size
+    fig = Figure(figsize=(18, 18))
+    axes = fig.subplots(3, 3)
+    fig.tight_layout(pad=6.0)  # Increase padding for better spacing
+
+    # Plots 1 & 2: Histograms of the first two columns
+    for ax, column in ((axes[0, 0], first), (axes[0, 1], second)):
+        if column is None:
+            continue
+        if not large:
+            sns.histplot(df[column], ax=ax, kde=True)
+        elif _is_numeric(df[column]):
+            fast_plots.hist_with_kde(ax, df[column])
+        else:
+            fast_plots.counts_bar(ax, df[column])
+        ax.set_title(f"Histogram of {column}")
+        ax.set_xlabel(column)
+        ax.set_ylabel("Frequency")
+
+    # Plot 3: Scatter plot of the first two numerical columns
+    if second is not None:
+        if not large:
+            sns.scatterplot(data=df, x=first, y=second, ax=axes[0, 2])
+        elif _is_numeric(df[first]) and _is_numeric(df[second]):
+            # Hexagonal binning keeps the point density without drawing every row
+            fast_plots.hexbin_scatter(axes[0, 2], df[first], df[second])
+        else:
+            sample = df.sample(SCATTER_SAMPLE_ROWS, random_state=0)
+            sns.scatterplot(data=sample, x=first, y=second, ax=axes[0, 2])
+        axes[0, 2].set_title(f"Scatter Plot of {first} vs {second}")
+        axes[0, 2].set_xlabel(first)
+        axes[0, 2].set_ylabel(second)
+
+    # Plot 4: Box plot of the first numerical column
+    if not large:
+        sns.boxplot(x=df[first], ax=axes[1, 0])
+    elif _is_numeric(df[first]):
+        fast_plots.box_from_quantiles(axes[1, 0], df[first])
+    axes[1, 0].set_title(f"Box Plot of {first}")
+    axes[1, 0].set_xlabel(first)
+
+    # Plot 5: Correlation heatmap of the dataset
+    numeric_df = df.select_dtypes(include=[np.number])
+    if not numeric_df.empty:
+        # Blocked float32 correlation; wide matrices are drawn unannotated
+        fast_plots.correlation_heatmap(axes[1, 1], correlation.correlation_matrix(numeric_df))
+        axes[1, 1].set_title("Correlation Heatmap")
+    else:
+        axes[1, 1].text(0.5, 0.5, "No numeric data for correlation", ha='center', va='center', fontsize=12)
+        axes[1, 1].set_title("Correlation Heatmap (No Data)")
+
+    # Plot 6: Bar plot of the first categorical column
+    categorical_cols = df.select_dtypes(include=['object', 'category', 'string']).columns
+    if len(categorical_cols) > 0:
+        if not large:
+            sns.countplot(x=df[categorical_cols[0]], ax=axes[1, 2])
+        else:
+            fast_plots.counts_bar(axes[1, 2], df[categorical_cols[0]])
+        axes[1, 2].set_title(f"Count Plot of {categorical_cols[0]}")
+        axes[1, 2].set_xlabel(categorical_cols[0])
+        axes[1, 2].set_ylabel("Count")
+
+    # Plot 7: Line plot of the first numerical column
+    if not large:
+        sns.lineplot(data=df[first], ax=axes[2, 0])
+    elif _is_numeric(df[first]):
+        # Min/max per bucket keeps the envelope of the series
+        x, y = fast_plots.minmax_decimate(df[first].to_numpy(dtype=float, na_value=np.nan))
+        axes[2, 0].plot(x, y, linewidth=0.8)
+    axes[2, 0].set_title(f"Line Plot of {first}")
+    axes[2, 0].set_xlabel("Index")
+    axes[2, 0].set_ylabel(first)
+
+    # Plot 8: KDE Plot
+    if len(numeric_df.columns) > 1:
+        second_numeric_column = numeric_df.columns[1]
+        if not large:
+            sns.kdeplot(data=df[second_numeric_column], ax=axes[2, 1], fill=True)
+        else:
+            fast_plots.kde_fill(axes[2, 1], df[second_numeric_column])
+        axes[2, 1].set_title(f"KDE Plot of {second_numeric_column}")
+        axes[2, 1].set_xlabel(second_numeric_column)
+        axes[2, 1].set_ylabel("Density")
+    else:
+        axes[2, 1].text(0.5, 0.5, "No numeric data available for KDE Plot", ha='center', va='center', fontsize=12)
+        axes[2, 1].set_title("KDE Plot (No Data)")
+
+    # Plot 9: Violin plot of the first numerical column
+    if not large:
+        sns.violinplot(x=df[first], ax=axes[2, 2])
+    elif _is_numeric(df[first]):
+        fast_plots.violin_from_bins(axes[2, 2], df[first])
+    axes[2, 2].set_title(f"Violin Plot of {first}")
+    axes[2, 2].set_xlabel(first)
+    return fig
+
+
+def grid_key(uploaded_file, df):
+    # The grid depends only on the file contents and the columns it plots
+    numeric_columns = tuple(df.select_dtypes(include=[np.number]).columns)
+    categorical_columns = tuple(df.select_dtypes(include=['object', 'category', 'string']).columns[:1])
+    return (data_loader.file_digest(uploaded_file), tuple(df.columns[:2]), numeric_columns,
+            categorical_columns, len(df) > LARGE_DATASET_ROWS)
+
+
+def cached_grid(key, df):
+    # Background job: render the grid and keep the PNG for later reruns
+    return grid_cache.put(key, render_grid(df))
+
+
+def show_grid(key, df):
+    # Reruns triggered by the explanation buttons reuse the rendered grid
+    png = grid_cache.get(key)
+    if png is not None:
+        # Display all graphs
+        ui_components.show_image(png, "grid")
+    else:
+        # Rendered in the background; the explanations below stay usable meanwhile
+        job = jobs.submit("analysis-grid", key, cached_grid, key, df)
+        ui_components.show_job(job, "Rendering graphs", lambda png: ui_components.show_image(png, "grid"))
+
+
+def show_aggregated_charts(df):
+    # Binned / grouped on the server, so the browser gets a few hundred rows
+    # whatever the size of the dataset
+    backend = st.radio("Chart backend", charts.BACKENDS, horizontal=True)
+    numeric_cols = df.select_dtypes(include=[np.number]).columns
+    categorical_cols = df.select_dtypes(include=['object', 'category', 'string']).columns
+    prepared = [charts.prepare(charts.histogram(df[col]), backend) for col in numeric_cols[:2]]
+    if len(numeric_cols) > 1:
+        prepared.append(charts.prepare(charts.density_heatmap(df[numeric_cols[0]], df[numeric_cols[1]]), backend))
+    if len(categorical_cols) > 0:
+        prepared.append(charts.prepare(charts.bar(df, categorical_cols[0], title=f"Rows per {categorical_cols[0]}"), backend))
+    columns = st.columns(2)
+    for i, chart in enumerate(prepared):
+        with columns[i % 2]:
+            ui_components.show_chart(chart)
+
+
+def _is_numeric(series):
+    return pd.api.types.is_numeric_dtype(series)
+
+
 # Define the app function
 def app():
     # Title and file uploader
@@ -15,7 +193,7 @@ def app():
 
     if uploaded_file is not None:
         # Load the dataset
-        df = pd.read_csv(uploaded_file)
+        df = data_loader.load_csv(uploaded_file)
         
         # Display an overview of the dataset
         st.write("## Dataset Overview")
@@ -23,75 +201,22 @@ def app():
         st.write(f"Total Columns: {df.shape[1]}")
         st.write(df.head())  # Display the first few rows
 
-        # Create 3x3 grid of subplots with increased figure size
-        fig, axes = plt.subplots(3, 3, figsize=(18, 18))
-        fig.tight_layout(pad=6.0)  # Increase padding for better spacing
-
-        # Plot 1: Histogram of the first numerical column
-        sns.histplot(df[df.columns[0]], ax=axes[0, 0], kde=True)
-        axes[0, 0].set_title(f"Histogram of {df.columns[0]}")
-        axes[0, 0].set_xlabel(df.columns[0])
-        axes[0, 0].set_ylabel("Frequency")
-
-        # Plot 2: Histogram of the second numerical column
-        sns.histplot(df[df.columns[1]], ax=axes[0, 1], kde=True)
-        axes[0, 1].set_title(f"Histogram of {df.columns[1]}")
-        axes[0, 1].set_xlabel(df.columns[1])
-        axes[0, 1].set_ylabel("Frequency")
-
-        # Plot 3: Scatter plot of the first two numerical columns
-        if df.shape[1] > 1:
-            sns.scatterplot(data=df, x=df.columns[0], y=df.columns[1], ax=axes[0, 2])
-            axes[0, 2].set_title(f"Scatter Plot of {df.columns[0]} vs {df.columns[1]}")
-            axes[0, 2].set_xlabel(df.columns[0])
-            axes[0, 2].set_ylabel(df.columns[1])
-
-        # Plot 4: Box plot of the first numerical column
-        sns.boxplot(x=df[df.columns[0]], ax=axes[1, 0])
-        axes[1, 0].set_title(f"Box Plot of {df.columns[0]}")
-        axes[1, 0].set_xlabel(df.columns[0])
-
-        # Plot 5: Correlation heatmap of the dataset
-        numeric_df = df.select_dtypes(include=['float64', 'int64'])
-        if not numeric_df.empty:
-            sns.heatmap(numeric_df.corr(), annot=True, cmap="coolwarm", ax=axes[1, 1])
-            axes[1, 1].set_title("Correlation Heatmap")
-        else:
-            axes[1, 1].text(0.5, 0.5, "No numeric data for correlation", ha='center', va='center', fontsize=12)
-            axes[1, 1].set_title("Correlation Heatmap (No Data)")
-
-        # Plot 6: Bar plot of the first categorical column
-        categorical_cols = df.select_dtypes(include=['object']).columns
-        if len(categorical_cols) > 0:
-            sns.countplot(x=df[categorical_cols[0]], ax=axes[1, 2])
-            axes[1, 2].set_title(f"Count Plot of {categorical_cols[0]}")
-            axes[1, 2].set_xlabel(categorical_cols[0])
-            axes[1, 2].set_ylabel("Count")
-
-        # Plot 7: Line plot of the first numerical column
-        sns.lineplot(data=df[df.columns[0]], ax=axes[2, 0])
-        axes[2, 0].set_title(f"Line Plot of {df.columns[0]}")
-        axes[2, 0].set_xlabel("Index")
-        axes[2, 0].set_ylabel(df.columns[0])
-
-        # Plot 8: KDE Plot
-        if len(numeric_df.columns) > 1:
-            second_numeric_column = numeric_df.columns[1]
-            sns.kdeplot(data=df[second_numeric_column], ax=axes[2, 1], fill=True)
-            axes[2, 1].set_title(f"KDE Plot of {second_numeric_column}")
-            axes[2, 1].set_xlabel(second_numeric_column)
-            axes[2, 1].set_ylabel("Density")
+        key = grid_key(uploaded_file, df)
+        preview = len(df) > sampling.PREVIEW_ROWS and st.checkbox(
+            "Fast preview (plots from a stratified sample)", value=True)
+        if preview:
+            sample = sampling.preview_sample(uploaded_file, df)
+            show_grid(key + ("preview", sample.rows), sample.frame)
+            ui_components.show_sample_bounds(sample, sample.bounds())
+            # The full-data grid keeps rendering in the background once asked for
+            if st.button("Compute exact plots") or jobs.get("analysis-grid", key) is not None:
+                st.write("### Exact plots (all rows)")
+                show_grid(key, df)
         else:
-            axes[2, 1].text(0.5, 0.5, "No numeric data available for KDE Plot", ha='center', va='center', fontsize=12)
-            axes[2, 1].set_title("KDE Plot (No Data)")
+            show_grid(key, df)
 
-        # Plot 9: Violin plot of the first numerical column
-        sns.violinplot(x=df[df.columns[0]], ax=axes[2, 2])
-        axes[2, 2].set_title(f"Violin Plot of {df.columns[0]}")
-        axes[2, 2].set_xlabel(df.columns[0])
-
-        # Display all graphs
-        st.pyplot(fig)
+        if st.checkbox("Interactive charts (aggregated on the server)"):
+            show_aggregated_charts(df)
     else:
         st.write("Please upload a dataset to view the visualizations.")
 
@@ -0,0 +1,186 @@
+"""Run the page reports over many files, without the Streamlit UI.
+
+Each input file is processed in a worker process and its outputs (the CSV
+reports and PNG figures the pages show or offer for download) are written to
+OUT/<file name>/. A summary of every file is written to OUT/batch_summary.csv.
+
+Usage:
+    python batch.py data/districts --out reports
+    python batch.py "data/*.csv" extra.xlsx --reports skewness --workers 8
+"""
+import argparse
+import concurrent.futures
+import glob
+import multiprocessing
+import os
+import re
+import sys
+import time
+
+import instrumentation
+
+INPUT_SUFFIXES = (".csv", ".xlsx")
+SUMMARY_FILE = "batch_summary.csv"
+# Characters not kept in output file names (path separators, reserved on
+# Windows, control characters)
+UNSAFE_CHARACTERS = re.compile(r'[\\/:*?"<>|\x00-\x1f]')
+
+
+def input_files(patterns):
+    """Files named by ``patterns`` (paths, globs or directories), in order, once each."""
+    files = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) or [pattern]
+        for match in matches:
+            if os.path.isdir(match):
+                files += sorted(os.path.join(match, name) for name in os.listdir(match)
+                                if name.lower().endswith(INPUT_SUFFIXES))
+            else:
+                files.append(match)
+    return list(dict.fromkeys(files))
+
+
+def output_dirs(files, out):
+    # OUT/<file name without suffix>; repeated names get a numeric suffix
+    dirs, seen = {}, {}
+    for path in files:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        seen[stem] = seen.get(stem, 0) + 1
+        dirs[path] = os.path.join(out, stem if seen[stem] == 1 else f"{stem}_{seen[stem]}")
+    return dirs
+
+
+def _init_worker():
+    # Every file is read once per run, so parsed frames are not kept in
+    # memory; the on-disk dataset store still saves re-parsing on later runs
+    import data_loader
+
+    data_loader.dataset_cache.max_bytes = 0
+
+
+def safe_file_names(names):
+    """{name: file name} with unsafe characters replaced and clashes numbered."""
+    files, used = {}, set()
+    for name in names:
+        safe = UNSAFE_CHARACTERS.sub("_", name).strip(" .") or "output"
+        stem, suffix = os.path.splitext(safe)
+        n = 1
+        while safe.lower() in used:
+            n += 1
+            safe = f"{stem}_{n}{suffix}"
+        used.add(safe.lower())
+        files[name] = safe
+    return files
+
+
+def write_outputs(outputs, directory):
+    # DataFrames as CSV, figures as the PNG bytes they were rendered to.
+    # Output names can contain column names, so they are made safe first
+    os.makedirs(directory, exist_ok=True)
+    with instrumentation.span("write outputs", "serialize") as span:
+        span.payload_bytes = 0
+        for name, file_name in safe_file_names(outputs).items():
+            value = outputs[name]
+            path = os.path.join(directory, file_name)
+            if isinstance(value, bytes):
+                with open(path, "wb") as f:
+                    f.write(value)
+            else:
+                value.to_csv(path, index=False)
+            span.payload_bytes += os.path.getsize(path)
+
+
+def run_file(path, report_names, directory):
+    """Load ``path``, run the named reports and write their outputs.
+
+    Runs in a worker process. Failures are returned rather than raised, so
+    one bad file doesn't stop the batch.
+    """
+    import data_loader
+    import reports
+
+    trace = instrumentation.begin("batch")
+    result = {"file": path, "output": directory, "rows": 0, "outputs": 0, "error": None}
+    try:
+        if path.lower().endswith(".xlsx"):
+            data = data_loader.load_excel(path)
+        else:
+            data = data_loader.load_csv(path)
+        result["rows"] = len(data)
+        for name in report_names:
+            outputs = reports.REPORTS[name](data)
+            write_outputs(outputs, directory)
+            result["outputs"] += len(outputs)
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        instrumentation.end(trace)
+    result["seconds"] = trace.seconds
+    result.update(trace.stage_totals())
+    return result
+
+
+def run_batch(files, report_names, out, workers):
+    """Yield each file's result as it finishes."""
+    dirs = output_dirs(files, out)
+    if workers <= 1:
+        _init_worker()
+        for path in files:
+            yield run_file(path, report_names, dirs[path])
+        return
+    # Spawned workers, as elsewhere in the app: no forked pandas/BLAS state
+    context = multiprocessing.get_context("spawn")
+    with concurrent.futures.ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker) as pool:
+        futures = [pool.submit(run_file, path, report_names, dirs[path]) for path in files]
+        for future in concurrent.futures.as_completed(futures):
+            yield future.result()
+
+
+def _format(result):
+    if result["error"]:
+        return f"FAILED {result['file']}: {result['error']}"
+    return (f"ok     {result['file']}: {result['rows']:,} rows, {result['outputs']} outputs "
+            f"in {result['seconds']:.2f} s")
+
+
+def main():
+    import reports
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("inputs", nargs="+", help="CSV/Excel files, glob patterns or directories")
+    parser.add_argument("--out", default="batch_reports", help="output directory (default: %(default)s)")
+    parser.add_argument("--reports", nargs="+", choices=list(reports.REPORTS), default=list(reports.REPORTS))
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="worker processes (default: one per CPU)")
+    args = parser.parse_args()
+
+    files = input_files(args.inputs)
+    if not files:
+        parser.error("no input files found")
+    workers = max(1, min(args.workers, len(files)))
+    print(f"{len(files)} file(s), reports: {', '.join(args.reports)}, {workers} worker(s)", flush=True)
+
+    start = time.perf_counter()
+    results = []
+    for result in run_batch(files, args.reports, args.out, workers):
+        results.append(result)
+        print(_format(result), flush=True)
+    elapsed = time.perf_counter() - start
+
+    import pandas as pd
+
+    summary = pd.DataFrame(results)
+    os.makedirs(args.out, exist_ok=True)
+    summary.to_csv(os.path.join(args.out, SUMMARY_FILE), index=False)
+    failed = int(summary["error"].notna().sum())
+    stages = ", ".join(f"{stage} {summary[stage].sum():.1f} s" for stage in instrumentation.STAGES)
+    print(f"\n{len(files) - failed} of {len(files)} file(s) done in {elapsed:.2f} s: "
+          f"{len(files) / elapsed:.2f} files/sec, {summary['rows'].sum() / elapsed:,.0f} rows/sec")
+    print(f"Time in workers by stage: {stages}")
+    print(f"Summary written to {os.path.join(args.out, SUMMARY_FILE)}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
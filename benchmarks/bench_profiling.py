@@ -0,0 +1,60 @@
+"""Compare the per-call pandas reductions with profiling.profile_frame.
+
+Usage: python benchmarks/bench_profiling.py [--rows 1000000] [--cols 50]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import profiling  # noqa: E402
+
+
+def current_call_chain(df):
+    # What Skewness_OutlierDetection.app and introduction.app compute today
+    numeric_data = df.select_dtypes(include=[np.number])
+    numeric_data.skew()
+    numeric_data.kurt()
+    q1 = numeric_data.quantile(0.25)
+    q3 = numeric_data.quantile(0.75)
+    iqr = q3 - q1
+    outliers = (numeric_data < q1 - 1.5 * iqr) | (numeric_data > q3 + 1.5 * iqr)
+    outliers.sum()
+    df.isnull().sum()
+    df.describe()
+
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--cols", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.lognormal(size=(args.rows, args.cols)),
+                      columns=[f"col_{i}" for i in range(args.cols)])
+
+    pandas_time = best_of(lambda: current_call_chain(df), args.repeat)
+    profile_time = best_of(lambda: profiling.profile_frame(df), args.repeat)
+    print(f"{args.rows} x {args.cols}")
+    print(f"pandas call chain: {pandas_time:.3f} s")
+    print(f"profile_frame:     {profile_time:.3f} s")
+    print(f"speedup:           {pandas_time / profile_time:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+"""Headless benchmarks of every page's compute path on synthetic COVID data.
+
+Each (case, rows, width) runs in a fresh process, so peak RSS is not
+inflated by earlier cases. Wall time is the best of --repeat runs; the
+allocation peak comes from one extra run under tracemalloc.
+
+Usage:
+    python benchmarks/run_benchmarks.py --rows 10000 100000 --widths 9 50
+    python benchmarks/run_benchmarks.py --save-baseline
+    python benchmarks/run_benchmarks.py --compare benchmarks/baseline.json
+"""
+import argparse
+import concurrent.futures
+import io
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+# Relative change in wall time or allocation peak reported as a regression
+TOLERANCE = 0.15
+
+
+# Each case is (setup, run): setup(rows, width) builds the inputs outside the
+# timed region and run(inputs) is the page's compute path.
+
+def _frame(rows, width):
+    import synthetic
+
+    return synthetic.covid_frame(rows, width)
+
+
+def _pair(rows, width):
+    import synthetic
+
+    return synthetic.keyed_pair(rows, width)
+
+
+def _csv_bytes(rows, width):
+    return _frame(rows, width).to_csv(index=False).encode()
+
+
+def _analysis_grid(df):
+    import analysis
+
+    analysis.render_grid(df)
+
+
+def _analysis_preview(df):
+    import analysis
+    import sampling
+
+    sample = sampling.build_sample(df)
+    analysis.render_grid(sample.frame)
+    sample.bounds()
+
+
+def _introduction(df):
+    import aggregation
+    import charts
+    import cleaning_pipeline
+    import compact_dtypes
+    import profiling
+
+    df, _ = compact_dtypes.compact(df)
+    df.columns = df.columns.str.strip().str.title().str.replace(' ', '_')
+    profiling.profile_frame(df).describe()
+    pipeline = cleaning_pipeline.CleaningPipeline("bench")
+    pipeline.add("fill_missing", value=0)
+    pipeline.add("add_population_density")
+    cleaned = pipeline.result(df)
+    aggregator = aggregation.aggregator("bench", ["State/Uts"], scope=pipeline.id)
+    version = tuple(pipeline.steps)
+    aggregator.aggregate(cleaned, ["Total_Cases", "Deaths"], ["sum", "mean"], version=version)
+    totals = aggregator.series(cleaned, "Total_Cases", "sum", version=version)
+    charts.prepare(charts.grouped_bar(totals, "State/Uts", "Total_Cases"))
+
+
+def _feature_engineering(df):
+    import feature_engine
+    import reports
+
+    df, _ = feature_engine.apply(df, reports.DERIVED_FEATURES)
+    reports.correlation_report(df)
+
+
+def _skewness_profile(df):
+    import profiling
+
+    profile = profiling.profile_frame(df)
+    profile.skew_kurt_table()
+    profile.outlier_counts()
+
+
+def _outliers(method):
+    def run(df):
+        import outliers
+
+        outliers.detect(df, method)
+    return run
+
+
+def _histograms(df):
+    import numpy as np
+    import parallel_plots
+
+    for _ in parallel_plots.render_histograms(df.select_dtypes(include=[np.number]), max_workers=1):
+        pass
+
+
+def _merge(pair):
+    import joins
+
+    joins.join(pair[0], pair[1], on="Row Id", how="inner")
+
+
+def _union(pair):
+    import out_of_core
+
+    out_of_core.union_to_disk(list(pair)).cleanup()
+
+
+def _concat(pair):
+    import out_of_core
+
+    out_of_core.concat_to_disk(list(pair)).cleanup()
+
+
+def _appendable(rows, width):
+    # A summarised base plus a delta of 1% new rows
+    import incremental
+    import reports
+    import synthetic
+
+    base = incremental.start("bench", _frame(rows, width), reports.DERIVED_FEATURES)
+    return base, synthetic.covid_frame(max(rows // 100, 1), width, seed=1)
+
+
+def _append(inputs):
+    base, delta = inputs
+    base.append("delta", delta)
+
+
+def _streaming(data):
+    import streaming
+
+    stats, _ = streaming.stream_stats(streaming.iter_csv_chunks(io.BytesIO(data)))
+    stats.skew_kurt_table()
+    stats.correlation()
+
+
+CASES = {
+    "analysis.grid": (_frame, _analysis_grid),
+    "analysis.preview": (_frame, _analysis_preview),
+    "introduction": (_frame, _introduction),
+    "feature_engineering": (_frame, _feature_engineering),
+    "skewness.profile": (_frame, _skewness_profile),
+    "skewness.outliers_iqr": (_frame, _outliers("iqr")),
+    "skewness.outliers_mad": (_frame, _outliers("mad")),
+    "skewness.outliers_mahalanobis": (_frame, _outliers("mahalanobis")),
+    "skewness.histograms": (_frame, _histograms),
+    "operations.merge": (_pair, _merge),
+    "operations.union": (_pair, _union),
+    "operations.concat": (_pair, _concat),
+    "streaming.stats": (_csv_bytes, _streaming),
+    "incremental.append": (_appendable, _append),
+}
+
+
+def _rss_mb():
+    # Current resident set size (Linux); falls back to the peak elsewhere
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError):
+        return _peak_rss_mb()
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+def measure(case, rows, width, repeat, trace):
+    # Runs in a child process
+    os.chdir(ROOT)
+    setup, run = CASES[case]
+    inputs = setup(rows, width)
+    run(inputs)  # warm-up: imports, caches, pools
+    rss_before = _rss_mb()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run(inputs)
+        timings.append(time.perf_counter() - start)
+    result = {
+        "case": case,
+        "rows": rows,
+        "width": width,
+        "seconds": min(timings),
+        "rss_before_mb": round(rss_before, 1),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+    }
+    if trace:
+        tracemalloc.start()
+        run(inputs)
+        result["alloc_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 1)
+        tracemalloc.stop()
+    return result
+
+
+def run_all(cases, rows_list, widths, repeat, trace):
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for rows in rows_list:
+        for width in widths:
+            for case in cases:
+                with concurrent.futures.ProcessPoolExecutor(1, mp_context=context) as pool:
+                    try:
+                        result = pool.submit(measure, case, rows, width, repeat, trace).result()
+                    except Exception as e:  # keep going; the failure is part of the report
+                        result = {"case": case, "rows": rows, "width": width, "error": f"{type(e).__name__}: {e}"}
+                results.append(result)
+                print(_format(result), flush=True)
+    return results
+
+
+def _format(result):
+    label = f"{result['case']:<32} {result['rows']:>10,} x {result['width']:<4}"
+    if "error" in result:
+        return f"{label} ERROR {result['error']}"
+    alloc = f"{result['alloc_peak_mb']:>9.1f} MB alloc" if "alloc_peak_mb" in result else ""
+    return f"{label} {result['seconds']:>9.3f} s {result['peak_rss_mb']:>9.1f} MB peak RSS {alloc}"
+
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """Lines describing changes against the baseline; and whether any regressed."""
+    previous = {(r["case"], r["rows"], r["width"]): r for r in baseline["results"]}
+    lines, regressed = [], False
+    for result in results:
+        key = (result["case"], result["rows"], result["width"])
+        old = previous.get(key)
+        if old is None or "error" in result or "error" in old:
+            continue
+        for metric in ("seconds", "alloc_peak_mb"):
+            if metric not in result or metric not in old or not old[metric]:
+                continue
+            ratio = result[metric] / old[metric]
+            if ratio > 1 + tolerance:
+                status, regressed = "REGRESSION", True
+            elif ratio < 1 - tolerance:
+                status = "improved"
+            else:
+                continue
+            lines.append(f"{status:<10} {key[0]} {key[1]:,}x{key[2]} {metric}: "
+                         f"{old[metric]:.3f} -> {result[metric]:.3f} ({ratio:.2f}x)")
+    return lines, regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--widths", type=int, nargs="+", default=[9])
+    parser.add_argument("--cases", nargs="+", choices=sorted(CASES), default=list(CASES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-trace", action="store_true", help="skip the tracemalloc run")
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--save-baseline", nargs="?", const=DEFAULT_BASELINE, metavar="PATH")
+    parser.add_argument("--compare", nargs="?", const=DEFAULT_BASELINE, metavar="PATH")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    args = parser.parse_args()
+
+    results = run_all(args.cases, args.rows, args.widths, args.repeat, not args.no_trace)
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "results": results,
+    }
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                json.dump(report, f, indent=2)
+            print(f"wrote {path}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        lines, regressed = compare(results, baseline, args.tolerance)
+        print(f"\nCompared with {args.compare} ({baseline.get('created', '?')}):")
+        print("\n".join(lines) if lines else f"no changes beyond ±{args.tolerance:.0%}")
+        if regressed:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Synthetic datasets with the schema of the COVID state/UT exports."""
+import numpy as np
+import pandas as pd
+
+STATES = [
+    "Andaman and Nicobar", "Andhra Pradesh", "Arunachal Pradesh", "Assam", "Bihar", "Chandigarh",
+    "Chhattisgarh", "Dadra and Nagar Haveli and Daman and Diu", "Delhi", "Goa", "Gujarat", "Haryana",
+    "Himachal Pradesh", "Jammu and Kashmir", "Jharkhand", "Karnataka", "Kerala", "Ladakh", "Lakshadweep",
+    "Madhya Pradesh", "Maharashtra", "Manipur", "Meghalaya", "Mizoram", "Nagaland", "Odisha", "Puducherry",
+    "Punjab", "Rajasthan", "Sikkim", "Tamil Nadu", "Telangana", "Tripura", "Uttar Pradesh", "Uttarakhand",
+    "West Bengal",
+]
+SCHEMA_COLUMNS = 9
+
+
+def covid_frame(rows, width=SCHEMA_COLUMNS, seed=0, missing=0.01):
+    """``rows`` rows of COVID-shaped data, ``width`` columns wide.
+
+    The first nine columns follow the export schema; extra columns are
+    skewed numeric metrics. About ``missing`` of the Active values are NaN.
+    """
+    rng = np.random.default_rng(seed)
+    population = np.round(rng.lognormal(15.5, 1.2, rows)).astype(np.int64) + 1000
+    total = rng.binomial(population, rng.beta(2, 30, rows))
+    deaths = rng.binomial(total, rng.beta(2, 150, rows))
+    active = rng.binomial(total - deaths, rng.beta(1, 40, rows)).astype(float)
+    discharged = total - deaths - active.astype(np.int64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        safe_total = np.where(total > 0, total, 1)
+        df = pd.DataFrame({
+            "State/Uts": pd.Series(rng.choice(STATES, rows, p=_state_weights(rng))).astype(str),
+            "Total Cases": total,
+            "Active": active,
+            "Discharged": discharged,
+            "Deaths": deaths,
+            "Active Ratio": np.round(active / safe_total * 100, 2),
+            "Discharge Ratio": np.round(discharged / safe_total * 100, 2),
+            "Death Ratio": np.round(deaths / safe_total * 100, 2),
+            "Population": population,
+        })
+    df.loc[rng.random(rows) < missing, "Active"] = np.nan
+    for i in range(max(0, width - SCHEMA_COLUMNS)):
+        df[f"Metric {i + 1}"] = rng.lognormal(rng.uniform(0, 5), rng.uniform(0.2, 1.5), rows)
+    return df.iloc[:, :width] if width < SCHEMA_COLUMNS else df
+
+
+def _state_weights(rng):
+    # Large states dominate, as in the real exports
+    weights = rng.pareto(1.5, len(STATES)) + 0.05
+    return weights / weights.sum()
+
+
+def keyed_pair(rows, width=SCHEMA_COLUMNS, seed=0, overlap=0.5):
+    # Two frames for the join/union benchmarks: a shared "Row Id" key and
+    # about ``overlap`` of the right frame's rows also in the left
+    left = covid_frame(rows, width, seed)
+    left.insert(0, "Row Id", np.arange(rows))
+    right = covid_frame(rows, width, seed + 1)
+    rng = np.random.default_rng(seed + 2)
+    shared = rng.random(rows) < overlap
+    right.insert(0, "Row Id", np.where(shared, rng.integers(0, rows, rows), rows + np.arange(rows)))
+    right.loc[shared, left.columns[1:]] = left.iloc[right.loc[shared, "Row Id"], 1:].to_numpy()
+    return left, right
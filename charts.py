@@ -0,0 +1,238 @@
+import functools
+import hashlib
+import io
+import json
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+
+import data_loader
+import instrumentation
+
+# Charts are reduced to a few hundred aggregated rows on the server before
+# anything is sent to the browser. Small aggregates go out as Vega-Lite specs
+# (drawn client-side, interactive); anything whose inline data would exceed
+# MAX_VECTOR_BYTES is rasterised here and sent as a PNG instead.
+MAX_VECTOR_BYTES = 256 * 1024
+TOP_N = 25
+HIST_BINS = 50
+HEATMAP_BINS = 40
+OTHER = "Other"
+MAX_METRICS = 500
+BACKENDS = ("vega-lite", "raster")
+
+_metrics = deque(maxlen=MAX_METRICS)
+_metrics_lock = threading.Lock()
+
+# PNGs by chart content, so a chart whose aggregated data did not change is
+# not drawn again
+raster_cache = data_loader.MemoryLRUCache(max_bytes=64 * 1024 * 1024, sizeof=len)
+
+
+class Chart:
+    """An aggregated dataset plus the two ways of drawing it.
+
+    ``spec`` is a Vega-Lite spec without data; ``draw(ax)`` draws the same
+    chart with matplotlib for the raster fallback.
+    """
+
+    def __init__(self, name, data, spec, draw, seconds=0.0):
+        self.name = name
+        self.data = data
+        self.spec = spec
+        self.draw = draw
+        self.seconds = seconds  # time spent aggregating
+
+    def payload_bytes(self):
+        return len(json.dumps(self.data.to_dict(orient="records"), default=str))
+
+    def digest(self):
+        h = hashlib.blake2b(digest_size=16)
+        h.update(json.dumps([self.name, self.spec], sort_keys=True, default=str).encode())
+        h.update(pd.util.hash_pandas_object(self.data, index=False).to_numpy().tobytes())
+        return h.hexdigest()
+
+
+def _timed(build):
+    # Chart builders record how long their aggregation took
+    @functools.wraps(build)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        with instrumentation.span("charts.build", "compute", detail=build.__name__):
+            chart = build(*args, **kwargs)
+        chart.seconds = time.perf_counter() - start
+        return chart
+    return wrapper
+
+
+def top_n(series, n=TOP_N, other=OTHER):
+    # Largest n values of an aggregated series; the rest summed into ``other``
+    series = series.sort_values(ascending=False)
+    if len(series) <= n:
+        return series
+    head = series.iloc[:n]
+    return pd.concat([head, pd.Series([series.iloc[n:].sum()], index=[other])])
+
+
+@_timed
+def bar(df, category, value=None, agg="sum", n=TOP_N, title=None):
+    """Bar per category of ``agg(value)`` (or row counts), top ``n`` plus Other."""
+    if value is None:
+        grouped = df[category].value_counts(dropna=False)
+        value = "Count"
+    else:
+        grouped = df.groupby(category, observed=True, dropna=False)[value].agg(agg)
+    return _bar(grouped, category, value, n, title)
+
+
+@_timed
+def grouped_bar(grouped, category, value, n=TOP_N, title=None):
+    """Bar chart of an already aggregated Series indexed by ``category``."""
+    return _bar(grouped, category, value, n, title)
+
+
+def _bar(grouped, category, value, n, title):
+    grouped = top_n(grouped, n)
+    data = pd.DataFrame({category: grouped.index.astype(str), value: grouped.to_numpy()})
+    spec = {
+        "title": title or "",
+        "mark": "bar",
+        "encoding": {
+            "x": {"field": category, "type": "nominal", "sort": None},
+            "y": {"field": value, "type": "quantitative"},
+            "tooltip": [{"field": category}, {"field": value, "format": ",.2f"}],
+        },
+    }
+
+    def draw(ax):
+        ax.bar(data[category], data[value])
+        ax.tick_params(axis="x", labelrotation=90)
+        ax.set_ylabel(value)
+        ax.set_title(title or "")
+
+    return Chart(title or f"{value} by {category}", data, spec, draw)
+
+
+@_timed
+def histogram(series, bins=HIST_BINS, title=None):
+    """Histogram of a numeric series, binned on the server."""
+    values = pd.to_numeric(series, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    values = values[np.isfinite(values)]
+    counts, edges = np.histogram(values, bins=bins)
+    return _histogram(str(series.name), counts, edges, title)
+
+
+@_timed
+def binned_histogram(name, counts, edges, title=None):
+    """Histogram from bin counts that were accumulated elsewhere."""
+    return _histogram(str(name), counts, edges, title)
+
+
+def _histogram(name, counts, edges, title):
+    data = pd.DataFrame({"start": edges[:-1], "end": edges[1:], "Count": counts})
+    spec = {
+        "title": title or "",
+        "mark": "bar",
+        "encoding": {
+            "x": {"field": "start", "bin": {"binned": True}, "type": "quantitative", "title": name},
+            "x2": {"field": "end"},
+            "y": {"field": "Count", "type": "quantitative"},
+            "tooltip": [{"field": "start", "format": ",.3g"}, {"field": "end", "format": ",.3g"}, {"field": "Count"}],
+        },
+    }
+
+    def draw(ax):
+        ax.stairs(counts, edges, fill=True)
+        ax.set_xlabel(name)
+        ax.set_ylabel("Count")
+        ax.set_title(title or "")
+
+    return Chart(title or f"Histogram of {name}", data, spec, draw)
+
+
+@_timed
+def density_heatmap(x, y, bins=HEATMAP_BINS, title=None):
+    """2-D binned counts of two numeric series (a scatter plot for any row count)."""
+    xv = pd.to_numeric(x, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    yv = pd.to_numeric(y, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    keep = np.isfinite(xv) & np.isfinite(yv)
+    counts, xedges, yedges = np.histogram2d(xv[keep], yv[keep], bins=bins)
+    xi, yi = np.nonzero(counts)
+    data = pd.DataFrame({
+        "x": xedges[xi], "x2": xedges[xi + 1], "y": yedges[yi], "y2": yedges[yi + 1], "Count": counts[xi, yi],
+    })
+    xname, yname = str(x.name), str(y.name)
+    spec = {
+        "title": title or "",
+        "mark": "rect",
+        "encoding": {
+            "x": {"field": "x", "type": "quantitative", "title": xname},
+            "x2": {"field": "x2"},
+            "y": {"field": "y", "type": "quantitative", "title": yname},
+            "y2": {"field": "y2"},
+            "color": {"field": "Count", "type": "quantitative", "scale": {"type": "log"}},
+            "tooltip": [{"field": "Count"}],
+        },
+    }
+
+    def draw(ax):
+        masked = np.ma.masked_equal(counts.T, 0)
+        mesh = ax.pcolormesh(xedges, yedges, masked, cmap="viridis")
+        ax.figure.colorbar(mesh, ax=ax, label="Count")
+        ax.set_xlabel(xname)
+        ax.set_ylabel(yname)
+        ax.set_title(title or "")
+
+    return Chart(title or f"{xname} vs {yname}", data, spec, draw)
+
+
+def rasterize(chart, figsize=(8, 4)):
+    with instrumentation.span("charts.draw", "render", detail=chart.name):
+        fig = Figure(figsize=figsize)
+        chart.draw(fig.subplots())
+    with instrumentation.span("charts.png", "serialize", detail=chart.name) as span:
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="png", bbox_inches="tight")
+        span.payload_bytes = buffer.tell()
+    return buffer.getvalue()
+
+
+def prepare(chart, backend="vega-lite", max_vector_bytes=MAX_VECTOR_BYTES):
+    """(backend, output, metrics) for ``chart``.
+
+    ``output`` is a Vega-Lite spec with inline data, or PNG bytes when the
+    raster backend is asked for or the inline data would exceed
+    ``max_vector_bytes``; PNGs are reused while the chart's content is
+    unchanged. The metrics are also kept for ``metrics()``.
+    """
+    start = time.perf_counter()
+    payload = chart.payload_bytes()
+    if backend == "vega-lite" and payload <= max_vector_bytes:
+        output = {**chart.spec, "data": {"values": chart.data.to_dict(orient="records")}}
+    else:
+        backend = "raster"
+        key = chart.digest()
+        output = raster_cache.get(key)
+        if output is None:
+            output = raster_cache.put(key, rasterize(chart))
+        payload = len(output)
+    entry = {
+        "chart": chart.name,
+        "backend": backend,
+        "rows sent": len(chart.data),
+        "payload bytes": payload,
+        "seconds": chart.seconds + time.perf_counter() - start,
+        "time": time.time(),
+    }
+    with _metrics_lock:
+        _metrics.append(entry)
+    return backend, output, entry
+
+
+def metrics():
+    with _metrics_lock:
+        return pd.DataFrame(list(_metrics))
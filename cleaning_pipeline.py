@@ -0,0 +1,108 @@
+import uuid
+
+import pandas as pd
+
+import feature_engine
+import instrumentation
+
+
+# Cleaning operations: each takes a DataFrame and returns a new one
+def _add_category(df, value, columns):
+    # Categorical columns only accept known categories; register ``value``
+    # with those about to receive it
+    columns = [col for col in columns if value not in df[col].cat.categories]
+    if not columns:
+        return df
+    return df.assign(**{col: df[col].cat.add_categories([value]) for col in columns})
+
+
+def _categorical_columns(df):
+    return [col for col, dtype in df.dtypes.items() if isinstance(dtype, pd.CategoricalDtype)]
+
+
+def fill_missing(df, value=0):
+    df = _add_category(df, value, [col for col in _categorical_columns(df) if df[col].hasnans])
+    return df.fillna(value)
+
+
+def title_case_columns(df):
+    return df.rename(columns=lambda col: col.title() if isinstance(col, str) else col)
+
+
+def replace_values(df, to_replace, value):
+    categorical = [col for col in _categorical_columns(df) if to_replace in df[col].cat.categories]
+    df = _add_category(df, value, categorical).replace(to_replace=to_replace, value=value)
+    if categorical:
+        df = df.assign(**{col: df[col].cat.remove_categories([to_replace]) for col in categorical})
+    return df
+
+
+POPULATION_DENSITY = (feature_engine.ratio('Population_Density', 'Total_Cases', 'Population'),)
+
+
+def add_population_density(df):
+    # Skipped by the feature engine when either source column is missing
+    return feature_engine.apply(df, POPULATION_DENSITY)[0]
+
+
+OPERATIONS = {
+    "fill_missing": (fill_missing, "Fill missing values with {value!r}"),
+    "title_case_columns": (title_case_columns, "Rename columns to title case"),
+    "replace_values": (replace_values, "Replace {to_replace!r} with {value!r}"),
+    "add_population_density": (add_population_density, "Add Population_Density (Total_Cases / Population)"),
+}
+
+
+class CleaningPipeline:
+    """An ordered list of cleaning steps over one source dataset.
+
+    The result after every prefix of the step list is cached, so adding a step
+    only runs that step, and undoing, removing or moving a step re-runs only
+    the steps after the first one that changed.
+    """
+
+    def __init__(self, source_key):
+        self.source_key = source_key
+        self.id = uuid.uuid4().hex  # scopes per-session caches built on the results
+        self.steps = []      # (operation name, ((param, value), ...))
+        self._results = {}   # tuple of steps -> DataFrame after those steps
+        self.last_recomputed = 0
+
+    def add(self, operation, **params):
+        self.steps.append((operation, tuple(sorted(params.items()))))
+
+    def remove(self, index):
+        del self.steps[index]
+
+    def undo(self):
+        if self.steps:
+            self.steps.pop()
+
+    def move(self, index, offset):
+        target = index + offset
+        if 0 <= target < len(self.steps):
+            self.steps[index], self.steps[target] = self.steps[target], self.steps[index]
+
+    @staticmethod
+    def describe(step):
+        operation, params = step
+        return OPERATIONS[operation][1].format(**dict(params))
+
+    @instrumentation.traced("cleaning_pipeline")
+    def result(self, source):
+        steps = tuple(self.steps)
+        # Start from the longest prefix whose result is still cached
+        start, df = 0, source
+        for i in range(len(steps), 0, -1):
+            if steps[:i] in self._results:
+                start, df = i, self._results[steps[:i]]
+                break
+        for i in range(start, len(steps)):
+            operation, params = steps[i]
+            df = OPERATIONS[operation][0](df, **dict(params))
+            self._results[steps[:i + 1]] = df
+        self.last_recomputed = len(steps) - start
+        # Results that are no longer a prefix of the step list can't be reused
+        self._results = {k: v for k, v in self._results.items() if steps[:len(k)] == k}
+        return df
+
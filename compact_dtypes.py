@@ -0,0 +1,80 @@
+import importlib.util
+
+import numpy as np
+import pandas as pd
+
+# String columns with at most this share of distinct values become categoricals
+CATEGORY_MAX_RATIO = 0.5
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+# Narrowest integer dtype used
+MIN_INTEGER = np.dtype(np.int32)
+# Bumped when compaction changes what it produces, so stored compacted
+# datasets from an older version are not reused
+VERSION = 2
+
+REPORT_COLUMNS = ["Column", "Before", "After", "Bytes before", "Bytes after", "Bytes saved"]
+
+
+def _compact_integer(series):
+    # Smallest signed width that holds the range, but no narrower than
+    # int32: pages do arithmetic on these columns, and int8/int16 sums wrap
+    # around silently (100 + 100 == -56 in int8). Unsigned types are avoided
+    # so differences of columns can still go negative
+    new = pd.to_numeric(series, downcast="integer")
+    if new.dtype.itemsize < MIN_INTEGER.itemsize:
+        new = new.astype(MIN_INTEGER)
+    return new
+
+
+def _compact_float(series):
+    # float32 only when every value survives the round trip unchanged
+    values = series.to_numpy()
+    narrow = values.astype(np.float32)
+    if np.array_equal(narrow.astype(values.dtype), values, equal_nan=True):
+        return series.astype(np.float32)
+    return series
+
+
+def _compact_strings(series, category_max_ratio, arrow_strings):
+    non_null = series.count()
+    if non_null and series.nunique(dropna=True) <= category_max_ratio * non_null:
+        return series.astype("category")
+    if arrow_strings and HAS_PYARROW and series.dtype == object:
+        if pd.api.types.infer_dtype(series, skipna=True) == "string":
+            return series.astype("string[pyarrow]")
+    return series
+
+
+def compact(df, category_max_ratio=CATEGORY_MAX_RATIO, arrow_strings=True):
+    """Return ``df`` with smaller dtypes and a per-column memory report.
+
+    Integers are downcast to the smallest signed width that holds them (but
+    not below int32), floats to float32 only when that is lossless,
+    low-cardinality strings become categoricals and (with ``arrow_strings``)
+    other object string columns become Arrow-backed strings. Values are
+    unchanged.
+    """
+    if len(df.columns) == 0:
+        return df, pd.DataFrame(columns=REPORT_COLUMNS)
+    columns = []
+    rows = []
+    # By position, so duplicate column names are handled too
+    for i, name in enumerate(df.columns):
+        series = df.iloc[:, i]
+        before = int(series.memory_usage(index=False, deep=True))
+        if pd.api.types.is_bool_dtype(series):
+            new = series
+        elif pd.api.types.is_integer_dtype(series) and isinstance(series.dtype, np.dtype):
+            new = _compact_integer(series)
+        elif series.dtype == np.float64:
+            new = _compact_float(series)
+        elif pd.api.types.is_string_dtype(series) and not isinstance(series.dtype, pd.CategoricalDtype):
+            new = _compact_strings(series, category_max_ratio, arrow_strings)
+        else:
+            new = series
+        after = int(new.memory_usage(index=False, deep=True))
+        columns.append(new)
+        rows.append((name, str(series.dtype), str(new.dtype), before, after, before - after))
+    result = pd.concat(columns, axis=1)
+    result.columns = df.columns
+    return result, pd.DataFrame(rows, columns=REPORT_COLUMNS)
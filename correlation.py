@@ -0,0 +1,154 @@
+import importlib.util
+
+import numpy as np
+import pandas as pd
+
+import instrumentation
+
+# Columns per block: a block of standardized values stays in cache while the
+# BLAS product against the other blocks is computed
+BLOCK_COLUMNS = 256
+
+
+def _centre(values):
+    # Centre each column in float64, so the float32 products below don't lose
+    # precision to large means; missing values become 0
+    valid = ~np.isnan(values)
+    counts = valid.sum(axis=0)
+    mean = np.nansum(values, axis=0) / np.where(counts > 0, counts, 1)
+    return np.where(valid, values - mean, 0.0), valid
+
+
+def _complete_block(za, zb):
+    # Columns without missing values: correlation is the dot product of the
+    # unit-norm centred columns
+    return za.T @ zb
+
+
+def _pairwise_block(xa, xb, ma, mb):
+    # Pairwise-complete correlation (what DataFrame.corr() does with NaNs):
+    # every sum is restricted to rows where both columns are present
+    # Inputs are unit-norm columns, so the float32 sums stay far from
+    # overflow; they are combined in float64
+    n = (ma.T @ mb).astype(float)
+    sa = (xa.T @ mb).astype(float)
+    sb = (ma.T @ xb).astype(float)
+    saa = ((xa * xa).T @ mb).astype(float)
+    sbb = (ma.T @ (xb * xb)).astype(float)
+    sab = (xa.T @ xb).astype(float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        n_safe = np.where(n > 0, n, 1)
+        cov = sab - sa * sb / n_safe
+        var_a = saa - sa * sa / n_safe
+        var_b = sbb - sb * sb / n_safe
+        r = cov / np.sqrt(var_a * var_b)
+    return np.where((n > 1) & (var_a > 0) & (var_b > 0), r, np.nan)
+
+
+@instrumentation.traced("correlation_matrix")
+def correlation_matrix(df, block=BLOCK_COLUMNS, dtype=np.float32):
+    """Pearson correlation of the numeric columns of ``df``, block by block.
+
+    Matches ``df.select_dtypes(np.number).corr()`` to float32 precision.
+    Column blocks are multiplied with BLAS in ``dtype``, so the cost is a few
+    matrix products instead of a Python loop over column pairs.
+    """
+    numeric = df.select_dtypes(include=[np.number])
+    columns = numeric.columns
+    centred, valid = _centre(numeric.to_numpy(dtype=float, na_value=np.nan))
+    p = centred.shape[1]
+    norms = np.sqrt((centred * centred).sum(axis=0))
+    varying = norms > 0
+    # Unit-norm columns; correlation doesn't depend on scale
+    z = np.asfortranarray(centred / np.where(varying, norms, 1), dtype=dtype)
+    # Columns with gaps also need their masks for the pairwise sums
+    has_missing = ~valid.all(axis=0)
+    if has_missing.any():
+        masks = np.asfortranarray(valid, dtype=dtype)
+
+    out = np.empty((p, p))
+    for i in range(0, p, block):
+        a = slice(i, min(i + block, p))
+        for j in range(i, p, block):
+            b = slice(j, min(j + block, p))
+            if has_missing[a].any() or has_missing[b].any():
+                r = _pairwise_block(z[:, a], z[:, b], masks[:, a], masks[:, b])
+            else:
+                r = _complete_block(z[:, a], z[:, b])
+                r = np.where(varying[a][:, None] & varying[b][None, :], r, np.nan)
+            out[a, b] = r
+            out[b, a] = r.T
+    out = np.clip(out, -1.0, 1.0)
+    # Constant columns have no correlation, not even with themselves
+    np.fill_diagonal(out, np.where(varying, 1.0, np.nan))
+    return pd.DataFrame(out, index=columns, columns=columns)
+
+
+def top_pairs(corr, k=20):
+    """The ``k`` column pairs with the largest absolute correlation."""
+    values = corr.to_numpy()
+    rows, cols = np.triu_indices(len(values), k=1)
+    strength = np.abs(values[rows, cols])
+    strength = np.where(np.isnan(strength), -1.0, strength)
+    k = min(k, strength.size)
+    if k == 0:
+        return pd.DataFrame(columns=["Feature 1", "Feature 2", "Correlation"])
+    best = np.argpartition(-strength, k - 1)[:k]
+    best = best[np.argsort(-strength[best], kind="stable")]
+    return pd.DataFrame({
+        "Feature 1": corr.index[rows[best]],
+        "Feature 2": corr.columns[cols[best]],
+        "Correlation": values[rows[best], cols[best]],
+    })
+
+
+def _average_linkage_order(distance):
+    # Plain average-linkage clustering; each merge updates one row of the
+    # distance matrix, and the leaf order is the concatenation of the merged
+    # clusters
+    distance = distance.copy()
+    np.fill_diagonal(distance, np.inf)
+    sizes = np.ones(len(distance))
+    members = [[i] for i in range(len(distance))]
+    active = np.ones(len(distance), dtype=bool)
+    for _ in range(len(distance) - 1):
+        flat = np.argmin(distance)
+        i, j = divmod(flat, len(distance))
+        if i > j:
+            i, j = j, i
+        merged = (distance[i] * sizes[i] + distance[j] * sizes[j]) / (sizes[i] + sizes[j])
+        merged[i] = np.inf
+        distance[i, :] = merged
+        distance[:, i] = merged
+        distance[j, :] = np.inf
+        distance[:, j] = np.inf
+        sizes[i] += sizes[j]
+        members[i] = members[i] + members[j]
+        active[j] = False
+    return members[int(np.flatnonzero(active)[0])] if len(distance) else []
+
+
+def cluster_order(corr):
+    """Column order that places strongly correlated columns next to each other.
+
+    Uses scipy's average linkage with optimal leaf ordering when scipy is
+    installed, else a numpy implementation of the same linkage.
+    """
+    if len(corr) < 3:
+        return list(corr.columns)
+    distance = 1.0 - np.abs(np.nan_to_num(corr.to_numpy(), nan=0.0))
+    np.fill_diagonal(distance, 0.0)
+    distance = np.clip((distance + distance.T) / 2, 0.0, None)
+    if importlib.util.find_spec("scipy"):
+        from scipy.cluster import hierarchy
+        from scipy.spatial.distance import squareform
+
+        linkage = hierarchy.linkage(squareform(distance, checks=False), method="average", optimal_ordering=True)
+        order = hierarchy.leaves_list(linkage)
+    else:
+        order = _average_linkage_order(distance)
+    return [corr.columns[i] for i in order]
+
+
+def reorder(corr, order):
+    return corr.loc[order, order]
@@ -0,0 +1,192 @@
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+import compact_dtypes
+import dataset_store
+import excel_reader
+import instrumentation
+
+# Parsed datasets are shared by every page and every browser session in this
+# process, so the cache lives at module level and is guarded by a lock.
+DEFAULT_CACHE_BYTES = 1024 * 1024 * 1024  # 1 GB
+
+# Parsed frames are stored with compact dtypes (see compact_dtypes.compact)
+COMPACT_DTYPES = os.environ.get("COMPACT_DTYPES", "1") != "0"
+MAX_REPORTS = 256
+MAX_DIGESTS = 1024
+
+
+def frame_nbytes(df):
+    # Deep memory usage so object/string columns are counted properly
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+class MemoryLRUCache:
+    """Least-recently-used cache bounded by the total size of its values."""
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES, sizeof=frame_nbytes):
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        nbytes = self.sizeof(value)
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._entries.pop(key)[1]
+            # Values larger than the whole budget are returned but never kept
+            if nbytes > self.max_bytes:
+                return value
+            while self._entries and self.current_bytes + nbytes > self.max_bytes:
+                _, (_, evicted_bytes) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_bytes
+                self.evictions += 1
+            self._entries[key] = (value, nbytes)
+            self.current_bytes += nbytes
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+dataset_cache = MemoryLRUCache()
+
+# cache key -> per-column memory report of the compaction step
+_reports = OrderedDict()
+_reports_lock = threading.Lock()
+
+# file_id -> digest, so an upload is hashed once and not on every rerun
+_digests = OrderedDict()
+_digests_lock = threading.Lock()
+
+
+def _file_bytes(uploaded_file):
+    if hasattr(uploaded_file, "getvalue"):
+        return uploaded_file.getvalue()
+    with open(uploaded_file, "rb") as f:
+        return f.read()
+
+
+def file_digest(uploaded_file):
+    # Hash of the raw file contents; identical uploads share one digest
+    file_id = getattr(uploaded_file, "file_id", None)
+    if file_id is not None:
+        with _digests_lock:
+            if file_id in _digests:
+                _digests.move_to_end(file_id)
+                return _digests[file_id]
+    digest = hashlib.blake2b(_file_bytes(uploaded_file), digest_size=16).hexdigest()
+    if file_id is not None:
+        with _digests_lock:
+            _digests[file_id] = digest
+            while len(_digests) > MAX_DIGESTS:
+                _digests.popitem(last=False)
+    return digest
+
+
+def cache_key(uploaded_file, reader, options):
+    # Parse options are part of the key: the same bytes read differently
+    # produce a different DataFrame
+    return (file_digest(uploaded_file), reader, repr(sorted(options.items())))
+
+
+def _remember_report(key, report):
+    with _reports_lock:
+        _reports[key] = report
+        while len(_reports) > MAX_REPORTS:
+            _reports.popitem(last=False)
+
+
+def _parse_or_open(key, uploaded_file, parse, options):
+    # The memory-mapped store is shared with other processes and survives
+    # restarts; a file is parsed (and compacted) only when it isn't there
+    store_key = key + (COMPACT_DTYPES and compact_dtypes.VERSION,)
+    stored = dataset_store.store.open(store_key)
+    if stored is None:
+        df = parse(io.BytesIO(_file_bytes(uploaded_file)), **options)
+        metadata = {}
+        if COMPACT_DTYPES:
+            df, report = compact_dtypes.compact(df)
+            metadata["compaction_report"] = report.to_json(orient="split")
+        # Serve the mapped copy so the parsed one can be freed
+        if dataset_store.store.put(store_key, df, metadata):
+            stored = dataset_store.store.open(store_key)
+        if stored is None:
+            stored = df, metadata
+    df, metadata = stored
+    if "compaction_report" in metadata:
+        _remember_report(key, pd.read_json(io.StringIO(metadata["compaction_report"]), orient="split"))
+    return df
+
+
+def _load(uploaded_file, reader, parse, options):
+    with instrumentation.span(f"load_{reader}", "ingest"):
+        key = cache_key(uploaded_file, reader, options)
+        df = dataset_cache.get(key)
+        if df is None:
+            with instrumentation.span(f"parse_{reader}", "ingest"):
+                df = dataset_cache.put(key, _parse_or_open(key, uploaded_file, parse, options))
+    # Shallow copy so pages can add or rename columns without touching the
+    # cached frame
+    return df.copy(deep=False)
+
+
+def load_csv(uploaded_file, **options):
+    return _load(uploaded_file, "csv", pd.read_csv, options)
+
+
+def load_excel(uploaded_file, **options):
+    # Options are those of excel_reader.read_excel (sheet_name, usecols, dtype, reader)
+    digest = file_digest(uploaded_file)
+
+    def parse(buffer, **opts):
+        return excel_reader.read_excel(buffer, digest, **opts)
+
+    return _load(uploaded_file, "excel", parse, options)
+
+
+def excel_layout(uploaded_file):
+    # Sheet names and their header columns, without parsing the sheets
+    return excel_reader.workbook_layout(_file_bytes(uploaded_file), file_digest(uploaded_file))
+
+
+def compaction_report(uploaded_file, reader="csv", **options):
+    # Bytes saved per column when the file was loaded, or None
+    with _reports_lock:
+        return _reports.get(cache_key(uploaded_file, reader, options))
+
+
+def cache_stats():
+    return {**dataset_cache.stats(), "store": dataset_store.store.stats()}
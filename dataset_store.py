@@ -0,0 +1,155 @@
+import hashlib
+import os
+import tempfile
+import threading
+import weakref
+
+# Parsed uploads are written once as Arrow IPC files and opened through memory
+# maps, so every session (and every server process on the host) reads the same
+# page-cache pages instead of holding its own parsed copy.
+STORE_DIR = os.environ.get("DATASET_STORE_DIR", os.path.join(tempfile.gettempdir(), "data-dynamics-datasets"))
+MAX_STORE_BYTES = int(os.environ.get("DATASET_STORE_BYTES", 8 * 1024 ** 3))  # 8 GB
+
+
+class DatasetStore:
+    """Memory-mapped Arrow IPC files keyed by dataset cache key.
+
+    ``open()`` returns a DataFrame whose numeric columns are zero-copy views
+    of the mapped file, and counts it as a reference until the frame is
+    garbage collected. When the directory grows past ``max_bytes`` the least
+    recently opened files with no references are deleted. Reference counts
+    are per process; another process only ever sees a file disappear between
+    its opens, which is the same as a cache miss.
+    """
+
+    def __init__(self, directory=STORE_DIR, max_bytes=MAX_STORE_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._refs = {}       # path -> number of live frames opened from it
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    def path(self, key):
+        name = hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest()
+        return os.path.join(self.directory, f"{name}.arrow")
+
+    def put(self, key, df, metadata=None):
+        """Write ``df`` under ``key``; returns False if Arrow can't hold it.
+
+        ``metadata`` is a dict of strings stored with the file and returned
+        by ``open()``.
+        """
+        import pyarrow as pa
+
+        # Arrow needs unique string column names and one type per column
+        if not all(isinstance(c, str) for c in df.columns) or df.columns.has_duplicates:
+            return False
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=None)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            return False
+        if metadata:
+            table = table.replace_schema_metadata({**table.schema.metadata, **metadata})
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with pa.OSFile(tmp_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self.writes += 1
+        self.evict()
+        return True
+
+    def open(self, key):
+        """``(frame, metadata)`` stored under ``key``, or None."""
+        import pyarrow as pa
+
+        path = self.path(key)
+        try:
+            source = pa.memory_map(path, "r")
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        try:
+            table = pa.ipc.open_file(source).read_all()
+        except pa.ArrowInvalid:
+            # Unreadable (e.g. left behind by a crash): drop it and re-parse
+            source.close()
+            with self._lock:
+                self.misses += 1
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        # One block per column, so columns without nulls stay views of the map
+        df = table.to_pandas(split_blocks=True)
+        os.utime(path)  # last-open time drives eviction
+        with self._lock:
+            self.hits += 1
+            self._refs[path] = self._refs.get(path, 0) + 1
+        weakref.finalize(df, self._release, path)
+        metadata = {k.decode(): v.decode() for k, v in table.schema.metadata.items() if k != b"pandas"}
+        return df, metadata
+
+    def _release(self, path):
+        with self._lock:
+            self._refs[path] -= 1
+            if not self._refs[path]:
+                del self._refs[path]
+
+    def _files(self):
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        files = []
+        for name in names:
+            if name.endswith(".arrow"):
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+        return sorted(files)
+
+    def evict(self):
+        # Oldest-opened first; files with live frames are never removed
+        files = self._files()
+        total = sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if total <= self.max_bytes:
+                break
+            with self._lock:
+                if path in self._refs:
+                    continue
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                self.evictions += 1
+            total -= size
+
+    def stats(self):
+        files = self._files()
+        with self._lock:
+            return {
+                "files": len(files),
+                "bytes": sum(size for _, size, _ in files),
+                "max_bytes": self.max_bytes,
+                "open_frames": sum(self._refs.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "writes": self.writes,
+                "evictions": self.evictions,
+            }
+
+
+store = DatasetStore()
@@ -0,0 +1,226 @@
+import hashlib
+import importlib.util
+import io
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+# Parsed sheets are converted once to Feather files here, so later reruns
+# (and restarts) load them without touching the workbook again
+CACHE_DIR = os.environ.get("EXCEL_CACHE_DIR", os.path.join(tempfile.gettempdir(), "data-dynamics-excel"))
+MAX_CACHE_BYTES = int(os.environ.get("EXCEL_CACHE_BYTES", 2 * 1024 ** 3))  # 2 GB
+MAX_LAYOUTS = 256
+
+_layouts = OrderedDict()  # digest -> layout, most recently used last
+_layouts_lock = threading.Lock()
+_cache_lock = threading.Lock()
+
+
+def _as_buffer(data):
+    return io.BytesIO(data) if isinstance(data, (bytes, bytearray)) else data
+
+
+def _column_names(header):
+    # Same names pd.read_excel gives: placeholders for blank header cells,
+    # and repeated names made unique as A, A.1, A.2, ... skipping suffixed
+    # names that are already in the header
+    names = [name if name is not None else f"Unnamed: {i}" for i, name in enumerate(header)]
+    header_names = set(names)
+    counts = {}
+    for i, original in enumerate(names):
+        name, count = original, counts.get(original, 0)
+        while count > 0:
+            counts[original] = count + 1
+            name = f"{original}.{count}"
+            count = count + 1 if name in header_names else counts.get(name, 0)
+        names[i] = name
+        counts[name] = count + 1
+    return names
+
+
+def workbook_layout(data, digest):
+    """{sheet name: [column names]} read from the header rows only."""
+    with _layouts_lock:
+        if digest in _layouts:
+            _layouts.move_to_end(digest)
+            return _layouts[digest]
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(_as_buffer(data), read_only=True, data_only=True)
+    try:
+        layout = {}
+        for sheet in workbook.worksheets:
+            header = next(sheet.iter_rows(max_row=1, values_only=True), ())
+            layout[sheet.title] = _column_names(header)
+    finally:
+        workbook.close()
+    with _layouts_lock:
+        _layouts[digest] = layout
+        while len(_layouts) > MAX_LAYOUTS:
+            _layouts.popitem(last=False)
+    return layout
+
+
+def _typed_frame(names, columns, dtype):
+    # Built by position, then named, so no column can replace another.
+    # Numeric hints read cells that aren't numbers as missing
+    dtype = dtype or {}
+    data = {}
+    for i, (name, values) in enumerate(zip(names, columns)):
+        if name not in dtype:
+            data[i] = pd.Series(values, dtype="object").infer_objects()
+        elif pd.api.types.is_numeric_dtype(pd.api.types.pandas_dtype(dtype[name])):
+            data[i] = pd.to_numeric(pd.Series(values, dtype="object"), errors="coerce").astype(dtype[name])
+        else:
+            data[i] = pd.Series(values, dtype=dtype[name])
+    df = pd.DataFrame(data, columns=range(len(names)))
+    df.columns = list(names)
+    return df
+
+
+def read_openpyxl_stream(buffer, sheet_name=None, usecols=None, dtype=None):
+    # Read-only openpyxl streams rows without building the cell object model;
+    # only the selected columns are kept
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(buffer, read_only=True, data_only=True)
+    try:
+        sheet = workbook[sheet_name] if sheet_name is not None else workbook.worksheets[0]
+        rows = sheet.iter_rows(values_only=True)
+        names = _column_names(next(rows, ()))
+        keep = [i for i, name in enumerate(names) if usecols is None or name in usecols]
+        width = len(names)
+        selected = []
+        for row in rows:
+            if len(row) < width:
+                row = row + (None,) * (width - len(row))
+            selected.append(tuple(row[i] for i in keep))
+    finally:
+        workbook.close()
+    columns = list(zip(*selected)) if selected else [() for _ in keep]
+    return _typed_frame([names[i] for i in keep], columns, dtype)
+
+
+def read_calamine(buffer, sheet_name=None, usecols=None, dtype=None):
+    # Rust-based parser, much faster than openpyxl when python-calamine is installed
+    return pd.read_excel(buffer, sheet_name=0 if sheet_name is None else sheet_name,
+                         usecols=usecols, dtype=dtype, engine="calamine")
+
+
+def read_pandas(buffer, sheet_name=None, usecols=None, dtype=None):
+    return pd.read_excel(buffer, sheet_name=0 if sheet_name is None else sheet_name,
+                         usecols=usecols, dtype=dtype)
+
+
+READERS = {
+    "openpyxl-stream": read_openpyxl_stream,
+    "calamine": read_calamine,
+    "pandas": read_pandas,
+}
+
+
+def default_reader():
+    return "calamine" if importlib.util.find_spec("python_calamine") else "openpyxl-stream"
+
+
+def _cache_path(digest, sheet_name, usecols, dtype):
+    key = repr((digest, sheet_name, sorted(usecols) if usecols is not None else None,
+                sorted((dtype or {}).items())))
+    name = hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+    return os.path.join(CACHE_DIR, f"{name}.feather")
+
+
+def _open_cached(path, columns=None):
+    try:
+        df = pd.read_feather(path, columns=columns)
+        os.utime(path)  # last use drives trimming
+    except FileNotFoundError:  # never written, or trimmed
+        return None
+    return df
+
+
+def _sheet_order(path, usecols):
+    # ``usecols`` in the order of the columns of the Feather file at ``path``
+    import pyarrow as pa
+
+    try:
+        with pa.memory_map(path) as source:
+            names = pa.ipc.open_file(source).schema.names
+    except FileNotFoundError:
+        return list(usecols)
+    return [name for name in names if name in usecols]
+
+
+def _read_cached(digest, sheet_name, usecols, dtype):
+    df = _open_cached(_cache_path(digest, sheet_name, usecols, dtype))
+    if df is None and usecols is not None:
+        # A full-sheet conversion can serve any column subset; columns come
+        # back in sheet order, as a parse would return them
+        path = _cache_path(digest, sheet_name, None, dtype)
+        df = _open_cached(path, _sheet_order(path, usecols))
+    return df
+
+
+def _write_cache(df, path):
+    # Feather needs string column names and a default index
+    if not all(isinstance(c, str) for c in df.columns):
+        return
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        df.reset_index(drop=True).to_feather(tmp_path)
+    except (TypeError, ValueError):
+        # Columns mixing numbers and text have no Arrow type; such sheets
+        # are parsed on every read
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return
+    os.replace(tmp_path, path)
+    trim_cache()
+
+
+def trim_cache(max_bytes=MAX_CACHE_BYTES):
+    # Least recently used Feather files first, until the cache fits in ``max_bytes``
+    with _cache_lock:
+        try:
+            names = [name for name in os.listdir(CACHE_DIR) if name.endswith(".feather")]
+        except FileNotFoundError:
+            return
+        files = []
+        for name in names:
+            path = os.path.join(CACHE_DIR, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+
+def read_excel(data, digest, sheet_name=None, usecols=None, dtype=None, reader=None):
+    """Read one sheet of a workbook, via the Feather cache when possible.
+
+    ``usecols`` limits parsing to the named columns and ``dtype`` maps column
+    names to dtypes so values are not inferred cell by cell. ``reader`` picks
+    an entry of ``READERS`` (default: calamine if installed, else streaming
+    openpyxl).
+    """
+    if usecols is not None:
+        usecols = list(usecols)
+    df = _read_cached(digest, sheet_name, usecols, dtype)
+    if df is not None:
+        return df
+    df = READERS[reader or default_reader()](_as_buffer(data), sheet_name=sheet_name, usecols=usecols, dtype=dtype)
+    _write_cache(df, _cache_path(digest, sheet_name, usecols, dtype))
+    return df
@@ -0,0 +1,178 @@
+import hashlib
+import os
+import tempfile
+import threading
+
+import pandas as pd
+
+import instrumentation
+
+# Download files are written only when asked for, a chunk of rows at a time,
+# into a directory cache keyed by the content of the frame and the format.
+# Every session and every click on the same data reads the same file.
+EXPORT_DIR = os.environ.get("EXPORT_DIR", os.path.join(tempfile.gettempdir(), "data-dynamics-exports"))
+MAX_EXPORT_BYTES = int(os.environ.get("EXPORT_BYTES", 2 * 1024 ** 3))  # 2 GB
+CHUNK_ROWS = 100_000
+
+# format -> (label, file suffix, MIME type)
+FORMATS = {
+    "csv": ("CSV", ".csv", "text/csv"),
+    "csv.gz": ("CSV (gzip)", ".csv.gz", "application/gzip"),
+    "csv.zst": ("CSV (zstd)", ".csv.zst", "application/zstd"),
+    "parquet": ("Parquet", ".parquet", "application/vnd.apache.parquet"),
+    "feather": ("Feather", ".feather", "application/vnd.apache.arrow.file"),
+}
+_CSV_CODECS = {"csv": None, "csv.gz": "gzip", "csv.zst": "zstd"}
+
+_lock = threading.Lock()
+
+
+def frame_digest(df):
+    # Hash of the column names, dtypes and values, one chunk at a time
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr([(str(column), str(dtype)) for column, dtype in df.dtypes.items()]).encode())
+    for start in range(0, len(df), CHUNK_ROWS):
+        hashes = pd.util.hash_pandas_object(df.iloc[start:start + CHUNK_ROWS], index=False)
+        digest.update(hashes.to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _chunks(df):
+    for start in range(0, max(len(df), 1), CHUNK_ROWS):
+        yield df.iloc[start:start + CHUNK_ROWS]
+
+
+def _write_csv(df, path, codec):
+    import pyarrow as pa
+
+    sink = pa.CompressedOutputStream(path, codec) if codec else pa.OSFile(path, "wb")
+    with sink:
+        for i, chunk in enumerate(_chunks(df)):
+            sink.write(chunk.to_csv(index=False, header=i == 0).encode("utf-8"))
+
+
+def _arrow_frame(df):
+    # Arrow needs string column names; the index is not exported, as with CSV
+    return df.rename(columns=str).reset_index(drop=True)
+
+
+def _write_parquet(df, path):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    df = _arrow_frame(df)
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+        for chunk in _chunks(df):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+
+def _write_feather(df, path):
+    # Feather v2 is the Arrow IPC file format
+    import pyarrow as pa
+
+    df = _arrow_frame(df)
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    options = pa.ipc.IpcWriteOptions(compression="lz4")
+    with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, schema, options=options) as writer:
+        for chunk in _chunks(df):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+
+def _write(df, path, fmt):
+    if fmt in _CSV_CODECS:
+        _write_csv(df, path, _CSV_CODECS[fmt])
+    elif fmt == "parquet":
+        _write_parquet(df, path)
+    elif fmt == "feather":
+        _write_feather(df, path)
+    else:
+        raise ValueError(f"unknown export format {fmt!r}; expected one of {list(FORMATS)}")
+
+
+def path(key, fmt):
+    name = hashlib.blake2b(repr((key, fmt)).encode(), digest_size=16).hexdigest()
+    return os.path.join(EXPORT_DIR, name + FORMATS[fmt][1])
+
+
+def _open_cached(target):
+    # The cached file open for reading, or None. Once open it stays readable
+    # even if another session evicts it
+    try:
+        f = open(target, "rb")
+    except FileNotFoundError:
+        return None
+    try:
+        os.utime(target)  # last use drives eviction
+    except FileNotFoundError:
+        pass
+    return f
+
+
+def export(df, fmt="csv", key=None):
+    """``df`` written as ``fmt``, as a binary file open for reading.
+
+    The file comes from the cache when already written. ``key`` identifies
+    the content (e.g. a file digest plus the steps applied to it); by
+    default the frame is hashed. ``df`` may also be a function returning
+    the frame, which is then only called on a cache miss. The caller closes
+    the file.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown export format {fmt!r}; expected one of {list(FORMATS)}")
+    with instrumentation.span("export", "serialize", detail=fmt) as span:
+        if key is None:
+            df = df() if callable(df) else df
+            key = frame_digest(df)
+        target = path(key, fmt)
+        f = _open_cached(target)
+        if f is None:
+            df = df() if callable(df) else df
+            os.makedirs(EXPORT_DIR, exist_ok=True)
+            tmp_path = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                _write(df, tmp_path, fmt)
+                # Opened before the rename, so eviction can't take it away
+                f = open(tmp_path, "rb")
+                os.replace(tmp_path, target)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            evict(keep=target)
+        span.payload_bytes = os.fstat(f.fileno()).st_size
+    return f
+
+
+def _files():
+    try:
+        names = os.listdir(EXPORT_DIR)
+    except FileNotFoundError:
+        return []
+    files = []
+    for name in names:
+        if not name.endswith(".tmp"):
+            try:
+                stat = os.stat(os.path.join(EXPORT_DIR, name))
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, os.path.join(EXPORT_DIR, name)))
+    return sorted(files)
+
+
+def evict(max_bytes=MAX_EXPORT_BYTES, keep=None):
+    # Least recently used first, until the directory fits in ``max_bytes``;
+    # ``keep`` (the file just written) is never removed, even when it alone
+    # is larger than that
+    with _lock:
+        files = _files()
+        total = sum(size for _, size, _ in files)
+        for _, size, file_path in files:
+            if total <= max_bytes:
+                break
+            if file_path == keep:
+                continue
+            try:
+                os.remove(file_path)
+            except OSError:
+                continue
+            total -= size
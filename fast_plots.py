@@ -0,0 +1,155 @@
+import warnings
+
+import numpy as np
+import seaborn as sns
+
+# Drawing helpers for large inputs. Each one reduces the data to a fixed
+# number of bins (or points) first, so drawing cost does not grow with rows.
+KDE_GRID_BINS = 512
+HIST_BINS = 50
+LINE_BUCKETS = 2000
+MAX_FLIERS = 500
+
+
+def _finite(values):
+    values = np.asarray(values, dtype=float)
+    return values[np.isfinite(values)]
+
+
+def binned_kde(values, bins=KDE_GRID_BINS):
+    # Histogram the data on a fine grid and smooth the counts with a Gaussian
+    # kernel (Scott's bandwidth, as seaborn uses): O(n) instead of O(n * grid)
+    values = _finite(values)
+    if values.size < 2 or values.min() == values.max():
+        return None, None
+    lo, hi = values.min(), values.max()
+    bw = values.std(ddof=1) * values.size ** (-1 / 5)
+    lo, hi = lo - 3 * bw, hi + 3 * bw
+    counts, edges = np.histogram(values, bins=bins, range=(lo, hi))
+    centres = (edges[:-1] + edges[1:]) / 2
+    step = edges[1] - edges[0]
+    half = int(np.ceil(4 * bw / step))
+    offsets = np.arange(-half, half + 1) * step
+    kernel = np.exp(-0.5 * (offsets / bw) ** 2)
+    density = np.convolve(counts, kernel, mode="same")
+    density /= density.sum() * step
+    return centres, density
+
+
+def hist_with_kde(ax, values, bins=HIST_BINS, color=None):
+    values = _finite(values)
+    counts, edges = np.histogram(values, bins=bins)
+    ax.stairs(counts, edges, fill=True, alpha=0.5, color=color)
+    grid, density = binned_kde(values)
+    if grid is not None:
+        # Scale the density to the histogram's count axis
+        ax.plot(grid, density * values.size * (edges[1] - edges[0]), color=color)
+
+
+def kde_fill(ax, values):
+    grid, density = binned_kde(values)
+    if grid is not None:
+        ax.fill_between(grid, density, alpha=0.25)
+        ax.plot(grid, density)
+
+
+def hexbin_scatter(ax, x, y, gridsize=60):
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    keep = np.isfinite(x) & np.isfinite(y)
+    ax.hexbin(x[keep], y[keep], gridsize=gridsize, bins="log", mincnt=1, cmap="viridis")
+
+
+def box_from_quantiles(ax, values, whisker=1.5, max_fliers=MAX_FLIERS):
+    values = _finite(values)
+    if values.size == 0:
+        return
+    q1, med, q3 = np.percentile(values, [25, 50, 75])
+    iqr = q3 - q1
+    lower, upper = q1 - whisker * iqr, q3 + whisker * iqr
+    inside = values[(values >= lower) & (values <= upper)]
+    fliers = values[(values < lower) | (values > upper)]
+    if fliers.size > max_fliers:
+        # Keep the extremes plus an even subsample of the rest
+        fliers = np.sort(fliers)[np.linspace(0, fliers.size - 1, max_fliers).astype(int)]
+    stats = {
+        "med": med, "q1": q1, "q3": q3,
+        "whislo": inside.min() if inside.size else q1,
+        "whishi": inside.max() if inside.size else q3,
+        "fliers": fliers,
+    }
+    ax.bxp([stats], orientation="horizontal", patch_artist=True)
+
+
+def violin_from_bins(ax, values):
+    values = _finite(values)
+    grid, density = binned_kde(values)
+    if grid is None:
+        return
+    width = 0.4 / density.max()
+    ax.fill_between(grid, -density * width, density * width, alpha=0.6)
+    q1, med, q3 = np.percentile(values, [25, 50, 75])
+    ax.plot([q1, q3], [0, 0], color="black", linewidth=4)
+    ax.plot([med], [0], "o", color="white")
+    ax.set_yticks([])
+
+
+def minmax_decimate(values, buckets=LINE_BUCKETS):
+    # Keep each bucket's min and max, so spikes survive downsampling
+    values = np.asarray(values, dtype=float)
+    n = values.size
+    if n <= 2 * buckets:
+        return np.arange(n), values
+    edges = np.linspace(0, n, buckets + 1).astype(int)
+    starts = edges[:-1]
+    filled = np.where(np.isnan(values), np.nanmean(values), values)
+    mins = np.minimum.reduceat(filled, starts)
+    maxs = np.maximum.reduceat(filled, starts)
+    x = np.repeat((starts + edges[1:]) / 2, 2)
+    y = np.column_stack([mins, maxs]).ravel()
+    return x, y
+
+
+def counts_bar(ax, series, top_n=30):
+    counts = series.value_counts().head(top_n)
+    ax.bar(counts.index.astype(str), counts.to_numpy())
+    ax.tick_params(axis="x", labelrotation=90)
+
+
+# Above this many columns the correlation heatmap drops the per-cell text and
+# is drawn as a single raster; above MAX_HEATMAP_CELLS columns the matrix is
+# averaged into square tiles first
+ANNOTATE_MAX_COLUMNS = 25
+MAX_HEATMAP_CELLS = 1000
+MAX_TICK_LABELS = 50
+
+
+def _tile_mean(values, cells):
+    # Average the matrix over square tiles so at most ``cells`` remain per axis
+    size = int(np.ceil(len(values) / cells))
+    padded = len(values) + (-len(values)) % size
+    grid = np.full((padded, padded), np.nan)
+    grid[:len(values), :len(values)] = values
+    tiles = grid.reshape(padded // size, size, padded // size, size)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        return np.nanmean(tiles, axis=(1, 3)), size
+
+
+def correlation_heatmap(ax, corr, annotate_max=ANNOTATE_MAX_COLUMNS, cmap="coolwarm", **annotated):
+    # Small matrices keep the annotated seaborn heatmap (``annotated`` is
+    # passed through to it); large ones skip the p*p text artists
+    columns = list(corr.columns)
+    if len(columns) <= annotate_max:
+        sns.heatmap(corr, annot=True, cmap=cmap, ax=ax, **annotated)
+        return
+    values, size = corr.to_numpy(dtype=float), 1
+    if len(values) > MAX_HEATMAP_CELLS:
+        values, size = _tile_mean(values, MAX_HEATMAP_CELLS)
+    image = ax.imshow(values, cmap=cmap, vmin=-1, vmax=1, interpolation="nearest", aspect="auto")
+    ax.figure.colorbar(image, ax=ax)
+    step = max(1, int(np.ceil(len(values) / MAX_TICK_LABELS)))
+    ticks = np.arange(0, len(values), step)
+    ax.set_xticks(ticks, [columns[t * size] for t in ticks], rotation=90, fontsize=6)
+    ax.set_yticks(ticks, [columns[t * size] for t in ticks], fontsize=6)
+    ax.grid(False)
@@ -0,0 +1,176 @@
+import importlib.util
+import time
+
+import numpy as np
+import pandas as pd
+
+import data_loader
+import instrumentation
+
+# Derived columns are declared as (name, kind, params) specs and evaluated
+# together: source columns are read once as float arrays, each feature is one
+# fused expression (numexpr when installed, numpy otherwise) and the new
+# columns are attached to the frame in a single concat.
+HAS_NUMEXPR = importlib.util.find_spec("numexpr") is not None
+
+# Derived columns per (dataset hash, spec), shared by every session
+feature_cache = data_loader.MemoryLRUCache(max_bytes=256 * 1024 * 1024,
+                                           sizeof=lambda entry: data_loader.frame_nbytes(entry[0]))
+
+
+def ratio(name, numerator, denominator, scale=1):
+    return (name, "ratio", (("denominator", denominator), ("numerator", numerator), ("scale", scale)))
+
+
+def per_capita(name, column, population, per=100_000):
+    return ratio(name, column, population, scale=per)
+
+
+def log(name, column):
+    # log(1 + x), so zero counts stay finite
+    return (name, "log", (("column", column),))
+
+
+def bins(name, column, edges, labels=None):
+    return (name, "bins", (("column", column), ("edges", tuple(edges)),
+                           ("labels", tuple(labels) if labels is not None else None)))
+
+
+def rolling(name, column, window, agg="mean"):
+    return (name, "rolling", (("agg", agg), ("column", column), ("window", window)))
+
+
+def _evaluate(expression, fallback, **operands):
+    # ``expression`` is compiled by numexpr when it is installed; otherwise
+    # ``fallback`` computes the same thing with numpy, from the operands in order
+    if HAS_NUMEXPR:
+        import numexpr
+
+        return numexpr.evaluate(expression, local_dict=operands)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return fallback(*operands.values())
+
+
+def _scaled_ratio(a, b, scale):
+    return a / b * scale
+
+
+def _ratio(arrays, numerator, denominator, scale):
+    return _evaluate("a / b * scale", _scaled_ratio,
+                     a=arrays[numerator], b=arrays[denominator], scale=float(scale))
+
+
+def _log(arrays, column):
+    return _evaluate("log1p(a)", np.log1p, a=arrays[column])
+
+
+def _bins(arrays, column, edges, labels):
+    return pd.cut(arrays[column], bins=list(edges), labels=list(labels) if labels is not None else None)
+
+
+def _rolling(arrays, column, window, agg):
+    return getattr(pd.Series(arrays[column]).rolling(window, min_periods=1), agg)().to_numpy()
+
+
+KINDS = {
+    "ratio": (_ratio, ("numerator", "denominator")),
+    "log": (_log, ("column",)),
+    "bins": (_bins, ("column",)),
+    "rolling": (_rolling, ("column",)),
+}
+
+
+def source_columns(spec):
+    columns = []
+    for _, kind, params in spec:
+        params = dict(params)
+        for param in KINDS[kind][1]:
+            if params[param] not in columns:
+                columns.append(params[param])
+    return columns
+
+
+def compute(df, spec):
+    """Evaluate ``spec`` against ``df``; returns (new columns, seconds per feature).
+
+    A feature may use columns produced by earlier features in the spec.
+    Features whose source columns are missing are skipped.
+    """
+    arrays = {}
+    for column in source_columns(spec):
+        if column in df.columns:
+            arrays[column] = pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    new, timings = {}, {}
+    for name, kind, params in spec:
+        fn, sources = KINDS[kind]
+        params = dict(params)
+        if any(params[s] not in arrays for s in sources):
+            continue
+        start = time.perf_counter()
+        values = fn(arrays, **params)
+        timings[name] = time.perf_counter() - start
+        new[name] = values
+        if kind != "bins":
+            arrays[name] = np.asarray(values, dtype=float)
+    return pd.DataFrame(new, index=df.index), timings
+
+
+def context_rows(spec):
+    # Preceding rows a feature of new rows can depend on (rolling windows;
+    # chained rolling features add up)
+    return sum(dict(params)["window"] - 1 for _, kind, params in spec if kind == "rolling")
+
+
+def _tail(parts, rows):
+    # Last ``rows`` rows across ``parts``, reading back only as many parts
+    # as needed (a part can be shorter than the context)
+    tail = []
+    for part in reversed(parts):
+        if rows <= 0:
+            break
+        tail.append(part.iloc[-rows:])
+        rows -= len(tail[-1])
+    return tail[::-1]
+
+
+def extend(parts, new, spec):
+    """Features of the rows in ``new`` appended after the frames in ``parts``.
+
+    Only the last ``context_rows(spec)`` rows of ``parts`` are read, so the
+    cost depends on the appended rows, not the dataset.
+    """
+    spec = tuple(spec)
+    context = context_rows(spec)
+    tail = _tail(parts, context)
+    if tail:
+        tail = pd.concat([part.reindex(columns=new.columns) for part in tail])
+        features, _ = compute(pd.concat([tail, new]), spec)
+        features = features.iloc[len(tail):]
+        features.index = new.index
+    else:
+        features, _ = compute(new, spec)
+    kept = new.drop(columns=[c for c in features.columns if c in new.columns])
+    return pd.concat([kept, features], axis=1)
+
+
+@instrumentation.traced("feature_engine.apply")
+def apply(df, spec, key=None):
+    """``df`` with the features of ``spec`` added, plus per-feature timings.
+
+    ``key`` identifies the dataset (e.g. its file hash); when given, the
+    derived columns are cached under (key, spec) and reused on later calls,
+    which report a time of 0 for every feature.
+    """
+    spec = tuple(spec)
+    entry = feature_cache.get((key, spec)) if key is not None else None
+    if entry is None:
+        entry = compute(df, spec)
+        if key is not None:
+            feature_cache.put((key, spec), entry)
+        features, timings = entry
+    else:
+        features, timings = entry[0], dict.fromkeys(entry[1], 0.0)
+    # One concat instead of one copying assignment per feature; existing
+    # columns of the same name are replaced, as an assignment would
+    kept = df.drop(columns=[c for c in features.columns if c in df.columns])
+    return pd.concat([kept, features], axis=1), timings
@@ -1,24 +1,27 @@
 import streamlit as st
 import json
+from functools import lru_cache
 from streamlit_lottie import st_lottie
 
-# Function to load Lottie animations from JSON files
+# Function to load Lottie animations from JSON files; each file is parsed
+# once per process, the first time the Home page is shown
+@lru_cache(maxsize=None)
 def load_lottie_animation(file_path):
     with open(file_path, "r") as f:
         return json.load(f)
 
-# Set file paths for Lottie animations
-animation1 = load_lottie_animation("assets/Animation1.json")
-animation2 = load_lottie_animation("assets/Animation2.json")
-animation3 = load_lottie_animation("assets/Animation3.json")
-animation4 = load_lottie_animation("assets/Animation4.json")
-animation5 = load_lottie_animation("assets/Animation5.json")
-animation6 = load_lottie_animation("assets/Animation6.json")
-animation7 = load_lottie_animation("assets/Animation7.json")
-animation8 = load_lottie_animation("assets/Animation8.json")
-animation9 = load_lottie_animation("assets/Animation9.json")
-
 def app():
+    # Set file paths for Lottie animations
+    animation1 = load_lottie_animation("assets/Animation1.json")
+    animation2 = load_lottie_animation("assets/Animation2.json")
+    animation3 = load_lottie_animation("assets/Animation3.json")
+    animation4 = load_lottie_animation("assets/Animation4.json")
+    animation5 = load_lottie_animation("assets/Animation5.json")
+    animation6 = load_lottie_animation("assets/Animation6.json")
+    animation7 = load_lottie_animation("assets/Animation7.json")
+    animation8 = load_lottie_animation("assets/Animation8.json")
+    animation9 = load_lottie_animation("assets/Animation9.json")
+
     # Set catchy title and subtitle
     st.title("Data Dynamics: Unveiling Hidden Patterns")
     st.write(" :orange[Discover the hidden story your data is trying to tell, unlocking powerful insights that drive smarter decisions and fuel future growth]")
@@ -0,0 +1,192 @@
+import copy
+
+import numpy as np
+import pandas as pd
+
+import charts
+import data_loader
+import dataset_store
+import feature_engine
+import instrumentation
+from streaming import StreamingStats
+
+# Append mode: a dataset is a base file plus deltas of new rows. Every
+# version keeps the statistics of all its rows (moments, co-moments,
+# quartile sketches, histogram bins) and appending a delta updates them from
+# the delta's rows only. Versions are immutable and keyed by the chain of
+# file digests, so sessions applying the same deltas share them.
+MAX_HIST_BINS = 200
+CHUNK_ROWS = 100_000  # rows per update when a base is first summarised
+
+
+def _numeric(frame, columns):
+    return (frame.reindex(columns=columns).apply(pd.to_numeric, errors="coerce")
+            .to_numpy(dtype=float, na_value=np.nan))
+
+
+class BinnedHistogram:
+    """Fixed-width bin counts that grow with appended values.
+
+    Bins cover ``[start, start + width * len(counts))``. Values outside the
+    range add whole bins at either end; when that would pass ``max_bins``,
+    neighbouring bins are merged (the width doubles), so earlier counts
+    never need the raw values again.
+    """
+
+    def __init__(self, bins=charts.HIST_BINS, max_bins=MAX_HIST_BINS):
+        self.bins = bins
+        self.max_bins = max_bins
+        self.start = None
+        self.width = None
+        self.counts = np.zeros(0, dtype=np.int64)
+
+    @property
+    def edges(self):
+        if self.start is None:
+            return np.zeros(1)
+        return self.start + self.width * np.arange(len(self.counts) + 1)
+
+    def _merge_pairs(self):
+        if len(self.counts) % 2:
+            self.counts = np.append(self.counts, 0)
+        self.counts = self.counts.reshape(-1, 2).sum(axis=1)
+        self.width *= 2
+
+    def update(self, values):
+        """Add ``values``; returns whether any finite value was counted."""
+        values = values[np.isfinite(values)]
+        if not values.size:
+            return False
+        lo, hi = values.min(), values.max()
+        if self.start is None:
+            self.start = lo
+            self.width = (hi - lo) / self.bins if hi > lo else max(abs(lo), 1.0) / self.bins
+            self.counts = np.zeros(self.bins, dtype=np.int64)
+        # Coarsen first, so a far outlier can't allocate millions of bins
+        while True:
+            left = max(0, int(np.ceil((self.start - lo) / self.width)))
+            right = max(0, int(np.floor((hi - self.start) / self.width)) + 1 - len(self.counts))
+            if len(self.counts) + left + right <= self.max_bins:
+                break
+            self._merge_pairs()
+        if left or right:
+            self.start -= left * self.width
+            self.counts = np.concatenate([np.zeros(left, dtype=np.int64), self.counts,
+                                          np.zeros(right, dtype=np.int64)])
+        positions = np.clip(((values - self.start) // self.width).astype(np.int64), 0, len(self.counts) - 1)
+        self.counts += np.bincount(positions, minlength=len(self.counts))
+        return True
+
+
+class AppendableDataset:
+    """One version of an appendable dataset.
+
+    ``parts`` are the base and delta frames (with derived features) in
+    order; ``stats`` and ``histograms`` cover all of them. ``changed`` lists
+    the numeric columns whose histogram the last append touched.
+    """
+
+    def __init__(self, key, spec, columns, parts, stats, histograms, changed, missing=(), extra=()):
+        self.key = key
+        self.spec = spec
+        self.columns = columns      # source columns of the base file
+        self.parts = parts
+        self.stats = stats
+        self.histograms = histograms
+        self.changed = changed
+        self.missing = list(missing)  # columns the last delta lacked
+        self.extra = list(extra)      # columns of the last delta that were dropped
+
+    @property
+    def rows(self):
+        return self.stats.rows
+
+    @property
+    def delta_rows(self):
+        return len(self.parts[-1]) if len(self.parts) > 1 else 0
+
+    def append(self, delta_key, delta):
+        """The next version, with ``delta``'s rows added."""
+        missing = [col for col in self.columns if col not in delta.columns]
+        extra = [col for col in delta.columns if col not in self.columns]
+        delta = delta.reindex(columns=self.columns)
+        with instrumentation.span("incremental.append", "compute"):
+            delta = feature_engine.extend(self.parts, delta, self.spec)
+            stats = copy.deepcopy(self.stats)
+            stats.update(delta)
+            histograms = copy.deepcopy(self.histograms)
+            values = _numeric(delta, stats.columns)
+            changed = [col for i, col in enumerate(stats.columns) if histograms[col].update(values[:, i])]
+        return AppendableDataset(self.key + (delta_key,), self.spec, self.columns, self.parts + (delta,),
+                                 stats, histograms, changed, missing, extra)
+
+    def histogram(self, column):
+        hist = self.histograms[column]
+        return charts.binned_histogram(column, hist.counts, hist.edges, title=f"Distribution of {column}")
+
+    def outlier_estimates(self, whisker=1.5):
+        # Values outside the IQR fences, counted from the quartile sketches
+        # (exact until a column passes the sketch size)
+        lower, upper = self.stats.iqr_bounds(whisker)
+        low = np.array([sketch.rank(lo)[0] for sketch, lo in zip(self.stats.sketches, lower)])
+        high = np.array([sketch.rank(hi)[1] for sketch, hi in zip(self.stats.sketches, upper)])
+        low, high = np.round(low).astype(np.int64), np.round(high).astype(np.int64)
+        return pd.DataFrame({"Outliers (est.)": low + high, "Below lower fence": low,
+                             "Above upper fence": high}, index=self.stats.columns)
+
+    def frame(self):
+        """All rows as one frame, merged once per version into the dataset store."""
+        store_key = ("appended",) + self.key + (self.spec,)
+        stored = dataset_store.store.open(store_key)
+        if stored is None:
+            merged = pd.concat(self.parts, ignore_index=True)
+            if dataset_store.store.put(store_key, merged):
+                stored = dataset_store.store.open(store_key)
+            if stored is None:
+                return merged
+        return stored[0]
+
+    def nbytes(self):
+        # The base frame is already held by the dataset cache
+        sketches = sum(level.nbytes for sketch in self.stats.sketches for level in sketch.levels)
+        return sketches + sum(data_loader.frame_nbytes(part) for part in self.parts[1:])
+
+
+# Versions by (spec, base digest, delta digests...), shared by every session
+versions = data_loader.MemoryLRUCache(max_bytes=256 * 1024 * 1024, sizeof=AppendableDataset.nbytes)
+
+
+@instrumentation.traced("incremental.start")
+def start(base_key, base, spec=()):
+    """The first version: one pass over ``base`` (plus its derived features)."""
+    spec = tuple(spec)
+    version = versions.get((spec, base_key))
+    if version is not None:
+        return version
+    frame = feature_engine.apply(base, spec, key=base_key)[0] if spec else base
+    stats = StreamingStats()
+    for begin in range(0, max(len(frame), 1), CHUNK_ROWS):
+        stats.update(frame.iloc[begin:begin + CHUNK_ROWS])
+    histograms = {col: BinnedHistogram() for col in stats.columns}
+    for begin in range(0, len(frame), CHUNK_ROWS):
+        values = _numeric(frame.iloc[begin:begin + CHUNK_ROWS], stats.columns)
+        for i, col in enumerate(stats.columns):
+            histograms[col].update(values[:, i])
+    version = AppendableDataset((base_key,), spec, list(base.columns), (frame,), stats, histograms,
+                                list(stats.columns))
+    return versions.put((spec, base_key), version)
+
+
+def extend(version, delta_key, delta):
+    key = (version.spec,) + version.key + (delta_key,)
+    cached = versions.get(key)
+    if cached is None:
+        cached = versions.put(key, version.append(delta_key, delta))
+    return cached
+
+
+def extend_files(version, uploaded_files):
+    # Deltas apply in upload order; each one is parsed once and cached
+    for uploaded_file in uploaded_files:
+        version = extend(version, data_loader.file_digest(uploaded_file), data_loader.load_csv(uploaded_file))
+    return version
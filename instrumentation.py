@@ -0,0 +1,286 @@
+import contextlib
+import contextvars
+import functools
+import json
+import logging
+import os
+import resource
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+
+# Named spans around the stages of a page run. MultiApp.run opens one trace
+# per rerun; every span entered on the script thread while it is open is
+# recorded in it. Spans outside a trace (background jobs, fragment reruns)
+# are kept as "background". All spans also feed per-(page, stage, span)
+# totals, which are exported as JSON log lines and a Prometheus textfile.
+# Span names are fixed strings, as they become metric labels; what a span
+# worked on (a chart, a table) goes in its ``detail``, which is kept with
+# the trace only.
+# main.py imports this before any page, so pandas is only imported on use.
+STAGES = ("ingest", "compute", "render", "serialize")
+BACKGROUND = "background"
+MAX_BACKGROUND_SPANS = 200
+# Least recently updated totals are dropped beyond these
+MAX_TOTALS = 1000
+MAX_PAGES = 100
+
+# One JSON line per rerun is written here when set (also sent to the
+# "instrumentation" logger, for whatever handlers the server configures)
+LOG_PATH = os.environ.get("INSTRUMENTATION_LOG")
+# Prometheus text exposition file, e.g. for node_exporter's textfile collector
+METRICS_TEXTFILE = os.environ.get("INSTRUMENTATION_TEXTFILE")
+TEXTFILE_INTERVAL = 5.0  # seconds between rewrites of the textfile
+
+logger = logging.getLogger("instrumentation")
+if LOG_PATH:
+    _handler = logging.FileHandler(LOG_PATH)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+
+_trace = contextvars.ContextVar("trace", default=None)
+_lock = threading.Lock()
+_totals = OrderedDict()  # (page, stage, span) -> [count, seconds, rss bytes, payload bytes]
+_reruns = OrderedDict()  # page -> [count, seconds]
+_background = deque(maxlen=MAX_BACKGROUND_SPANS)
+_textfile_written = 0.0
+
+
+def rss_bytes():
+    # Current resident set size (Linux); the peak elsewhere. This is the whole
+    # process, so concurrent sessions show up in each other's deltas.
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def payload_size(value):
+    # Approximate bytes sent to the browser for a displayed value
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode())
+    if hasattr(value, "memory_usage"):  # DataFrame or Series
+        usage = value.memory_usage(index=True, deep=True)
+        return int(getattr(usage, "sum", lambda: usage)())
+    return len(json.dumps(value, default=str))
+
+
+class Span:
+    """One timed stage. ``payload_bytes`` may be set inside the block."""
+
+    def __init__(self, name, stage, depth=0, payload_bytes=None, detail=None):
+        self.name = name
+        self.stage = stage
+        self.detail = detail
+        self.depth = depth
+        self.payload_bytes = payload_bytes
+        self.seconds = 0.0
+        self.rss_delta = 0
+        self.error = None
+
+    def as_dict(self):
+        return {
+            "span": self.name,
+            "detail": self.detail,
+            "stage": self.stage,
+            "depth": self.depth,
+            "seconds": round(self.seconds, 6),
+            "rss_delta_bytes": self.rss_delta,
+            "payload_bytes": self.payload_bytes,
+            "error": self.error,
+        }
+
+
+class Trace:
+    """The spans of one page rerun, in the order they were entered."""
+
+    def __init__(self, page):
+        self.page = page
+        self.started = time.time()
+        self.seconds = 0.0
+        self.spans = []
+        self._depth = 0
+        self._start = time.perf_counter()
+
+    def stage_totals(self):
+        # Top-level spans only, so nested spans are not counted twice
+        totals = dict.fromkeys(STAGES, 0.0)
+        for span in self.spans:
+            if span.depth == 0:
+                totals[span.stage] = totals.get(span.stage, 0.0) + span.seconds
+        return totals
+
+    def frame(self):
+        import pandas as pd
+
+        return pd.DataFrame([span.as_dict() for span in self.spans],
+                            columns=["span", "detail", "stage", "depth", "seconds", "rss_delta_bytes", "payload_bytes", "error"])
+
+    def as_dict(self):
+        return {
+            "page": self.page,
+            "time": self.started,
+            "seconds": round(self.seconds, 6),
+            "stages": {stage: round(seconds, 6) for stage, seconds in self.stage_totals().items()},
+            "spans": [span.as_dict() for span in self.spans],
+        }
+
+
+@contextlib.contextmanager
+def span(name, stage="compute", payload=None, detail=None):
+    """Time the block as ``name`` in ``stage``; yields the Span.
+
+    ``payload`` (bytes, a frame, JSON-able data) is measured with
+    ``payload_size`` for spans that send something to the browser.
+    ``detail`` (e.g. a chart name) is shown with the trace but not part of
+    the totals.
+    """
+    trace = _trace.get()
+    record = Span(name, stage, trace._depth if trace is not None else 0,
+                  payload_size(payload) if payload is not None else None, detail)
+    if trace is not None:
+        trace.spans.append(record)
+        trace._depth += 1
+    rss = rss_bytes()
+    start = time.perf_counter()
+    try:
+        yield record
+    except BaseException as e:
+        record.error = type(e).__name__
+        raise
+    finally:
+        record.seconds = time.perf_counter() - start
+        record.rss_delta = rss_bytes() - rss
+        if trace is not None:
+            trace._depth -= 1
+        _record(trace.page if trace is not None else BACKGROUND, record)
+
+
+def traced(name, stage="compute"):
+    # Decorator form of span()
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name, stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def _record(page, record):
+    with _lock:
+        totals = _totals.setdefault((page, record.stage, record.name), [0, 0.0, 0, 0])
+        _totals.move_to_end((page, record.stage, record.name))
+        while len(_totals) > MAX_TOTALS:
+            _totals.popitem(last=False)
+        totals[0] += 1
+        totals[1] += record.seconds
+        totals[2] += record.rss_delta
+        totals[3] += record.payload_bytes or 0
+        if page == BACKGROUND:
+            _background.append({"time": time.time(), **record.as_dict()})
+
+
+def begin(page):
+    """Open the trace for one run of ``page`` on this thread."""
+    trace = Trace(page)
+    trace._token = _trace.set(trace)
+    return trace
+
+
+def end(trace):
+    """Close ``trace``: log it and update the exported totals."""
+    trace.seconds = time.perf_counter() - trace._start
+    _trace.reset(trace._token)
+    with _lock:
+        reruns = _reruns.setdefault(trace.page, [0, 0.0])
+        _reruns.move_to_end(trace.page)
+        while len(_reruns) > MAX_PAGES:
+            _reruns.popitem(last=False)
+        reruns[0] += 1
+        reruns[1] += trace.seconds
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(json.dumps(trace.as_dict(), default=str))
+    if METRICS_TEXTFILE:
+        _maybe_write_textfile(METRICS_TEXTFILE)
+    return trace
+
+
+def background_spans():
+    import pandas as pd
+
+    with _lock:
+        return pd.DataFrame(list(_background))
+
+
+def totals():
+    import pandas as pd
+
+    with _lock:
+        rows = [(page, stage, name, *values) for (page, stage, name), values in _totals.items()]
+    return pd.DataFrame(rows, columns=["page", "stage", "span", "count", "seconds", "rss_delta_bytes", "payload_bytes"])
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text():
+    """All totals in the Prometheus text exposition format."""
+    with _lock:
+        spans = [(key, list(values)) for key, values in _totals.items()]
+        reruns = [(page, list(values)) for page, values in _reruns.items()]
+    lines = [
+        "# HELP data_dynamics_span_seconds Time spent in instrumented spans.",
+        "# TYPE data_dynamics_span_seconds summary",
+    ]
+    for (page, stage, name), (count, seconds, _, _) in spans:
+        labels = f'page="{_label(page)}",stage="{_label(stage)}",span="{_label(name)}"'
+        lines.append(f"data_dynamics_span_seconds_count{{{labels}}} {count}")
+        lines.append(f"data_dynamics_span_seconds_sum{{{labels}}} {seconds:.6f}")
+    lines += [
+        "# HELP data_dynamics_span_rss_delta_bytes Net change in resident memory summed over spans.",
+        "# TYPE data_dynamics_span_rss_delta_bytes gauge",
+    ]
+    for (page, stage, name), (_, _, rss, _) in spans:
+        labels = f'page="{_label(page)}",stage="{_label(stage)}",span="{_label(name)}"'
+        lines.append(f"data_dynamics_span_rss_delta_bytes{{{labels}}} {rss}")
+    lines += [
+        "# HELP data_dynamics_span_payload_bytes_total Bytes sent to the browser by spans.",
+        "# TYPE data_dynamics_span_payload_bytes_total counter",
+    ]
+    for (page, stage, name), (_, _, _, payload) in spans:
+        labels = f'page="{_label(page)}",stage="{_label(stage)}",span="{_label(name)}"'
+        lines.append(f"data_dynamics_span_payload_bytes_total{{{labels}}} {payload}")
+    lines += [
+        "# HELP data_dynamics_rerun_seconds Wall time of whole page reruns.",
+        "# TYPE data_dynamics_rerun_seconds summary",
+    ]
+    for page, (count, seconds) in reruns:
+        lines.append(f'data_dynamics_rerun_seconds_count{{page="{_label(page)}"}} {count}')
+        lines.append(f'data_dynamics_rerun_seconds_sum{{page="{_label(page)}"}} {seconds:.6f}')
+    return "\n".join(lines) + "\n"
+
+
+def write_textfile(path):
+    # Written to a temporary file and renamed, so scrapers never see half a file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(prometheus_text())
+    os.replace(tmp_path, path)
+
+
+def _maybe_write_textfile(path):
+    global _textfile_written
+    now = time.monotonic()
+    with _lock:
+        if now - _textfile_written < TEXTFILE_INTERVAL:
+            return
+        _textfile_written = now
+    write_textfile(path)
@@ -1,6 +1,12 @@
 import streamlit as st
 import pandas as pd
 import time
+import data_loader
+import profiling
+import ui_components
+import cleaning_pipeline
+import charts
+import aggregation
 
 def app():
     st.title("Interactive Data Analysis and Cleaning")
@@ -52,14 +58,19 @@ def app():
     uploaded_file = st.file_uploader("Choose a CSV file", type=["csv"])
     
     if uploaded_file is not None:
-        df = pd.read_csv(uploaded_file)
+        df = data_loader.load_csv(uploaded_file)
+        report = data_loader.compaction_report(uploaded_file)
+        if report is not None:
+            with st.expander(f"Memory: {report['Bytes after'].sum():,} bytes after compaction "
+                             f"({report['Bytes saved'].sum():,} saved)"):
+                st.dataframe(report, hide_index=True)
         
         # Normalize column names
         df.columns = df.columns.str.strip().str.title()  # Normalize column names
         df.columns = df.columns.str.replace(' ', '_')  # Replace spaces with underscores
         
         st.write("Uploaded Dataset:")
-        st.write(df)
+        ui_components.paged_table(df, key="uploaded")
         
         st.subheader(":orange[Dataset Overview]")
         st.write("### 1. First Five Rows of the Dataset")
@@ -72,22 +83,29 @@ def app():
         st.write(df.columns.tolist())
 
         st.write("### 4. Missing Values in Each Column")
-        st.write(df.isnull().sum())
+        profile, profiled_df = profiling.profile_frame(df), df
+        st.write(profile.null_counts)
 
         # Data Cleaning Options
         st.subheader(":orange[Data Cleaning Options]")
+
+        # Cleaning steps are recorded per session and replayed on top of the
+        # cached upload; each step's result is cached as well
+        pipeline = st.session_state.get("cleaning_pipeline")
+        source_key = data_loader.file_digest(uploaded_file)
+        if pipeline is None or pipeline.source_key != source_key:
+            pipeline = cleaning_pipeline.CleaningPipeline(source_key)
+            st.session_state["cleaning_pipeline"] = pipeline
         
         # Fill Missing Values
         if st.button("Fill Missing Values with 0"):
-            df.fillna(0, inplace=True)
+            pipeline.add("fill_missing", value=0)
             st.write("Missing values filled with 0.")
-            st.write(df)
 
         # Rename Columns
         if st.button("Rename Columns to Title Case"):
-            df.columns = df.columns.str.title()
-            st.write("Renamed Columns:")
-            st.write(df.columns.tolist())
+            pipeline.add("title_case_columns")
+            st.write("Renamed columns to title case.")
         
         # Replacing Values
         replace_value = st.text_input("Enter a Value to Replace (Optional)")
@@ -101,38 +119,87 @@ def app():
                     if new_value.isdigit():
                         new_value = int(new_value)
                     
-                    # Replace the values in the dataframe
-                    df.replace(to_replace=replace_value, value=new_value, inplace=True)
+                    # Record the replacement as a cleaning step
+                    pipeline.add("replace_values", to_replace=replace_value, value=new_value)
                     st.write(f"Replaced '{replace_value}' with '{new_value}' in the dataset.")
-                    st.write(df)
                 except ValueError:
                     st.error("Please ensure that the values entered are valid numbers or strings.")
         
         # Adding a New Column
         if st.button("Add Population Density (Cases/Population) Column"):
             if 'Total_Cases' in df.columns and 'Population' in df.columns:
-                df['Population_Density'] = df['Total_Cases'] / df['Population']
-                st.write("Added Population Density Column:")
-                st.write(df)
+                pipeline.add("add_population_density")
+                st.write("Added Population Density Column.")
+
+        # Applied steps, with reorder / remove controls
+        if pipeline.steps:
+            st.write("**Applied Cleaning Steps:**")
+            for i, step in enumerate(pipeline.steps):
+                label, up, down, remove = st.columns([6, 1, 1, 1])
+                label.write(f"{i + 1}. {pipeline.describe(step)}")
+                up.button("↑", key=f"step_up_{i}", on_click=pipeline.move, args=(i, -1), disabled=i == 0)
+                down.button("↓", key=f"step_down_{i}", on_click=pipeline.move, args=(i, 1),
+                            disabled=i == len(pipeline.steps) - 1)
+                remove.button("✕", key=f"step_remove_{i}", on_click=pipeline.remove, args=(i,))
+            st.button("Undo Last Step", on_click=pipeline.undo)
+
+            df = pipeline.result(df)
+            st.caption(f"Recomputed {pipeline.last_recomputed} of {len(pipeline.steps)} step(s) on this run.")
+            st.write("Cleaned Dataset:")
+            ui_components.paged_table(df, key="cleaned")
 
         # Descriptive Statistics
         st.subheader(":orange[Descriptive Statistics]")
         st.write("Summary Statistics of Numerical Columns:")
-        st.write(df.describe())
+        if df is not profiled_df:  # a cleaning step produced a new frame
+            profile = profiling.profile_frame(df)
+        st.write(profile.describe())
 
         # Data Aggregation
         st.subheader(":orange[Data Aggregation]")
-        st.write("Aggregate Total Cases and Deaths:")
-        if 'Total_Cases' in df.columns and 'Deaths' in df.columns:
-            aggregate_data = df.agg({'Total_Cases': ['sum', 'mean'], 'Deaths': ['sum', 'mean']})
-            st.write(aggregate_data)
-        else:
+        # Served from a group index built once per dataset and keys; cleaning
+        # steps update its rollups from the changed rows only
+        numeric_columns = list(df.select_dtypes(include="number").columns)
+        default_keys = [col for col in ["State/Uts"] if col in df.columns]
+        default_values = [col for col in ['Total_Cases', 'Deaths'] if col in numeric_columns]
+        keys = st.multiselect("Group by", list(df.columns), default=default_keys)
+        values = st.multiselect("Aggregate columns", [col for col in numeric_columns if col not in keys],
+                                default=[col for col in default_values if col not in keys])
+        funcs = st.multiselect("Aggregates", aggregation.AGGREGATES, default=["sum", "mean"])
+        if values and funcs:
+            aggregator = aggregation.aggregator(source_key, keys, scope=pipeline.id)
+            version = tuple(pipeline.steps)  # with source_key, identifies df
+            if not keys:
+                st.write(f"Aggregate {', '.join(values)}:")
+                # One group: laid out like DataFrame.agg (aggregates as rows)
+                st.write(aggregator.aggregate(df, values, funcs, version=version).iloc[0].unstack(0).loc[funcs, values])
+            else:
+                where = None
+                labels = aggregator.labels(df, version).get_level_values(keys[0]).unique()
+                selected = st.multiselect(f"Only these {keys[0]} values", list(labels))
+                if selected:
+                    where = {keys[0]: selected}
+                top = st.number_input(f"Top N groups by {funcs[0]} of {values[0]} (0 for all)",
+                                      min_value=0, value=0, step=5)
+                result = aggregator.aggregate(df, values, funcs, where, version)
+                if top:
+                    result = result.loc[aggregator.top(df, values[0], funcs[0], int(top), where,
+                                                       version=version).index]
+                result.columns = [f"{column} ({func})" for column, func in result.columns]
+                st.caption(f"{aggregator.index.ngroups:,} groups · index built {aggregator.builds}× · "
+                           f"{aggregator.updated_rows:,} changed rows applied to the rollups")
+                ui_components.paged_table(result, key="aggregation")
+        elif not default_values:
             st.error("Required columns ('Total_Cases', 'Deaths') are missing.")
         
         # Visualization (Optional Feature)
         st.subheader(":orange[Visualization Options]")
         if st.checkbox("Show Total Cases by State/UT"):
-            st.bar_chart(df.set_index("State/Uts")["Total_Cases"])
+            # Summed per state from the group index; only the top states plus an Other bar are sent
+            totals = aggregation.aggregator(source_key, ["State/Uts"], scope=pipeline.id).series(
+                df, "Total_Cases", "sum", version=tuple(pipeline.steps))
+            chart = charts.grouped_bar(totals, "State/Uts", "Total_Cases", title="Total Cases by State/UT")
+            ui_components.show_chart(charts.prepare(chart))
 
         st.subheader("Summary")
         st.write("""
@@ -0,0 +1,134 @@
+import os
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import instrumentation
+
+# Long analyses run here instead of on the Streamlit script thread. Jobs are
+# keyed by (kind, dataset hash, parameters): identical requests from any
+# session share one job, and finished results stay available for polling.
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 2))
+MAX_FINISHED_JOBS = 64
+
+_current = threading.local()
+
+
+class Job:
+    def __init__(self, kind, key):
+        self.kind = kind
+        self.key = key
+        self.status = "pending"  # pending -> running -> done | failed
+        self.progress = 0.0
+        self.message = ""
+        self.result = None
+        self.error = None
+        self.traceback = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+
+    @property
+    def done(self):
+        return self.status in ("done", "failed")
+
+    @property
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+
+def report_progress(fraction, message=""):
+    # Called from inside a job function; does nothing outside a job
+    job = getattr(_current, "job", None)
+    if job is not None:
+        job.progress = min(max(float(fraction), 0.0), 1.0)
+        job.message = message
+
+
+class JobManager:
+    def __init__(self, max_workers=JOB_WORKERS, max_finished=MAX_FINISHED_JOBS):
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="job")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self.max_finished = max_finished
+
+    def _run(self, job, fn, args, kwargs):
+        _current.job = job
+        job.status = "running"
+        job.started = time.time()
+        try:
+            # Job threads have no page trace; these spans are "background"
+            with instrumentation.span(f"job:{job.kind}", "compute"):
+                job.result = fn(*args, **kwargs)
+            job.progress = 1.0
+            job.status = "done"
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            job.traceback = traceback.format_exc()
+            job.status = "failed"
+        finally:
+            job.finished = time.time()
+            _current.job = None
+            self._prune()
+
+    def _prune(self):
+        # Keep the most recent finished jobs; running ones are never dropped
+        with self._lock:
+            finished = [key for key, job in self._jobs.items() if job.done]
+            for key in finished[:max(0, len(finished) - self.max_finished)]:
+                del self._jobs[key]
+
+    def submit(self, kind, key, fn, *args, **kwargs):
+        """Return the job for ``(kind, key)``, starting it if needed.
+
+        Any existing job is reused, including a failed one: the failure is
+        the result for that key until ``retry(job)`` drops it, so pages that
+        submit on every rerun don't resubmit a failing job in a loop.
+        """
+        full_key = (kind, key)
+        with self._lock:
+            job = self._jobs.get(full_key)
+            if job is not None:
+                self._jobs.move_to_end(full_key)
+                return job
+            job = Job(kind, full_key)
+            self._jobs[full_key] = job
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def get(self, kind, key):
+        with self._lock:
+            return self._jobs.get((kind, key))
+
+    def retry(self, job):
+        # Forget a failed job; the next submit() for its key starts it again
+        with self._lock:
+            if job.status == "failed" and self._jobs.get(job.key) is job:
+                del self._jobs[job.key]
+
+    def stats(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        counts = {}
+        for job in jobs:
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return counts
+
+
+manager = JobManager()
+
+
+def submit(kind, key, fn, *args, **kwargs):
+    return manager.submit(kind, key, fn, *args, **kwargs)
+
+
+def get(kind, key):
+    return manager.get(kind, key)
+
+
+def retry(job):
+    manager.retry(job)
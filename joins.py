@@ -0,0 +1,260 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+import instrumentation
+from spill import SpillStore
+
+# Joins estimated above this many output rows are refused outright
+MAX_OUTPUT_ROWS = 20_000_000
+# Results estimated above this many bytes are written to disk in chunks
+MAX_IN_MEMORY_BYTES = 512 * 1024 * 1024
+SPILL_CHUNK_ROWS = 250_000
+
+
+class JoinTooLargeError(ValueError):
+    pass
+
+
+class KeyProfile:
+    """Cardinality of one side's join key."""
+
+    def __init__(self, rows, distinct, max_multiplicity, null_keys, is_sorted):
+        self.rows = rows
+        self.distinct = distinct
+        self.max_multiplicity = max_multiplicity
+        self.null_keys = null_keys
+        self.is_sorted = is_sorted
+
+    def as_dict(self):
+        return dict(self.__dict__)
+
+
+class JoinResult:
+    def __init__(self, frame, strategy, estimated_rows, left_profile, right_profile, timings):
+        self.frame = frame  # DataFrame, or SpillStore when spilled
+        self.strategy = strategy
+        self.estimated_rows = estimated_rows
+        self.left_profile = left_profile
+        self.right_profile = right_profile
+        self.timings = timings
+
+    @property
+    def spilled(self):
+        return isinstance(self.frame, SpillStore)
+
+    def summary(self):
+        return {
+            "strategy": self.strategy,
+            "estimated_rows": self.estimated_rows,
+            "spilled_to_disk": self.spilled,
+            "left_key": self.left_profile.as_dict(),
+            "right_key": self.right_profile.as_dict(),
+            "timings_ms": {k: round(v * 1000, 1) for k, v in self.timings.items()},
+        }
+
+
+def _key_frame(df, on):
+    if on is None:
+        return df.index.to_frame(index=False)
+    return df[on]
+
+
+def _is_sorted(keys):
+    if keys.shape[1] == 1:
+        return pd.Index(keys.iloc[:, 0]).is_monotonic_increasing
+    return pd.MultiIndex.from_frame(keys).is_monotonic_increasing
+
+
+def _joint_codes(left_keys, right_keys, sort):
+    # Factorize both sides' keys together so equal keys get equal integer
+    # codes (NaN matches NaN, as in pd.merge). With sort=True the codes follow
+    # key order, which the sort-merge path relies on.
+    nleft = len(left_keys)
+    combined = None
+    for col in range(left_keys.shape[1]):
+        values = pd.concat([left_keys.iloc[:, col], right_keys.iloc[:, col]], ignore_index=True)
+        codes, uniques = pd.factorize(values, sort=sort, use_na_sentinel=False)
+        codes = codes.astype(np.int64)
+        if combined is None:
+            combined = codes
+        else:
+            # Re-factorized after every column, so the running code stays below
+            # the number of distinct key prefixes and the product can't wrap
+            combined, _ = pd.factorize(combined * len(uniques) + codes, sort=sort)
+            combined = combined.astype(np.int64)
+    ngroups = int(combined.max()) + 1 if len(combined) else 0
+    return combined[:nleft], combined[nleft:], ngroups
+
+
+def _profile(codes, counts, keys, is_sorted):
+    return KeyProfile(
+        rows=len(codes),
+        distinct=int((counts > 0).sum()),
+        max_multiplicity=int(counts.max()) if len(counts) else 0,
+        null_keys=int(keys.isna().any(axis=1).sum()),
+        is_sorted=bool(is_sorted),
+    )
+
+
+def _expand(probe_codes, starts, counts):
+    # For every probe row, the range [starts[c], starts[c] + counts[c]) of
+    # matching build positions; returns flat (probe_idx, build_pos) arrays
+    matches = counts[probe_codes]
+    total = int(matches.sum())
+    probe_idx = np.repeat(np.arange(len(probe_codes)), matches)
+    run_start = np.repeat(np.cumsum(matches) - matches, matches)
+    build_pos = np.repeat(starts[probe_codes], matches) + (np.arange(total) - run_start)
+    return probe_idx, build_pos
+
+
+def _hash_build(build_codes, ngroups):
+    # Bucket the build side by key code: per-key counts, offsets and the row
+    # order that lays each bucket out contiguously
+    counts = np.bincount(build_codes, minlength=ngroups)
+    starts = np.cumsum(counts) - counts
+    order = np.argsort(build_codes, kind="stable")
+    return counts, starts, order
+
+
+def _hash_probe(probe_codes, table):
+    counts, starts, order = table
+    probe_idx, build_pos = _expand(probe_codes, starts, counts)
+    return probe_idx, order[build_pos]
+
+
+def _sort_merge(build_codes, probe_codes):
+    # Both sides already sorted by key: ranges come from binary search, no
+    # hashing or reordering needed
+    lo = np.searchsorted(build_codes, probe_codes, side="left")
+    hi = np.searchsorted(build_codes, probe_codes, side="right")
+    return _expand(np.arange(len(probe_codes)), lo, hi - lo)
+
+
+def _take(df, idx):
+    # Row positions with -1 meaning "no match" (filled with NaN)
+    if len(idx) and idx.min() < 0:
+        return df.reset_index(drop=True).reindex(idx).reset_index(drop=True)
+    return df.take(idx).reset_index(drop=True)
+
+
+def _assemble(left, right, li, ri, on, suffixes):
+    lpart = _take(left, li)
+    if on is None:
+        rpart = _take(right, ri)
+        index = _take(left.index.to_frame(index=False), li)
+        rindex = _take(right.index.to_frame(index=False), ri)
+        index = index.where(li[:, None] >= 0, rindex.to_numpy())
+    else:
+        rpart = _take(right.drop(columns=on), ri)
+        # Keys of rows that exist only on the right come from the right side
+        if len(li) and li.min() < 0:
+            rkeys = _take(right[on], ri)
+            missing = li < 0
+            for col in on:
+                lpart.loc[missing, col] = rkeys.loc[missing, col].to_numpy()
+    overlap = lpart.columns.intersection(rpart.columns)
+    if len(overlap):
+        lpart = lpart.rename(columns={c: f"{c}{suffixes[0]}" for c in overlap})
+        rpart = rpart.rename(columns={c: f"{c}{suffixes[1]}" for c in overlap})
+    result = pd.concat([lpart, rpart], axis=1)
+    if on is None:
+        result.index = pd.MultiIndex.from_frame(index) if index.shape[1] > 1 else pd.Index(index.iloc[:, 0], name=left.index.name)
+    return result
+
+
+def _row_bytes(df):
+    return df.memory_usage(index=True, deep=True).sum() / max(len(df), 1)
+
+
+@instrumentation.traced("join")
+def join(left, right, on=None, how="inner", suffixes=("_x", "_y"),
+         max_rows=MAX_OUTPUT_ROWS, max_bytes=MAX_IN_MEMORY_BYTES, spill=True):
+    """Join ``left`` and ``right`` on the columns ``on`` (index when None).
+
+    Key cardinality is profiled first and the exact output size computed from
+    it, so many-to-many explosions are refused (``JoinTooLargeError``) before
+    any rows are materialised. Results too large for memory are written to a
+    ``SpillStore``. Pre-sorted keys use a sort-merge join, anything else a
+    hash join.
+    """
+    if isinstance(on, str):
+        on = [on]
+    timings = {}
+
+    start = time.perf_counter()
+    left_keys, right_keys = _key_frame(left, on), _key_frame(right, on)
+    left_sorted, right_sorted = _is_sorted(left_keys), _is_sorted(right_keys)
+    presorted = left_sorted and right_sorted
+    lcodes, rcodes, ngroups = _joint_codes(left_keys, right_keys, sort=presorted)
+    lcounts = np.bincount(lcodes, minlength=ngroups)
+    rcounts = np.bincount(rcodes, minlength=ngroups)
+    left_profile = _profile(lcodes, lcounts, left_keys, left_sorted)
+    right_profile = _profile(rcodes, rcounts, right_keys, right_sorted)
+
+    # Exact output size: every key contributes (left count) x (right count)
+    matched = int((lcounts * rcounts).sum())
+    left_only = int(lcounts[rcounts == 0].sum())
+    right_only = int(rcounts[lcounts == 0].sum())
+    estimated_rows = matched + {
+        "inner": 0, "left": left_only, "right": right_only, "outer": left_only + right_only,
+    }[how]
+    timings["profile"] = time.perf_counter() - start
+
+    if estimated_rows > max_rows:
+        raise JoinTooLargeError(
+            f"Join would produce {estimated_rows:,} rows (limit {max_rows:,}). "
+            f"Most repeated key: {left_profile.max_multiplicity:,} rows on the left, "
+            f"{right_profile.max_multiplicity:,} on the right."
+        )
+    estimated_bytes = estimated_rows * (_row_bytes(left) + _row_bytes(right))
+    if estimated_bytes > max_bytes and not spill:
+        raise JoinTooLargeError(
+            f"Join result is estimated at {estimated_bytes / 1e6:,.0f} MB (limit {max_bytes / 1e6:,.0f} MB)."
+        )
+
+    # The probe side is the one whose row order the output keeps
+    build_is_left = how == "right"
+    build_codes, probe_codes = (lcodes, rcodes) if build_is_left else (rcodes, lcodes)
+    start = time.perf_counter()
+    if presorted:
+        strategy = "sort-merge"
+        probe_idx, build_idx = _sort_merge(build_codes, probe_codes)
+        timings["build"] = 0.0
+    else:
+        strategy = "hash"
+        table = _hash_build(build_codes, ngroups)
+        timings["build"] = time.perf_counter() - start
+        start = time.perf_counter()
+        probe_idx, build_idx = _hash_probe(probe_codes, table)
+    li, ri = (build_idx, probe_idx) if build_is_left else (probe_idx, build_idx)
+
+    # Rows without a partner on the other side
+    if how in ("left", "outer"):
+        unmatched = np.flatnonzero(rcounts[lcodes] == 0)
+        li = np.concatenate([li, unmatched])
+        ri = np.concatenate([ri, np.full(len(unmatched), -1)])
+        if how == "left":
+            order = np.argsort(li, kind="stable")
+            li, ri = li[order], ri[order]
+    if how in ("right", "outer"):
+        unmatched = np.flatnonzero(lcounts[rcodes] == 0)
+        li = np.concatenate([li, np.full(len(unmatched), -1)])
+        ri = np.concatenate([ri, unmatched])
+        if how == "right":
+            order = np.argsort(ri, kind="stable")
+            li, ri = li[order], ri[order]
+    timings["probe"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if estimated_bytes > max_bytes:
+        frame = SpillStore(prefix="join-")
+        for lo in range(0, len(li), SPILL_CHUNK_ROWS):
+            hi = lo + SPILL_CHUNK_ROWS
+            frame.append(_assemble(left, right, li[lo:hi], ri[lo:hi], on, suffixes))
+    else:
+        frame = _assemble(left, right, li, ri, on, suffixes)
+    timings["materialize"] = time.perf_counter() - start
+
+    return JoinResult(frame, strategy, estimated_rows, left_profile, right_profile, timings)
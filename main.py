@@ -1,9 +1,22 @@
+import time
+_script_start = time.perf_counter()
+
+import importlib
+import sys
 import streamlit as st
 from streamlit_option_menu import option_menu
+import instrumentation
 st.set_page_config(layout="wide", page_title="DATA ANALYSIS",
         page_icon="📈📊",)
 
-import home , analysis , operations, introduction, Feature_Engineering, Skewness_OutlierDetection
+# Page modules are imported only when their page is first opened (see
+# MultiApp.load), so viewing Home does not pull in pandas/matplotlib/seaborn
+
+
+@st.cache_resource
+def startup_profile():
+    # Shared by every session for the life of the server process
+    return {"cold_start": None, "imports": {}, "first_render": {}}
 
 
 
@@ -23,16 +36,49 @@ st.markdown("""
 
 
 
+def show_trace(trace):
+    # This rerun's spans, recent charts, then the totals exported to the dashboards
+    st.write(f"**{trace.page}**: {trace.seconds * 1000:.0f} ms this run")
+    st.dataframe({"ms": {stage: round(seconds * 1000, 1) for stage, seconds in trace.stage_totals().items()}})
+    spans = trace.frame()
+    if not spans.empty:
+        spans["span"] = ["· " * depth + name + (f" ({detail})" if detail is not None else "")
+                         for depth, name, detail in zip(spans["depth"], spans["span"], spans.pop("detail"))]
+        spans["ms"] = (spans.pop("seconds") * 1000).round(1)
+        spans["RSS Δ MB"] = (spans.pop("rss_delta_bytes") / 2 ** 20).round(2)
+        st.dataframe(spans[["span", "stage", "ms", "RSS Δ MB", "payload_bytes"]], hide_index=True)
+    background = instrumentation.background_spans()
+    if not background.empty:
+        with st.expander("Background jobs"):
+            st.dataframe(background[["span", "detail", "seconds", "rss_delta_bytes"]].iloc[::-1], hide_index=True)
+    # Only once a page has drawn charts, so the panel doesn't import them
+    if "charts" in sys.modules:
+        charts = sys.modules["charts"].metrics()
+        if not charts.empty:
+            with st.expander("Charts (recent)"):
+                st.dataframe(charts.drop(columns=["time"]).iloc[::-1], hide_index=True)
+    with st.expander("All pages (totals)"):
+        st.dataframe(instrumentation.totals(), hide_index=True)
+
+
 class MultiApp:
     def __init__(self):
         self.app = []
 
-    def add_app(self, title, func):
+    def add_app(self, title, module):
         self.app.append({
             "title": title,
-            "function": func
+            "module": module
         })   
 
+    def load(self, module_name):
+        # Import a page module on first use and record how long it took
+        if module_name not in sys.modules:
+            start = time.perf_counter()
+            importlib.import_module(module_name)
+            startup_profile()["imports"][module_name] = time.perf_counter() - start
+        return sys.modules[module_name]
+
     def run(self):  # Need to include self as the first parameter
         with st.sidebar:
             st.markdown("""
@@ -52,7 +98,7 @@ class MultiApp:
             
             app = option_menu(
                 menu_title='Sections',
-                options=['Home','Introduction','Operation','Analysis📊📈','Feature Engineering','Skewness, Outliers, Kurtosis'],
+                options=[page["title"] for page in self.app],
                 default_index=0,
             )
             
@@ -61,22 +107,48 @@ class MultiApp:
             linkedin_url = "https://www.linkedin.com/in/deekshith2912/"
             linkedin_link = f"[ByteBuddies]({linkedin_url})"
             st.sidebar.subheader(f"Developed  by Deekshith B , Madhurika Priya, Dinesh")
-            
-        if app == "Home":
-            home.app()
-        elif app == "Introduction":
-            introduction.app()     
-        elif app == "Operation":
-            operations.app() 
-        elif app == "Analysis📊📈":
-            analysis.app() 
-        elif app == "Feature Engineering":
-            Feature_Engineering.app() 
-        elif app == "Skewness, Outliers, Kurtosis":
-            Skewness_OutlierDetection.app()
+
+        page = next(page for page in self.app if page["title"] == app)
+        module = self.load(page["module"])
+        start = time.perf_counter()
+        # Spans entered while the page runs (ingest, compute, render,
+        # serialize) are collected in this rerun's trace
+        trace = instrumentation.begin(app)
+        try:
+            module.app()
+        finally:
+            instrumentation.end(trace)
+        profile = startup_profile()
+        profile["first_render"].setdefault(app, time.perf_counter() - start)
+        if profile["cold_start"] is None:
+            profile["cold_start"] = time.perf_counter() - _script_start
+
+        with st.sidebar:
+            # Shared dataset cache counters (hits, misses, evictions, bytes);
+            # only once a page has loaded the dataset loader
+            if "data_loader" in sys.modules:
+                with st.sidebar.expander("Dataset cache"):
+                    st.json(sys.modules["data_loader"].cache_stats())
+
+            with st.sidebar.expander("Startup profile"):
+                st.write(f"Cold start: {profile['cold_start']:.2f}s")
+                st.write("Page module import (s):")
+                st.json({name: round(seconds, 3) for name, seconds in profile["imports"].items()})
+                st.write("First render per page (s):")
+                st.json({name: round(seconds, 3) for name, seconds in profile["first_render"].items()})
+
+            if st.sidebar.toggle("Profiling panel"):
+                show_trace(trace)
        
         
            
 
-# Create an instance of the MultiApp class and run the app
-MultiApp().run()
+# Create an instance of the MultiApp class, register the pages and run the app
+multi_app = MultiApp()
+multi_app.add_app("Home", "home")
+multi_app.add_app("Introduction", "introduction")
+multi_app.add_app("Operation", "operations")
+multi_app.add_app("Analysis📊📈", "analysis")
+multi_app.add_app("Feature Engineering", "Feature_Engineering")
+multi_app.add_app("Skewness, Outliers, Kurtosis", "Skewness_OutlierDetection")
+multi_app.run()
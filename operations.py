@@ -1,16 +1,23 @@
 import streamlit as st
 import pandas as pd
+import data_loader
+import ui_components
+import joins
+import out_of_core
 
 def upload_files():
     col1, col2, col4, col3 = st.columns([1, 1, 0.2, 1])  
     
     df1, df2 = None, None  # Initialize as None
+    keys = [None, None]  # what each dataset was read from, for caching results
     
     with col1:
         uploaded_file1 = st.file_uploader("Upload Excel File 1", type=["xlsx"], key="file1")
         
         if uploaded_file1 is not None:
-            df1 = pd.read_excel(uploaded_file1)
+            options = ui_components.excel_upload_options(uploaded_file1, key="file1")
+            df1 = data_loader.load_excel(uploaded_file1, **options)
+            keys[0] = data_loader.cache_key(uploaded_file1, "excel", options)
             st.write("**:orange[DataSet 1 Overview]**")
             st.write(f"Total Rows: {df1.shape[0]} || Total Columns: {df1.shape[1]}")
             st.dataframe(df1.head(16))  
@@ -19,7 +26,9 @@ def upload_files():
         uploaded_file2 = st.file_uploader("Upload Excel File 2", type=["xlsx"], key="file2")
         
         if uploaded_file2 is not None:
-            df2 = pd.read_excel(uploaded_file2)
+            options = ui_components.excel_upload_options(uploaded_file2, key="file2")
+            df2 = data_loader.load_excel(uploaded_file2, **options)
+            keys[1] = data_loader.cache_key(uploaded_file2, "excel", options)
             st.write("**:orange[DataSet 2 Overview]**")
             st.write(f"Total Rows: {df2.shape[0]} || Total Columns: {df2.shape[1]}")
             st.dataframe(df2.head(16))  
@@ -29,13 +38,35 @@ def upload_files():
         st.video("videos/Outer.mp4", autoplay=True, loop=True, muted=True)
         st.video("videos/Left.mp4", autoplay=True, loop=True, muted=True)
         
-    return df1, df2
+    return df1, df2, tuple(keys)
+
+def concat_columns(frames):
+    # Horizontal concatenation; columns present in both get _df1/_df2 suffixes
+    df1, df2 = frames
+    common_columns = df1.columns.intersection(df2.columns).tolist()
+    df1 = df1.rename(columns={col: f"{col}_df1" for col in common_columns})
+    df2 = df2.rename(columns={col: f"{col}_df2" for col in common_columns})
+    return pd.concat([df1, df2], axis=1)
+
+def show_join_result(title, result):
+    st.write(title)
+    if result.spilled:
+        st.info(f"The result has {result.frame.num_rows:,} rows and was written to disk.")
+    ui_components.paged_table(result.frame, key="join_result")
+    with st.expander("Join plan and timings"):
+        st.json(result.summary())
+
+def show_stored_result(title, store):
+    # Results kept on disk are previewed from the store, not loaded back
+    st.write(title)
+    st.write(f"Total Rows: {store.num_rows:,} || Stored on disk: {store.disk_bytes() / 1e6:,.1f} MB")
+    ui_components.paged_table(store, key="stored_result")
 
 def app():
     st.title("Walkthrough of Various Data Analysis Operations")
     
     # File upload and display overview in the same column
-    df1, df2 = upload_files()
+    df1, df2, keys = upload_files()
     
     # Proceed with operations if both datasets are uploaded
     if df1 is not None and df2 is not None:
@@ -43,6 +74,7 @@ def app():
         
         # Operations selection after files are uploaded
         operation = st.selectbox("Select Operation", ["Concatenate", "Merge", "Union", "Join", "Intersection"])
+        large_inputs = out_of_core.frames_nbytes([df1, df2]) > out_of_core.OUT_OF_CORE_BYTES
         
         if operation == "Concatenate":
             axis = st.selectbox("Select Axis", ["0 (Vertical)", "1 (Horizontal)"])
@@ -54,21 +86,22 @@ def app():
                 # Check for duplicate column names
                 common_columns = df1.columns.intersection(df2.columns).tolist()
                 if common_columns:
-                    # Add suffix to columns with the same name in both dataframes
-                    df1 = df1.rename(columns={col: f"{col}_df1" for col in common_columns})
-                    df2 = df2.rename(columns={col: f"{col}_df2" for col in common_columns})
                     st.warning(f"Duplicate columns found: {common_columns}. Suffixes added to make column names unique.")
                 
-                # Perform the horizontal concatenation after renaming duplicate columns
-                result = pd.concat([df1, df2], axis=axis)
+                # Suffixed and concatenated once per pair of inputs, not on every rerun
+                result = out_of_core.cached(concat_columns, keys, [df1, df2])
                 st.write("### Result of Horizontal Concatenation:")
-                st.dataframe(result)
+                ui_components.paged_table(result, key="result")
 
             elif axis == 0:  # Vertical Concatenation
-                # Perform vertical concatenation
-                result = pd.concat([df1, df2], axis=axis)
-                st.write("### Result of Vertical Concatenation:")
-                st.dataframe(result)
+                if st.checkbox("Out-of-core mode (write the result to disk)", value=large_inputs):
+                    store = out_of_core.cached(out_of_core.concat_to_disk, keys, [df1, df2])
+                    show_stored_result("### Result of Vertical Concatenation:", store)
+                else:
+                    # Perform vertical concatenation
+                    result = pd.concat([df1, df2], axis=axis)
+                    st.write("### Result of Vertical Concatenation:")
+                    ui_components.paged_table(result, key="result")
 
         elif operation == "Merge":
             st.write("### Merge Operation: You need at least one common column to merge.")
@@ -77,20 +110,25 @@ def app():
             
             if on_column:
                 try:
-                    result = pd.merge(df1, df2, how=how, on=on_column)
-                    st.write("### Result of Merge:")
-                    st.dataframe(result)
+                    result = joins.join(df1, df2, on=on_column, how=how)
+                    show_join_result("### Result of Merge:", result)
                 except KeyError:
                     st.error(f"Column '{on_column}' not found in both dataframes. Please provide valid column names.")
+                except joins.JoinTooLargeError as e:
+                    st.error(f"Merge refused: {str(e)}")
             else:
                 st.error("Please enter a column to merge on.")
 
         elif operation == "Union":
             st.write("### Union Operation: Combines both dataframes with the same columns, removing duplicates.")
             try:
-                result = pd.concat([df1, df2]).drop_duplicates()
-                st.write("### Result of Union:")
-                st.dataframe(result)
+                if st.checkbox("Out-of-core mode (deduplicate on disk)", value=large_inputs):
+                    store = out_of_core.cached(out_of_core.union_to_disk, keys, [df1, df2])
+                    show_stored_result("### Result of Union:", store)
+                else:
+                    result = pd.concat([df1, df2]).drop_duplicates()
+                    st.write("### Result of Union:")
+                    ui_components.paged_table(result, key="result")
             except Exception as e:
                 st.error(f"Error during Union operation: {str(e)}")
 
@@ -101,18 +139,19 @@ def app():
             suffix_right = st.text_input("Enter suffix for overlapping columns in the second dataframe (default: '_y')", value="_y")
 
             try:
-                result = df1.join(df2, how=how, lsuffix=suffix_left, rsuffix=suffix_right)
-                st.write("### Result of Join:")
-                st.dataframe(result)
+                result = joins.join(df1, df2, how=how, suffixes=(suffix_left, suffix_right))
+                show_join_result("### Result of Join:", result)
             except Exception as e:
                 st.error(f"Error during Join operation: {str(e)}")
 
         elif operation == "Intersection":
             st.write("### Intersection Operation: Returns only the rows with common index and columns in both dataframes.")
             try:
-                result = pd.merge(df1, df2, how="inner")
-                st.write("### Result of Intersection:")
-                st.dataframe(result)
+                common_columns = df1.columns.intersection(df2.columns).tolist()
+                if not common_columns:
+                    raise ValueError("The datasets have no columns in common.")
+                result = joins.join(df1, df2, on=common_columns, how="inner")
+                show_join_result("### Result of Intersection:", result)
             except Exception as e:
                 st.error(f"Error during Intersection operation: {str(e)}")
 
@@ -0,0 +1,81 @@
+import math
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+import instrumentation
+from spill import PartitionedSpillStore, SpillStore
+
+# Rows copied to disk per step, and the target size of one Union partition
+CHUNK_ROWS = 100_000
+PARTITION_BYTES = 64 * 1024 * 1024
+# Inputs larger than this together default to the out-of-core path in the UI
+OUT_OF_CORE_BYTES = 256 * 1024 * 1024
+# Recent results kept for reuse; an evicted store's files are removed once
+# nothing references it
+MAX_STORES = 8
+
+# (operation, input key) -> store or frame
+_stores = OrderedDict()
+_stores_lock = threading.Lock()
+
+
+def frames_nbytes(frames):
+    return sum(int(df.memory_usage(index=True, deep=True).sum()) for df in frames)
+
+
+def _aligned_chunks(frames, chunk_rows):
+    # Yield row chunks of every input, aligned to the columns and dtypes that
+    # pd.concat would give the combined frame
+    columns = frames[0].columns
+    for df in frames[1:]:
+        columns = columns.append(df.columns.difference(columns, sort=False))
+    dtypes = pd.concat([df.head(1) for df in frames]).reindex(columns=columns).dtypes
+    for df in frames:
+        for start in range(0, len(df), chunk_rows):
+            chunk = df.iloc[start:start + chunk_rows].reindex(columns=columns)
+            yield chunk.astype(dtypes.to_dict())
+
+
+@instrumentation.traced("concat_to_disk")
+def concat_to_disk(frames, chunk_rows=CHUNK_ROWS):
+    # Vertical concatenation without a combined in-memory copy
+    store = SpillStore(prefix="concat-")
+    for chunk in _aligned_chunks(frames, chunk_rows):
+        store.append(chunk.reset_index(drop=True))
+    return store
+
+
+@instrumentation.traced("union_to_disk")
+def union_to_disk(frames, chunk_rows=CHUNK_ROWS, partition_bytes=PARTITION_BYTES):
+    # Equivalent of pd.concat(frames).drop_duplicates(): rows are streamed into
+    # hash partitions and each partition is deduplicated on its own, so only
+    # one partition is ever in memory
+    partitions = max(1, math.ceil(frames_nbytes(frames) / partition_bytes))
+    store = PartitionedSpillStore(partitions, prefix="union-")
+    for chunk in _aligned_chunks(frames, chunk_rows):
+        store.append(chunk)
+    store.dedupe()
+    return store
+
+
+def cached(operation, key, frames):
+    """``operation(frames)``, reused while the inputs identified by ``key`` are unchanged.
+
+    ``operation`` is e.g. concat_to_disk or union_to_disk; page reruns with
+    the same inputs get the result already built (for the stores, already
+    on disk) instead of building a new one.
+    """
+    key = (operation.__name__, key)
+    with _stores_lock:
+        if key in _stores:
+            _stores.move_to_end(key)
+            return _stores[key]
+    store = operation(frames)
+    with _stores_lock:
+        store = _stores.setdefault(key, store)
+        _stores.move_to_end(key)
+        while len(_stores) > MAX_STORES:
+            _stores.popitem(last=False)
+    return store
@@ -0,0 +1,234 @@
+import warnings
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+import instrumentation
+from streaming import CoMomentAccumulator, MomentAccumulator, QuantileSketch
+
+# Rows compared against the fences at a time; only a (CHUNK_ROWS, columns)
+# mask exists at once, never one the size of the input
+CHUNK_ROWS = 65_536
+# Row indices kept per column for drill-down (counts are always exact)
+MAX_INDICES = 10_000
+MAD_SCALE = 1.4826  # MAD of a normal distribution -> standard deviation
+
+METHODS = {
+    "iqr": ("IQR fences", 1.5),
+    "mad": ("Median absolute deviation", 3.5),
+    "zscore": ("Z-score", 3.0),
+    "mahalanobis": ("Mahalanobis distance (multivariate)", 0.975),
+}
+MULTIVARIATE = "All columns"
+
+
+class OutlierResult:
+    """Outlier counts and row positions from one detection run.
+
+    ``lower``/``upper`` are the per-column fences (None for Mahalanobis,
+    whose single fence is ``distance_threshold``). ``indices`` maps each
+    column to the positions of its outlier rows, at most ``max_indices``
+    per column; ``truncated`` lists the columns where that cap was hit.
+    """
+
+    def __init__(self, method, columns, lower=None, upper=None, distance_threshold=None, max_indices=MAX_INDICES):
+        self.method = method
+        self.columns = list(columns)
+        self.lower = lower
+        self.upper = upper
+        self.distance_threshold = distance_threshold
+        self.max_indices = max_indices
+        self.counts = pd.Series(0, index=self.columns, dtype="int64")
+        self._indices = {col: [] for col in self.columns}
+        self._kept = dict.fromkeys(self.columns, 0)
+        self.rows = 0
+
+    def _add(self, mask, offset):
+        # mask: (chunk rows, columns) booleans for rows offset.. of the input
+        self.counts += mask.sum(axis=0)
+        for i, col in enumerate(self.columns):
+            room = self.max_indices - self._kept[col]
+            if room > 0:
+                hits = np.flatnonzero(mask[:, i])[:room]
+                if hits.size:
+                    self._indices[col].append(hits + offset)
+                    self._kept[col] += hits.size
+
+    @property
+    def indices(self):
+        return {col: np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+                for col, parts in self._indices.items()}
+
+    @property
+    def truncated(self):
+        return [col for col in self.columns if self.counts[col] > self._kept[col]]
+
+    def rows_of(self, df, column):
+        # Drill-down: the outlier rows of ``column`` (by position in ``df``)
+        return df.iloc[self.indices[column]]
+
+    def fences(self):
+        if self.lower is None:
+            return pd.DataFrame({"Max distance²": [self.distance_threshold]}, index=[MULTIVARIATE])
+        return pd.DataFrame({"Lower fence": self.lower, "Upper fence": self.upper})
+
+
+def _blocks(data, chunk_rows=CHUNK_ROWS):
+    # Numeric row blocks from a 2-D array or an iterable of DataFrame chunks
+    if isinstance(data, np.ndarray):
+        for start in range(0, len(data), chunk_rows):
+            yield data[start:start + chunk_rows]
+    else:
+        for chunk in data:
+            yield _as_float(chunk)
+
+
+def _as_float(frame):
+    return frame.apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+
+
+def _numeric(df):
+    return df.select_dtypes(include=[np.number])
+
+
+def chi2_quantile(p, dof):
+    # Wilson-Hilferty approximation; accurate to ~1% for the tail
+    # probabilities used here, without needing scipy
+    z = NormalDist().inv_cdf(p)
+    return dof * (1 - 2 / (9 * dof) + z * np.sqrt(2 / (9 * dof))) ** 3
+
+
+def _sketches(blocks, ncols, transform=None):
+    sketches = [QuantileSketch(seed=i) for i in range(ncols)]
+    for block in blocks:
+        if transform is not None:
+            block = transform(block)
+        for i, sketch in enumerate(sketches):
+            sketch.update(block[:, i])
+    return sketches
+
+
+def fences(make_blocks, columns, method="iqr", threshold=None, sketches=None, moments=None):
+    """(lower, upper) Series for a univariate method.
+
+    ``make_blocks()`` returns a fresh iterator of numeric row blocks; it is
+    consumed once for the quartile / median sketches (unless ``sketches`` or
+    ``moments`` from an earlier pass are given) and once more for the MAD.
+    """
+    threshold = METHODS[method][1] if threshold is None else threshold
+    ncols = len(columns)
+    if method == "zscore":
+        if moments is None:
+            moments = MomentAccumulator(ncols)
+            for block in make_blocks():
+                moments.update(block)
+        centre = moments.mean
+        spread = np.sqrt(moments.variance())
+    else:
+        if sketches is None:
+            sketches = _sketches(make_blocks(), ncols)
+        if method == "iqr":
+            q1 = np.array([s.quantile(0.25) for s in sketches])
+            q3 = np.array([s.quantile(0.75) for s in sketches])
+            iqr = q3 - q1
+            return pd.Series(q1 - threshold * iqr, index=columns), pd.Series(q3 + threshold * iqr, index=columns)
+        centre = np.array([s.quantile(0.5) for s in sketches])
+        deviations = _sketches(make_blocks(), ncols, transform=lambda block: np.abs(block - centre))
+        spread = MAD_SCALE * np.array([s.quantile(0.5) for s in deviations])
+    return (pd.Series(centre - threshold * spread, index=columns),
+            pd.Series(centre + threshold * spread, index=columns))
+
+
+def scan(blocks, result):
+    # Count (and index) values outside the fences, block by block; ``blocks``
+    # may be a 2-D array or an iterable of numeric DataFrame chunks
+    if isinstance(blocks, np.ndarray):
+        blocks = _blocks(blocks)
+    lower, upper = result.lower.to_numpy(), result.upper.to_numpy()
+    offset = 0
+    for block in blocks:
+        result._add((block < lower) | (block > upper), offset)
+        offset += len(block)
+    result.rows = offset
+    return result
+
+
+def count_outside(values, lower, upper, chunk_rows=CHUNK_ROWS):
+    # Counts only, for callers that already have the fences as arrays
+    columns = range(values.shape[1])
+    result = OutlierResult("fences", columns, pd.Series(lower, index=columns), pd.Series(upper, index=columns),
+                           max_indices=0)
+    return scan(_blocks(values, chunk_rows), result).counts.to_numpy()
+
+
+def mahalanobis(make_blocks, columns, confidence=0.975, comoments=None, max_indices=MAX_INDICES):
+    """Rows whose squared Mahalanobis distance exceeds the chi-square quantile.
+
+    Mean and covariance come from the pairwise co-moment sums (pass
+    ``comoments`` to reuse those of an earlier pass); rows with any missing
+    value are not scored.
+    """
+    ncols = len(columns)
+    if not ncols:
+        # Nothing to score: an empty result, as the univariate methods give
+        result = OutlierResult("mahalanobis", [], max_indices=max_indices)
+        result.rows = sum(len(block) for block in make_blocks())
+        return result
+    if comoments is None:
+        for block in make_blocks():
+            if comoments is None:
+                # Sums are kept around the first block's means to limit cancellation
+                with np.errstate(invalid="ignore"), warnings.catch_warnings():
+                    warnings.simplefilter("ignore", RuntimeWarning)
+                    comoments = CoMomentAccumulator(ncols, np.nan_to_num(np.nanmean(block, axis=0)))
+            comoments.update(block)
+        if comoments is None:
+            comoments = CoMomentAccumulator(ncols)
+    n = np.diag(comoments.n)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = comoments.shift + np.diag(comoments.s) / n
+    covariance = np.nan_to_num(comoments.covariance())
+    inverse = np.linalg.pinv(covariance)
+    threshold = chi2_quantile(confidence, ncols)
+    result = OutlierResult("mahalanobis", [MULTIVARIATE], distance_threshold=threshold, max_indices=max_indices)
+    offset = 0
+    for block in make_blocks():
+        centred = block - mean
+        distance = np.einsum("ij,jk,ik->i", centred, inverse, centred)
+        # NaN distances (incomplete rows) compare False
+        result._add((distance > threshold)[:, None], offset)
+        offset += len(block)
+    result.rows = offset
+    return result
+
+
+@instrumentation.traced("outliers.detect")
+def detect(data, method="iqr", threshold=None, chunk_rows=CHUNK_ROWS, max_indices=MAX_INDICES):
+    """Outliers of the numeric columns of ``data`` in linear time.
+
+    ``data`` is a DataFrame, or a zero-argument callable returning an
+    iterator of DataFrame chunks (so streamed files can be read again for
+    each pass). ``threshold`` is the fence multiplier (IQR, MAD, z-score) or
+    the chi-square confidence level (Mahalanobis).
+    """
+    if callable(data):
+        first = next(iter(data()), None)
+        columns = list(_numeric(first).columns) if first is not None else []
+
+        def make_blocks():
+            return _blocks((chunk.reindex(columns=columns) for chunk in data()), chunk_rows)
+    else:
+        numeric = _numeric(data)
+        columns = list(numeric.columns)
+        values = numeric.to_numpy(dtype=float, na_value=np.nan)
+
+        def make_blocks():
+            return _blocks(values, chunk_rows)
+
+    if method == "mahalanobis":
+        threshold = METHODS[method][1] if threshold is None else threshold
+        return mahalanobis(make_blocks, columns, threshold, max_indices=max_indices)
+    lower, upper = fences(make_blocks, columns, method, threshold)
+    result = OutlierResult(method, columns, lower, upper, max_indices=max_indices)
+    return scan(make_blocks(), result)
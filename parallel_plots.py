@@ -0,0 +1,69 @@
+import io
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+import seaborn as sns
+from matplotlib.figure import Figure
+
+# Same look as the rest of the app (analysis.py sets this in the main process)
+sns.set(style="whitegrid")
+
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+# Size of the shared pool; each call limits how many of its plots run at once
+POOL_WORKERS = os.cpu_count() or 1
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    # One pool per process, shared by every session and sized once, so no
+    # session's setting can shut down work another session submitted.
+    # Workers are spawned rather than forked because the Streamlit server
+    # process is multi-threaded.
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(POOL_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def render_histogram(column, values, bins=20, color='blue'):
+    # Runs in a worker process: its own Figure, no pyplot state
+    start = time.perf_counter()
+    fig = Figure(figsize=(6, 4))
+    ax = fig.subplots()
+    sns.histplot(values, kde=True, bins=bins, color=color, ax=ax)
+    ax.set_title(f"Distribution of {column}")
+    ax.set_xlabel(column)
+    ax.set_ylabel("Frequency")
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", bbox_inches="tight")
+    return column, buffer.getvalue(), time.perf_counter() - start
+
+
+def render_histograms(numeric_data, max_workers=DEFAULT_WORKERS, **kwargs):
+    # Yields (column, png, seconds) in completion order, with at most
+    # ``max_workers`` of this call's plots in the shared pool at a time
+    jobs = {col: numeric_data[col].to_numpy(dtype=float, na_value=np.nan) for col in numeric_data.columns}
+    if max_workers <= 1:
+        for col, values in jobs.items():
+            yield render_histogram(col, values, **kwargs)
+        return
+    pool = get_pool()
+    waiting = iter(jobs.items())
+    running = set()
+    while True:
+        for col, values in waiting:
+            running.add(pool.submit(render_histogram, col, values, **kwargs))
+            if len(running) >= max_workers:
+                break
+        if not running:
+            return
+        done, running = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+            yield future.result()
@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+
+import instrumentation
+import outliers
+from streaming import MomentAccumulator
+
+# Quantiles computed for every numeric column (describe() reports these three)
+PROFILE_QUANTILES = (0.25, 0.5, 0.75)
+
+
+class NumericProfile:
+    """Per-column statistics of a dataset's numeric block.
+
+    Every page renders its tables from one of these instead of calling
+    ``skew()``, ``kurt()``, ``quantile()``, ``isnull()`` and ``describe()``
+    separately, each of which is another full pass over the data.
+    """
+
+    def __init__(self, columns, count, mean, std, minimum, maximum, quantiles,
+                 skewness, kurtosis, outliers, null_counts, whisker=1.5):
+        self.columns = list(columns)
+        self.count = count
+        self.mean = mean
+        self.std = std
+        self.min = minimum
+        self.max = maximum
+        self.quantiles = quantiles  # {q: array}
+        self.skewness = skewness
+        self.kurtosis = kurtosis
+        self.outliers = outliers
+        self.null_counts = null_counts  # Series over all columns
+        self.whisker = whisker
+
+    def _series(self, values, name=None):
+        return pd.Series(values, index=self.columns, name=name)
+
+    def quantile(self, q):
+        return self._series(self.quantiles[q])
+
+    def iqr_bounds(self):
+        q1, q3 = self.quantiles[0.25], self.quantiles[0.75]
+        iqr = q3 - q1
+        return self._series(q1 - self.whisker * iqr), self._series(q3 + self.whisker * iqr)
+
+    def skew_kurt_table(self):
+        return pd.DataFrame({"Skewness": self.skewness, "Kurtosis": self.kurtosis}, index=self.columns)
+
+    def outlier_counts(self):
+        return self._series(self.outliers)
+
+    def describe(self):
+        # Same layout as DataFrame.describe() for numeric columns
+        rows = {"count": self.count, "mean": self.mean, "std": self.std, "min": self.min}
+        for q in PROFILE_QUANTILES:
+            rows[f"{q:.0%}"] = self.quantiles[q]
+        rows["max"] = self.max
+        return pd.DataFrame(rows, index=self.columns).T
+
+
+def _partition_quantiles(block, n, quantiles):
+    # Quantiles (linear interpolation, like pandas) of columns that all have
+    # ``n`` valid values; NaNs sort last so the first ``n`` rows hold the data
+    positions = [q * (n - 1) for q in quantiles]
+    kth = sorted({0, n - 1} | {int(np.floor(p)) for p in positions} | {int(np.ceil(p)) for p in positions})
+    part = np.partition(block, kth, axis=0)
+    out = {}
+    for q, pos in zip(quantiles, positions):
+        lo, hi = int(np.floor(pos)), int(np.ceil(pos))
+        out[q] = part[lo] + (part[hi] - part[lo]) * (pos - lo)
+    return out, part[0], part[n - 1]
+
+
+@instrumentation.traced("profile_frame")
+def profile_frame(df, quantiles=PROFILE_QUANTILES, whisker=1.5):
+    numeric = df.select_dtypes(include=[np.number])
+    columns = numeric.columns
+    # The numeric block is materialised once as a single (rows, columns) array
+    values = numeric.to_numpy(dtype=float, na_value=np.nan)
+    ncols = values.shape[1]
+
+    moments = MomentAccumulator.from_array(values)
+    count = moments.n.astype(int)
+
+    quantiles = tuple(sorted(set(quantiles) | {0.25, 0.75}))
+    qvals = {q: np.full(ncols, np.nan) for q in quantiles}
+    minimum = np.full(ncols, np.nan)
+    maximum = np.full(ncols, np.nan)
+    # Columns with the same number of valid values are partitioned together
+    for n in np.unique(count):
+        if n == 0:
+            continue
+        idx = np.flatnonzero(count == n)
+        block = values if len(idx) == ncols else values[:, idx]
+        out, lo, hi = _partition_quantiles(block, int(n), quantiles)
+        for q in quantiles:
+            qvals[q][idx] = out[q]
+        minimum[idx], maximum[idx] = lo, hi
+
+    iqr = qvals[0.75] - qvals[0.25]
+    lower = qvals[0.25] - whisker * iqr
+    upper = qvals[0.75] + whisker * iqr
+    # Counted block by block, without a mask the size of the data
+    outlier_counts = outliers.count_outside(values, lower, upper)
+
+    null_counts = pd.Series(0, index=df.columns, dtype="int64")
+    null_counts[columns] = len(df) - count
+    for col in df.columns.difference(columns, sort=False):
+        null_counts[col] = int(df[col].isna().sum())
+
+    return NumericProfile(
+        columns, count, moments.mean, np.sqrt(moments.variance()), minimum, maximum, qvals,
+        moments.skewness(), moments.kurtosis(), outlier_counts, null_counts, whisker,
+    )
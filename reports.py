@@ -0,0 +1,191 @@
+import io
+
+import numpy as np
+import seaborn as sns
+from matplotlib.figure import Figure
+
+import correlation
+import fast_plots
+import feature_engine
+import instrumentation
+import jobs
+import outliers
+import parallel_plots
+import profiling
+import streaming
+
+# The computations and figures behind the Feature Engineering and Skewness
+# pages, without Streamlit: the pages display these and batch.py writes them
+# to files. Figures use the Figure API, so they are safe in job threads and
+# worker processes.
+
+# Derived metrics: Cases and Deaths per 100k population
+DERIVED_FEATURES = (
+    feature_engine.per_capita('Cases per 100k Population', 'Total Cases', 'Population'),
+    feature_engine.per_capita('Deaths per 100k Population', 'Deaths', 'Population'),
+)
+# Number of strongest column pairs listed under the matrix
+TOP_PAIRS = 10
+BOXPLOT_COLUMNS = ['Total Cases', 'Active', 'Discharged', 'Deaths', 'Active Ratio', 'Discharge Ratio',
+                   'Death Ratio', 'Population']
+# Right-skewed counts shown again after log1p
+LOG_COLUMNS = ['Total Cases', 'Deaths', 'Population']
+
+
+def figure_png(fig, name):
+    with instrumentation.span(f"{name} png", "serialize") as span:
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="png", bbox_inches="tight")
+        span.payload_bytes = buffer.tell()
+    return buffer.getvalue()
+
+
+def add_derived_features(covid_data):
+    return feature_engine.apply(covid_data, DERIVED_FEATURES)[0]
+
+
+def render_heatmap(correlation_matrix):
+    # Figure API rather than pyplot, so it is safe to run in a job thread.
+    # Wide matrices are drawn without per-cell annotations
+    with instrumentation.span("heatmap", "render"):
+        fig = Figure(figsize=(10, 6))
+        ax = fig.subplots()
+        fast_plots.correlation_heatmap(
+            ax,
+            correlation_matrix,
+            fmt=".2f",
+            cmap="coolwarm",
+            cbar=True,
+            square=True,
+            linewidths=0.5,
+            xticklabels=correlation_matrix.columns,
+            yticklabels=correlation_matrix.columns,
+        )
+    return figure_png(fig, "heatmap")
+
+
+def finish_report(correlation_matrix, clustered):
+    if clustered:
+        jobs.report_progress(0.5, "Clustering columns")
+        correlation_matrix = correlation.reorder(correlation_matrix, correlation.cluster_order(correlation_matrix))
+    jobs.report_progress(0.6, "Rendering heatmap")
+    return correlation_matrix, render_heatmap(correlation_matrix)
+
+
+def correlation_report(covid_data, clustered=False):
+    # Background job: correlation matrix (blocked float32 products over the
+    # numeric columns) and its heatmap
+    jobs.report_progress(0.1, "Computing correlations")
+    return finish_report(correlation.correlation_matrix(covid_data), clustered)
+
+
+def _read_progress(buffer, start, end):
+    # on_chunk callback reporting the bytes of ``buffer`` read so far as
+    # progress between ``start`` and ``end``
+    size = max(len(buffer.getvalue()), 1)
+
+    def report(rows):
+        jobs.report_progress(start + (end - start) * buffer.tell() / size, f"{rows:,} rows processed")
+    return report
+
+
+def streaming_correlation_report(data, clustered=False):
+    # Background job: read the CSV chunk by chunk; only the accumulators stay in memory
+    buffer = io.BytesIO(data)
+    stats, head = streaming.stream_stats(
+        streaming.iter_csv_chunks(buffer), transform=add_derived_features,
+        on_chunk=_read_progress(buffer, 0.0, 0.5),
+    )
+    return (*finish_report(stats.correlation(), clustered), head, stats.rows)
+
+
+def streaming_profile(data):
+    # Background job for the bounded-memory report: one pass for moments and
+    # quartile sketches, a second pass to count values outside the IQR fences
+    buffer = io.BytesIO(data)
+    stats, head = streaming.stream_stats(streaming.iter_csv_chunks(buffer), on_chunk=_read_progress(buffer, 0.0, 0.5))
+    lower_bound, upper_bound = stats.iqr_bounds()
+    progress = _read_progress(buffer, 0.5, 1.0)
+
+    def chunks():
+        rows = 0
+        for chunk in streaming.iter_csv_chunks(buffer):
+            yield chunk.reindex(columns=stats.columns)
+            rows += len(chunk)
+            progress(rows)
+    outlier_counts = outliers.scan(
+        chunks(), outliers.OutlierResult("iqr", stats.columns, lower_bound, upper_bound, max_indices=0)
+    ).counts
+    return stats.skew_kurt_table(), outlier_counts, head, stats.rows
+
+
+def skewness_table_file(stats):
+    # The skewness/kurtosis table as downloaded: one row per feature
+    return stats.reset_index().rename(columns={"index": "Feature"})
+
+
+def boxplot(numeric_data, columns, title, ylabel, name="boxplot"):
+    # Horizontal boxplots of ``columns`` (those present) as PNG bytes
+    columns = [col for col in columns if col in numeric_data.columns]
+    with instrumentation.span(name, "render"):
+        fig = Figure(figsize=(6, 4))
+        ax = fig.subplots()
+        sns.boxplot(data=numeric_data[columns], orient="h", palette="Set2", ax=ax)
+        ax.set_title(title)
+        ax.set_xlabel("Features")
+        ax.set_ylabel(ylabel)
+    return figure_png(fig, name)
+
+
+def log_columns(numeric_data):
+    # log1p of the skewed count columns present, as log_<column>
+    return numeric_data.assign(**{f"log_{col}": np.log1p(numeric_data[col])
+                                  for col in LOG_COLUMNS if col in numeric_data.columns})
+
+
+def boxplots(numeric_data):
+    """(original, log-transformed) boxplot PNGs of the skewness page."""
+    logged = log_columns(numeric_data)
+    return (
+        boxplot(numeric_data, BOXPLOT_COLUMNS, "Boxplot of Original Numerical Features", "Values"),
+        boxplot(logged, [f"log_{col}" for col in LOG_COLUMNS], "Boxplot of Log-Transformed Numerical Features",
+                "Log-Transformed Values", name="log boxplot"),
+    )
+
+
+def skewness_report(data):
+    """Everything the skewness page shows for ``data``, computed in process.
+
+    Returns {file name: DataFrame or PNG bytes}, named as the page's
+    downloads and figures.
+    """
+    profile = profiling.profile_frame(data)
+    numeric_data = data.select_dtypes(include=[np.number])
+    outputs = {
+        "skewness_kurtosis_report.csv": skewness_table_file(profile.skew_kurt_table()),
+        "iqr_outliers.csv": profile.outlier_counts().rename("Outliers").rename_axis("Feature").reset_index(),
+    }
+    # One process per file already; histograms are drawn in it
+    with instrumentation.span("histograms", "render"):
+        for column, png, _ in parallel_plots.render_histograms(numeric_data, max_workers=1):
+            outputs[f"histogram_{column}.png"] = png
+    outputs["boxplot.png"], outputs["boxplot_log.png"] = boxplots(numeric_data)
+    return outputs
+
+
+def feature_report(covid_data, clustered=False):
+    """The feature engineering page's outputs for ``covid_data``."""
+    covid_data = add_derived_features(covid_data)
+    matrix, heatmap = correlation_report(covid_data, clustered)
+    return {
+        "Updated_Covid_Data.csv": covid_data,
+        "correlation_matrix.csv": matrix.rename_axis("Feature").reset_index(),
+        "top_correlations.csv": correlation.top_pairs(matrix, TOP_PAIRS),
+        "correlation_heatmap.png": heatmap,
+    }
+
+
+REPORTS = {
+    "skewness": skewness_report,
+    "features": feature_report,
+}
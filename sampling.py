@@ -0,0 +1,145 @@
+import numpy as np
+import pandas as pd
+
+import data_loader
+import instrumentation
+import profiling
+from streaming import MomentAccumulator
+
+# Fast preview: exploratory plots and statistics are computed on a stratified
+# sample of this many rows, drawn once per uploaded file
+PREVIEW_ROWS = 20_000
+# A column is used for stratification when it has at most this many values
+MAX_STRATA = 200
+CONFIDENCE_Z = 1.96  # 95% normal interval
+JACKKNIFE_GROUPS = 20
+
+# file digest -> PreviewSample, shared by every page and session
+sample_cache = data_loader.MemoryLRUCache(max_bytes=256 * 1024 * 1024,
+                                          sizeof=lambda sample: data_loader.frame_nbytes(sample.frame))
+
+
+def strata_column(df):
+    # First categorical/string column with few enough distinct values
+    for col in df.select_dtypes(include=["object", "category", "string"]).columns:
+        if df[col].nunique(dropna=False) <= MAX_STRATA:
+            return col
+    return None
+
+
+def _jackknife_moments(values, groups=JACKKNIFE_GROUPS, seed=0):
+    # Delete-a-group jackknife standard errors of skewness and kurtosis; the
+    # textbook normal-theory errors are far too narrow for heavy tails
+    labels = np.random.default_rng(seed).integers(groups, size=len(values))
+    parts = [MomentAccumulator.from_array(values[labels == g]) for g in range(groups)]
+    skew, kurt = [], []
+    for g in range(groups):
+        acc = MomentAccumulator(values.shape[1])
+        for other in parts[:g] + parts[g + 1:]:
+            acc.merge(other)
+        skew.append(acc.skewness())
+        kurt.append(acc.kurtosis())
+    scale = np.sqrt((groups - 1) / groups)
+    with np.errstate(invalid="ignore"):
+        return (scale * np.sqrt(((np.array(skew) - np.mean(skew, axis=0)) ** 2).sum(axis=0)),
+                scale * np.sqrt(((np.array(kurt) - np.mean(kurt, axis=0)) ** 2).sum(axis=0)))
+
+
+def stratified_positions(strata, size, seed=0):
+    """Row positions of a proportionally allocated stratified sample.
+
+    Every row gets a random key and each stratum keeps the rows with the
+    smallest keys (bottom-k, which is what a reservoir sample of that stratum
+    holds), so the whole sample is one sort instead of a pass per stratum.
+    """
+    n = len(strata)
+    if size >= n:
+        return np.arange(n)
+    codes, uniques = pd.factorize(strata, use_na_sentinel=False)
+    counts = np.bincount(codes, minlength=len(uniques))
+    # Proportional allocation, at least one row from every stratum
+    quota = np.minimum(counts, np.maximum(1, np.round(size * counts / n).astype(int)))
+    keys = np.random.default_rng(seed).random(n)
+    order = np.lexsort((keys, codes))
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    rank = np.arange(n) - starts[codes[order]]
+    return np.sort(order[rank < quota[codes[order]]])
+
+
+class PreviewSample:
+    """A stratified sample of a dataset plus the population size it stands for."""
+
+    def __init__(self, frame, population_rows, strata=None):
+        self.frame = frame
+        self.population_rows = population_rows
+        self.strata = strata
+
+    @property
+    def rows(self):
+        return len(self.frame)
+
+    @property
+    def fraction(self):
+        return self.rows / self.population_rows if self.population_rows else 1.0
+
+    def profile(self):
+        return profiling.profile_frame(self.frame)
+
+    def bounds(self, profile=None, z=CONFIDENCE_Z):
+        """Estimates with confidence bounds for every numeric column.
+
+        Means use the normal interval with the finite-population correction,
+        the median a distribution-free order-statistic interval, skewness and
+        kurtosis delete-a-group jackknife errors, and outlier counts the
+        binomial interval of the sampled share scaled to the full row count.
+        """
+        profile = profile or self.profile()
+        numeric = self.frame[profile.columns].to_numpy(dtype=float, na_value=np.nan)
+        n = profile.count.astype(float)
+        fpc = np.sqrt(max(0.0, 1.0 - self.fraction))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean_half = z * profile.std / np.sqrt(n) * fpc
+            # Order statistics bracketing the median
+            lo_rank = np.floor(n / 2 - z * np.sqrt(n) / 2).clip(0)
+            hi_rank = np.ceil(n / 2 + z * np.sqrt(n) / 2)
+            share = profile.outliers / n
+            share_half = z * np.sqrt(share * (1 - share) / n) * fpc
+        ses, sek = _jackknife_moments(numeric)
+        sorted_values = np.sort(numeric, axis=0)  # NaNs sort last
+        median_lo = np.full(len(n), np.nan)
+        median_hi = np.full(len(n), np.nan)
+        for i, count in enumerate(n.astype(int)):
+            if count:
+                median_lo[i] = sorted_values[int(min(lo_rank[i], count - 1)), i]
+                median_hi[i] = sorted_values[int(min(hi_rank[i], count - 1)), i]
+        rows = self.population_rows
+        return pd.DataFrame({
+            "Mean": profile.mean,
+            "Mean ±": mean_half,
+            "Median low": median_lo,
+            "Median high": median_hi,
+            "Skewness": profile.skewness,
+            "Skewness ±": z * ses,
+            "Kurtosis": profile.kurtosis,
+            "Kurtosis ±": z * sek,
+            "Outliers (est.)": np.round(share * rows),
+            "Outliers low": np.round(np.clip(share - share_half, 0, 1) * rows),
+            "Outliers high": np.round(np.clip(share + share_half, 0, 1) * rows),
+        }, index=profile.columns)
+
+
+@instrumentation.traced("build_sample")
+def build_sample(df, size=PREVIEW_ROWS, seed=0):
+    strata = strata_column(df)
+    labels = df[strata] if strata is not None else np.zeros(len(df), dtype=int)
+    positions = stratified_positions(labels, size, seed)
+    return PreviewSample(df.iloc[positions], len(df), strata)
+
+
+def preview_sample(uploaded_file, df, size=PREVIEW_ROWS):
+    # Drawn once per file (and sample size), then reused by every page
+    key = (data_loader.file_digest(uploaded_file), size)
+    sample = sample_cache.get(key)
+    if sample is None:
+        sample = sample_cache.put(key, build_sample(df, size))
+    return sample
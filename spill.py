@@ -0,0 +1,186 @@
+import bisect
+import os
+import shutil
+import tempfile
+import weakref
+
+import numpy as np
+import pandas as pd
+
+# Where oversized intermediate results are written
+SPILL_DIR = os.environ.get("SPILL_DIR", tempfile.gettempdir())
+
+
+class SpillStore:
+    """A DataFrame kept on disk as a sequence of row-chunk files.
+
+    Only the chunks that are being read are held in memory. The directory is
+    removed when the store is garbage collected or ``cleanup()`` is called.
+    """
+
+    def __init__(self, prefix="spill-"):
+        self.directory = tempfile.mkdtemp(prefix=prefix, dir=SPILL_DIR)
+        self.parts = []      # file paths, in row order
+        self.offsets = [0]   # offsets[i] is the first row of part i
+        self.columns = None
+        self._finalizer = weakref.finalize(self, shutil.rmtree, self.directory, ignore_errors=True)
+
+    def append(self, df):
+        if len(df) == 0 and self.columns is not None:
+            return
+        if self.columns is None:
+            self.columns = list(df.columns)
+        path = os.path.join(self.directory, f"part-{len(self.parts):05d}.pkl")
+        df.to_pickle(path)
+        self.parts.append(path)
+        self.offsets.append(self.offsets[-1] + len(df))
+
+    @property
+    def num_rows(self):
+        return self.offsets[-1]
+
+    def __len__(self):
+        return self.num_rows
+
+    @property
+    def shape(self):
+        return self.num_rows, len(self.columns or [])
+
+    def disk_bytes(self):
+        return sum(os.path.getsize(path) for path in self.parts)
+
+    def read_part(self, i):
+        return pd.read_pickle(self.parts[i])
+
+    def iter_parts(self):
+        for i in range(len(self.parts)):
+            yield self.read_part(i)
+
+    def read_slice(self, start, stop):
+        # Rows [start, stop), reading only the parts that overlap the range
+        stop = min(stop, self.num_rows)
+        if start >= stop:
+            return pd.DataFrame(columns=self.columns)
+        first = bisect.bisect_right(self.offsets, start) - 1
+        frames = []
+        for i in range(first, len(self.parts)):
+            if self.offsets[i] >= stop:
+                break
+            part = self.read_part(i)
+            lo = max(start - self.offsets[i], 0)
+            hi = min(stop - self.offsets[i], len(part))
+            frames.append(part.iloc[lo:hi])
+        return pd.concat(frames)
+
+    def head(self, n=5):
+        return self.read_slice(0, n)
+
+    def to_frame(self):
+        return pd.concat(self.iter_parts()) if self.parts else pd.DataFrame(columns=self.columns)
+
+    def cleanup(self):
+        self._finalizer()
+
+
+class PartitionedSpillStore:
+    """Rows hash-partitioned across several on-disk stores.
+
+    Every row carries its global position (``ROW_COLUMN``) and a 64-bit row
+    hash (``HASH_COLUMN``); equal rows always land in the same partition, so
+    duplicates can be found one partition at a time. Reads come back in
+    global row order.
+    """
+
+    ROW_COLUMN = "__row"
+    HASH_COLUMN = "__hash"
+
+    def __init__(self, partitions, prefix="partitioned-"):
+        self.partitions = [SpillStore(prefix=f"{prefix}{i:03d}-") for i in range(partitions)]
+        self.columns = None
+        self._rows_written = 0
+        self._order = None
+
+    def append(self, df):
+        if self.columns is None:
+            self.columns = list(df.columns)
+        hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+        tagged = df.reset_index(drop=True).assign(**{
+            self.ROW_COLUMN: np.arange(self._rows_written, self._rows_written + len(df)),
+            self.HASH_COLUMN: hashes,
+        })
+        target = hashes % len(self.partitions)
+        for i in np.unique(target):
+            self.partitions[i].append(tagged[target == i])
+        self._rows_written += len(df)
+        self._order = None
+
+    def dedupe(self):
+        # Within a partition, rows whose hashes collide are compared in full;
+        # the first occurrence (lowest global row) is kept
+        for i, store in enumerate(self.partitions):
+            if not store.parts:
+                continue
+            part = store.to_frame()
+            candidates = part[self.HASH_COLUMN].duplicated(keep=False).to_numpy()
+            if candidates.any():
+                dup = np.zeros(len(part), dtype=bool)
+                dup[candidates] = part[candidates].duplicated(subset=self.columns).to_numpy()
+                part = part[~dup]
+            replacement = SpillStore(prefix=f"partitioned-{i:03d}-")
+            replacement.append(part)
+            store.cleanup()
+            self.partitions[i] = replacement
+        self._order = None
+
+    def _row_order(self):
+        # Global order of the stored rows as (partition, position) pairs; only
+        # the row ids are read into memory, never the row data
+        if self._order is None:
+            ids, part_of, pos = [], [], []
+            for i, store in enumerate(self.partitions):
+                for j, frame in enumerate(store.iter_parts()):
+                    rows = frame[self.ROW_COLUMN].to_numpy()
+                    ids.append(rows)
+                    part_of.append(np.full(len(rows), i))
+                    pos.append(np.arange(store.offsets[j], store.offsets[j] + len(rows)))
+            if ids:
+                ids = np.concatenate(ids)
+                order = np.argsort(ids, kind="stable")
+                self._order = (np.concatenate(part_of)[order], np.concatenate(pos)[order])
+            else:
+                self._order = (np.empty(0, dtype=int), np.empty(0, dtype=int))
+        return self._order
+
+    @property
+    def num_rows(self):
+        return sum(store.num_rows for store in self.partitions)
+
+    def __len__(self):
+        return self.num_rows
+
+    @property
+    def shape(self):
+        return self.num_rows, len(self.columns or [])
+
+    def disk_bytes(self):
+        return sum(store.disk_bytes() for store in self.partitions)
+
+    def read_slice(self, start, stop):
+        part_of, pos = self._row_order()
+        part_of, pos = part_of[start:stop], pos[start:stop]
+        frames = []
+        for i in np.unique(part_of):
+            wanted = pos[part_of == i]
+            frames.append(self.partitions[i].read_slice(int(wanted.min()), int(wanted.max()) + 1)
+                          .iloc[wanted - wanted.min()])
+        if not frames:
+            return pd.DataFrame(columns=self.columns)
+        result = pd.concat(frames).sort_values(self.ROW_COLUMN)
+        return result.drop(columns=[self.ROW_COLUMN, self.HASH_COLUMN])
+
+    def head(self, n=5):
+        return self.read_slice(0, n)
+
+    def cleanup(self):
+        for store in self.partitions:
+            store.cleanup()
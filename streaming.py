@@ -0,0 +1,318 @@
+import numpy as np
+import pandas as pd
+
+# Rows per chunk when a CSV is read in streaming mode
+DEFAULT_CHUNKSIZE = 100_000
+
+
+def iter_csv_chunks(uploaded_file, chunksize=DEFAULT_CHUNKSIZE, **options):
+    # Uploaded files are file-like; rewind so the file can be streamed again
+    if hasattr(uploaded_file, "seek"):
+        uploaded_file.seek(0)
+    yield from pd.read_csv(uploaded_file, chunksize=chunksize, **options)
+
+
+def _safe(n):
+    return np.where(n > 0, n, 1)
+
+
+class MomentAccumulator:
+    """Per-column count, mean and central moment sums M2..M4 (mergeable)."""
+
+    def __init__(self, ncols):
+        self.n = np.zeros(ncols)
+        self.mean = np.zeros(ncols)
+        self.m2 = np.zeros(ncols)
+        self.m3 = np.zeros(ncols)
+        self.m4 = np.zeros(ncols)
+
+    @classmethod
+    def from_array(cls, values):
+        acc = cls(values.shape[1])
+        valid = ~np.isnan(values)
+        acc.n = valid.sum(axis=0).astype(float)
+        acc.mean = np.nansum(values, axis=0) / _safe(acc.n)
+        d = np.where(valid, values - acc.mean, 0.0)
+        d2 = d * d
+        acc.m2 = d2.sum(axis=0)
+        acc.m3 = (d2 * d).sum(axis=0)
+        acc.m4 = (d2 * d2).sum(axis=0)
+        return acc
+
+    def update(self, values):
+        self.merge(MomentAccumulator.from_array(values))
+
+    def merge(self, other):
+        # Pairwise update of central moments (Pebay, 2008)
+        na, nb = self.n, other.n
+        n = na + nb
+        ns = _safe(n)
+        delta = other.mean - self.mean
+        d_n = delta / ns
+        m2 = self.m2 + other.m2 + delta * d_n * na * nb
+        m3 = (self.m3 + other.m3 + delta * d_n * d_n * na * nb * (na - nb)
+              + 3 * d_n * (na * other.m2 - nb * self.m2))
+        m4 = (self.m4 + other.m4
+              + delta * d_n ** 3 * na * nb * (na * na - na * nb + nb * nb)
+              + 6 * d_n * d_n * (na * na * other.m2 + nb * nb * self.m2)
+              + 4 * d_n * (na * other.m3 - nb * self.m3))
+        self.mean = self.mean + d_n * nb
+        self.n, self.m2, self.m3, self.m4 = n, m2, m3, m4
+        return self
+
+    def variance(self):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.n > 1, self.m2 / (self.n - 1), np.nan)
+
+    def skewness(self):
+        # Same bias-adjusted estimator as DataFrame.skew()
+        n = self.n
+        with np.errstate(invalid="ignore", divide="ignore"):
+            g1 = np.sqrt(n) * self.m3 / self.m2 ** 1.5
+            out = g1 * np.sqrt(n * (n - 1)) / (n - 2)
+        out = np.where(self.m2 == 0, 0.0, out)
+        return np.where(n < 3, np.nan, out)
+
+    def kurtosis(self):
+        # Same bias-adjusted excess kurtosis as DataFrame.kurt()
+        n = self.n
+        with np.errstate(invalid="ignore", divide="ignore"):
+            adj = 3 * (n - 1) ** 2 / ((n - 2) * (n - 3))
+            num = n * (n + 1) * (n - 1) * self.m4
+            den = (n - 2) * (n - 3) * self.m2 ** 2
+            out = num / den - adj
+        out = np.where(den == 0, 0.0, out)
+        return np.where(n < 4, np.nan, out)
+
+
+class CoMomentAccumulator:
+    """Pairwise-complete co-moment sums for Pearson correlation (mergeable).
+
+    Sums are kept relative to a per-column shift to limit cancellation;
+    ``n[i, j]`` counts rows where both columns are present and ``s``, ``q``
+    hold the sums of the shifted values and their squares over those rows.
+    """
+
+    def __init__(self, ncols, shift=None):
+        self.shift = np.zeros(ncols) if shift is None else np.asarray(shift, dtype=float)
+        self.n = np.zeros((ncols, ncols))
+        self.s = np.zeros((ncols, ncols))
+        self.q = np.zeros((ncols, ncols))
+        self.p = np.zeros((ncols, ncols))
+
+    def update(self, values):
+        valid = ~np.isnan(values)
+        v = valid.astype(float)
+        z = np.where(valid, values - self.shift, 0.0)
+        self.n += v.T @ v
+        self.s += z.T @ v
+        self.q += (z * z).T @ v
+        self.p += z.T @ z
+
+    def reshift(self, shift):
+        # Re-express the sums around a new shift so accumulators can merge
+        d = np.asarray(shift, dtype=float) - self.shift
+        s = self.s - d[:, None] * self.n
+        self.q = self.q - 2 * d[:, None] * self.s + (d * d)[:, None] * self.n
+        self.p = self.p - self.s * d[None, :] - self.s.T * d[:, None] + self.n * np.outer(d, d)
+        self.s = s
+        self.shift = np.asarray(shift, dtype=float)
+        return self
+
+    def merge(self, other):
+        if not np.array_equal(other.shift, self.shift):
+            other = other._copy().reshift(self.shift)
+        self.n += other.n
+        self.s += other.s
+        self.q += other.q
+        self.p += other.p
+        return self
+
+    def _copy(self):
+        acc = CoMomentAccumulator(len(self.shift), self.shift.copy())
+        acc.n, acc.s, acc.q, acc.p = self.n.copy(), self.s.copy(), self.q.copy(), self.p.copy()
+        return acc
+
+    def _centered(self):
+        n = _safe(self.n)
+        sx, sy = self.s, self.s.T
+        cov = self.p - sx * sy / n
+        var_x = self.q - sx * sx / n
+        var_y = self.q.T - sy * sy / n
+        return cov, var_x, var_y
+
+    def covariance(self):
+        cov, _, _ = self._centered()
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.n > 1, cov / (self.n - 1), np.nan)
+
+    def correlation(self):
+        cov, var_x, var_y = self._centered()
+        with np.errstate(invalid="ignore", divide="ignore"):
+            r = cov / np.sqrt(var_x * var_y)
+        r = np.clip(r, -1.0, 1.0)
+        return np.where((self.n > 1) & (var_x > 0) & (var_y > 0), r, np.nan)
+
+
+class QuantileSketch:
+    """Mergeable KLL-style quantile sketch for one column.
+
+    Level ``h`` holds items of weight ``2**h``; a level that grows past ``k``
+    items is sorted and every other item is promoted, so memory stays
+    O(k log n) however many values are streamed through it.
+    """
+
+    def __init__(self, k=4096, seed=0):
+        self.k = k
+        self.levels = [np.empty(0)]
+        self.count = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return
+        self.count += values.size
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def merge(self, other):
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for h, items in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], items])
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def _compress(self):
+        h = 0
+        while h < len(self.levels):
+            if self.levels[h].size > self.k:
+                items = np.sort(self.levels[h])
+                if items.size % 2:
+                    # Keep one item back so the promoted half is exact
+                    keep, items = items[-1:], items[:-1]
+                else:
+                    keep = np.empty(0)
+                promoted = items[self._rng.integers(2)::2]
+                self.levels[h] = keep
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+            h += 1
+
+    def _weighted(self):
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(level.size, 2.0 ** h) for h, level in enumerate(self.levels)])
+        return items, weights
+
+    def rank(self, x):
+        # Estimated number of values below and above ``x`` (exact while
+        # everything still fits in the first level)
+        items, weights = self._weighted()
+        return weights[items < x].sum(), weights[items > x].sum()
+
+    def quantile(self, q):
+        if self.count == 0:
+            return np.nan
+        items, weights = self._weighted()
+        order = np.argsort(items, kind="stable")
+        items, weights = items[order], weights[order]
+        # Centre of each item's rank range; for weight-1 items this is the
+        # exact 0-based rank, matching pandas' linear interpolation
+        ranks = np.cumsum(weights) - (weights + 1) / 2
+        total = weights.sum()
+        value = np.interp(np.asarray(q) * (total - 1), ranks, items)
+        return np.clip(value, self.min, self.max)
+
+
+class StreamingStats:
+    """Skewness, kurtosis, quartiles and correlation over a stream of chunks."""
+
+    def __init__(self, sketch_k=4096):
+        self.sketch_k = sketch_k
+        self.columns = None
+        self.moments = None
+        self.comoments = None
+        self.sketches = None
+        self.rows = 0
+
+    def _numeric_block(self, chunk):
+        block = chunk.reindex(columns=self.columns)
+        for col in self.columns:
+            if not pd.api.types.is_numeric_dtype(block[col]):
+                block[col] = pd.to_numeric(block[col], errors="coerce")
+        return block.to_numpy(dtype=float, na_value=np.nan)
+
+    def update(self, chunk):
+        if self.columns is None:
+            self.columns = chunk.select_dtypes(include=[np.number]).columns.tolist()
+            ncols = len(self.columns)
+            self.moments = MomentAccumulator(ncols)
+            values = self._numeric_block(chunk)
+            with np.errstate(invalid="ignore"):
+                shift = np.nan_to_num(np.nanmean(values, axis=0)) if len(values) else None
+            self.comoments = CoMomentAccumulator(ncols, shift)
+            self.sketches = [QuantileSketch(self.sketch_k, seed=i) for i in range(ncols)]
+        else:
+            values = self._numeric_block(chunk)
+        self.rows += len(chunk)
+        self.moments.update(values)
+        self.comoments.update(values)
+        for i, sketch in enumerate(self.sketches):
+            sketch.update(values[:, i])
+
+    def merge(self, other):
+        if other.columns is None:
+            return self
+        if self.columns is None:
+            self.__dict__.update(other.__dict__)
+            return self
+        self.rows += other.rows
+        self.moments.merge(other.moments)
+        self.comoments.merge(other.comoments)
+        for mine, theirs in zip(self.sketches, other.sketches):
+            mine.merge(theirs)
+        return self
+
+    def skew_kurt_table(self):
+        return pd.DataFrame(
+            {"Skewness": self.moments.skewness(), "Kurtosis": self.moments.kurtosis()},
+            index=self.columns,
+        )
+
+    def quantiles(self, q):
+        return pd.Series([s.quantile(q) for s in self.sketches], index=self.columns)
+
+    def iqr_bounds(self, whisker=1.5):
+        q1 = self.quantiles(0.25)
+        q3 = self.quantiles(0.75)
+        iqr = q3 - q1
+        return q1 - whisker * iqr, q3 + whisker * iqr
+
+    def correlation(self):
+        return pd.DataFrame(self.comoments.correlation(), index=self.columns, columns=self.columns)
+
+
+def stream_stats(chunks, transform=None, on_chunk=None):
+    # One pass over the chunks; ``transform`` can add derived columns per chunk
+    # and ``on_chunk(rows_so_far)`` is called after each one
+    stats = StreamingStats()
+    first = None
+    for chunk in chunks:
+        if transform is not None:
+            chunk = transform(chunk)
+        if first is None:
+            first = chunk.head(16)
+        stats.update(chunk)
+        if on_chunk is not None:
+            on_chunk(stats.rows)
+    return stats, first
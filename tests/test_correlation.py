@@ -0,0 +1,44 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import correlation
+
+
+def _frame(rows=3000, columns=20, seed=0):
+    # Correlated columns with NaNs, one constant column and one text column
+    rng = np.random.default_rng(seed)
+    base = rng.normal(size=(rows, 3))
+    values = base @ rng.normal(size=(3, columns)) + rng.normal(scale=0.5, size=(rows, columns))
+    values[rng.random(values.shape) < 0.05] = np.nan
+    df = pd.DataFrame(values * 1e3 + 1e6, columns=[f"c{i}" for i in range(columns)])
+    df["constant"] = 7.0
+    df["label"] = "x"
+    return df
+
+
+def test_blocked_matches_pandas_corr():
+    df = _frame()
+    expected = df.select_dtypes(include=[np.number]).corr()
+    # Small blocks, so complete and pairwise blocks are both exercised
+    result = correlation.correlation_matrix(df, block=6)
+    pd.testing.assert_index_equal(result.columns, expected.columns)
+    np.testing.assert_allclose(result.to_numpy(), expected.to_numpy(), atol=1e-5)
+
+
+def test_complete_columns_match_pandas_corr():
+    df = _frame().dropna()
+    expected = df.select_dtypes(include=[np.number]).corr()
+    np.testing.assert_allclose(correlation.correlation_matrix(df).to_numpy(), expected.to_numpy(), atol=1e-5)
+
+
+def test_top_pairs_are_the_largest_absolute_correlations():
+    corr = correlation.correlation_matrix(_frame())
+    pairs = correlation.top_pairs(corr, k=5)
+    values = corr.where(np.triu(np.ones(corr.shape, dtype=bool), k=1)).stack().abs()
+    np.testing.assert_allclose(np.sort(pairs["Correlation"].abs().to_numpy())[::-1],
+                               values.nlargest(5).to_numpy(), rtol=1e-12)
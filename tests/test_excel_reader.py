@@ -0,0 +1,35 @@
+import io
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import excel_reader
+
+
+def _workbook():
+    df = pd.DataFrame({"A": [1, 2, 3], "B": ["x", "y", "z"], "C": [1.5, 2.5, None], "D": [7, 8, 9]})
+    buffer = io.BytesIO()
+    df.to_excel(buffer, index=False)
+    return buffer.getvalue()
+
+
+def test_usecols_from_full_sheet_cache_matches_fresh_parse(tmp_path, monkeypatch):
+    monkeypatch.setattr(excel_reader, "CACHE_DIR", str(tmp_path))
+    data = _workbook()
+    excel_reader.read_excel(data, "cached")  # full-sheet conversion
+    cached = excel_reader.read_excel(data, "cached", usecols=["C", "A"])
+    fresh = excel_reader.read_excel(data, "fresh", usecols=["C", "A"])
+    assert list(fresh.columns) == ["A", "C"]
+    pd.testing.assert_frame_equal(cached, fresh)
+
+
+def test_dtype_hints_skip_inference(tmp_path, monkeypatch):
+    monkeypatch.setattr(excel_reader, "CACHE_DIR", str(tmp_path))
+    df = excel_reader.read_excel(_workbook(), "hints", dtype={"A": "string", "D": "float64"})
+    assert df["A"].dtype == "string"
+    assert df["D"].dtype == "float64"
+    pd.testing.assert_frame_equal(
+        excel_reader.read_excel(_workbook(), "hints", dtype={"A": "string", "D": "float64"}), df)
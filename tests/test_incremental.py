@@ -0,0 +1,64 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import feature_engine
+import incremental
+
+SPEC = (
+    feature_engine.per_capita("Cases per 100k", "Cases", "Population"),
+    feature_engine.rolling("Cases (rolling)", "Cases", 7),
+    feature_engine.rolling("Smoothed", "Cases (rolling)", 3),
+)
+
+
+def _frame(rows, seed):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "Cases": rng.poisson(50, rows).astype(float),
+        "Population": rng.integers(1_000, 100_000, rows).astype(float),
+        "State": rng.choice(["a", "b", "c"], rows),
+    })
+    df.loc[rng.random(rows) < 0.05, "Cases"] = np.nan
+    return df
+
+
+def _versions():
+    # A base and deltas, some shorter than the rolling context
+    parts = [_frame(500, 0)] + [_frame(rows, seed) for seed, rows in enumerate((1, 3, 40, 2, 300), start=1)]
+    version = incremental.start(("test-base",), parts[0], SPEC)
+    for i, delta in enumerate(parts[1:]):
+        version = incremental.extend(version, f"delta-{i}", delta)
+    return version, pd.concat(parts, ignore_index=True)
+
+
+def test_appended_features_match_full_recompute():
+    version, full = _versions()
+    expected, _ = feature_engine.apply(full, SPEC)
+    merged = pd.concat(version.parts, ignore_index=True)
+    pd.testing.assert_frame_equal(merged[expected.columns], expected, check_dtype=False)
+
+
+def test_appended_statistics_match_full_recompute():
+    version, full = _versions()
+    features, _ = feature_engine.apply(full, SPEC)
+    assert version.rows == len(full)
+    numeric = features.select_dtypes(include=[np.number])
+    np.testing.assert_allclose(version.stats.skew_kurt_table()["Skewness"], numeric.skew(), rtol=1e-9)
+    np.testing.assert_allclose(version.stats.skew_kurt_table()["Kurtosis"], numeric.kurt(), rtol=1e-9)
+    np.testing.assert_allclose(version.stats.correlation(), numeric.corr(), atol=1e-10)
+    for q in (0.25, 0.75):
+        np.testing.assert_allclose(version.stats.quantiles(q), numeric.quantile(q), rtol=1e-12)
+
+
+def test_histograms_count_every_value():
+    version, full = _versions()
+    features, _ = feature_engine.apply(full, SPEC)
+    for column, hist in version.histograms.items():
+        values = features[column].to_numpy(dtype=float)
+        assert hist.counts.sum() == np.isfinite(values).sum()
+        assert hist.edges[0] <= np.nanmin(values) and np.nanmax(values) <= hist.edges[-1]
@@ -0,0 +1,43 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import joins
+
+
+def _result_frame(result):
+    frame = result.frame
+    return frame.read_slice(0, frame.num_rows) if result.spilled else frame
+
+
+def test_many_high_cardinality_keys_match_pd_merge():
+    # 5 keys x 65,536 values: the combined key space is 2**80, far past int64
+    n = 65_536
+    keys = [f"k{i}" for i in range(5)]
+    left = pd.DataFrame({key: np.arange(n) for key in keys})
+    right = left.copy()
+    right["k0"] = right["k0"] + n  # differs from left in k0 only
+
+    expected = pd.merge(left, right, on=keys, how="inner")
+    result = _result_frame(joins.join(left, right, on=keys, how="inner"))
+    assert len(expected) == 0
+    assert len(result) == len(expected)
+
+
+def test_multi_key_join_matches_pd_merge():
+    rng = np.random.default_rng(0)
+    left = pd.DataFrame({"a": rng.integers(0, 50, 2000), "b": rng.integers(0, 50, 2000), "x": rng.random(2000)})
+    right = pd.DataFrame({"a": rng.integers(0, 50, 1500), "b": rng.integers(0, 50, 1500), "y": rng.random(1500)})
+    for how in ("inner", "left", "outer"):
+        expected = pd.merge(left, right, on=["a", "b"], how=how)
+        result = _result_frame(joins.join(left, right, on=["a", "b"], how=how))
+        sort = ["a", "b", "x", "y"]
+        pd.testing.assert_frame_equal(
+            result.sort_values(sort).reset_index(drop=True)[expected.columns],
+            expected.sort_values(sort).reset_index(drop=True),
+            check_dtype=False,
+        )
@@ -0,0 +1,59 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import outliers
+
+
+def _frame(rows=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "normal": rng.normal(50, 10, rows),
+        "heavy": rng.standard_t(2, rows),
+        "skewed": rng.lognormal(1, 1, rows),
+        "label": rng.choice(["a", "b"], rows),
+    })
+    for col in ("normal", "heavy", "skewed"):
+        df.loc[rng.random(rows) < 0.05, col] = np.nan
+    return df
+
+
+def _full_mask_iqr(df, whisker=1.5):
+    # The detection this replaced: quantiles, then one boolean mask of the data
+    numeric = df.select_dtypes(include=[np.number])
+    q1, q3 = numeric.quantile(0.25), numeric.quantile(0.75)
+    iqr = q3 - q1
+    lower, upper = q1 - whisker * iqr, q3 + whisker * iqr
+    return lower, upper, (numeric < lower) | (numeric > upper)
+
+
+def test_iqr_fences_and_counts_match_full_mask():
+    df = _frame()
+    lower, upper, mask = _full_mask_iqr(df)
+    # Small chunks, so counts and row positions cross block boundaries
+    result = outliers.detect(df, "iqr", chunk_rows=256)
+    np.testing.assert_allclose(result.lower, lower, rtol=1e-12)
+    np.testing.assert_allclose(result.upper, upper, rtol=1e-12)
+    pd.testing.assert_series_equal(result.counts, mask.sum(), check_names=False)
+    for col in result.columns:
+        np.testing.assert_array_equal(result.indices[col], np.flatnonzero(mask[col].to_numpy()))
+
+
+def test_streamed_chunks_match_in_memory():
+    df = _frame()
+    chunks = lambda: (df.iloc[start:start + 500] for start in range(0, len(df), 500))
+    streamed = outliers.detect(chunks, "iqr")
+    in_memory = outliers.detect(df, "iqr")
+    pd.testing.assert_series_equal(streamed.counts, in_memory.counts)
+
+
+def test_zscore_matches_pandas_moments():
+    df = _frame()
+    numeric = df.select_dtypes(include=[np.number])
+    z = (numeric - numeric.mean()) / numeric.std()
+    result = outliers.detect(df, "zscore", threshold=3.0)
+    pd.testing.assert_series_equal(result.counts, (z.abs() > 3.0).sum(), check_names=False)
@@ -0,0 +1,47 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import profiling
+
+
+def _frame(rows=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "normal": rng.normal(0, 1, rows),
+        "skewed": rng.exponential(5, rows),
+        "ints": rng.integers(0, 100, rows),
+        "sparse": rng.normal(10, 2, rows),
+        "label": rng.choice(["x", "y", None], rows),
+    })
+    df.loc[rng.random(rows) < 0.05, "normal"] = np.nan
+    df.loc[rng.random(rows) < 0.6, "sparse"] = np.nan
+    return df
+
+
+def test_describe_matches_pandas():
+    df = _frame()
+    pd.testing.assert_frame_equal(profiling.profile_frame(df).describe(), df.describe(), rtol=1e-9)
+
+
+def test_skew_kurt_and_nulls_match_pandas():
+    df = _frame()
+    numeric = df.select_dtypes(include=[np.number])
+    profile = profiling.profile_frame(df)
+    table = profile.skew_kurt_table()
+    np.testing.assert_allclose(table["Skewness"], numeric.skew(), rtol=1e-9)
+    np.testing.assert_allclose(table["Kurtosis"], numeric.kurt(), rtol=1e-9)
+    pd.testing.assert_series_equal(profile.null_counts, df.isnull().sum(), check_names=False)
+
+
+def test_outlier_counts_match_full_mask():
+    df = _frame()
+    numeric = df.select_dtypes(include=[np.number])
+    q1, q3 = numeric.quantile(0.25), numeric.quantile(0.75)
+    iqr = q3 - q1
+    expected = ((numeric < q1 - 1.5 * iqr) | (numeric > q3 + 1.5 * iqr)).sum()
+    pd.testing.assert_series_equal(profiling.profile_frame(df).outlier_counts(), expected, check_names=False)
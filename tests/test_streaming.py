@@ -0,0 +1,58 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import streaming
+
+
+def _frame(rows=3000, seed=0):
+    # Skewed and symmetric columns with scattered NaNs, plus a text column
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "normal": rng.normal(100, 15, rows),
+        "skewed": rng.lognormal(3, 1, rows),
+        "counts": rng.poisson(4, rows).astype(float),
+        "label": rng.choice(["a", "b"], rows),
+    })
+    for col in ("normal", "skewed", "counts"):
+        df.loc[rng.random(rows) < 0.05, col] = np.nan
+    return df
+
+
+def _stream(df, chunk_rows):
+    stats, _ = streaming.stream_stats(df.iloc[start:start + chunk_rows] for start in range(0, len(df), chunk_rows))
+    return stats
+
+
+def test_moments_match_pandas():
+    df = _frame()
+    numeric = df.select_dtypes(include=[np.number])
+    table = _stream(df, 700).skew_kurt_table()
+    np.testing.assert_allclose(table["Skewness"], numeric.skew(), rtol=1e-9)
+    np.testing.assert_allclose(table["Kurtosis"], numeric.kurt(), rtol=1e-9)
+
+
+def test_merged_accumulators_match_one_pass():
+    df = _frame()
+    numeric = df.select_dtypes(include=[np.number])
+    merged = _stream(df.iloc[:1200], 500).merge(_stream(df.iloc[1200:], 500))
+    np.testing.assert_allclose(merged.moments.variance(), numeric.var(), rtol=1e-9)
+    np.testing.assert_allclose(merged.skew_kurt_table()["Skewness"], numeric.skew(), rtol=1e-9)
+
+
+def test_pairwise_correlation_matches_pandas():
+    df = _frame()
+    expected = df.select_dtypes(include=[np.number]).corr()
+    np.testing.assert_allclose(_stream(df, 700).correlation(), expected, atol=1e-10)
+
+
+def test_quartiles_exact_below_sketch_size():
+    df = _frame()
+    numeric = df.select_dtypes(include=[np.number])
+    stats = _stream(df, 700)
+    for q in (0.25, 0.5, 0.75):
+        np.testing.assert_allclose(stats.quantiles(q), numeric.quantile(q), rtol=1e-12)
@@ -0,0 +1,144 @@
+import pandas as pd
+import streamlit as st
+
+import data_loader
+import exports
+import instrumentation
+import jobs
+
+
+# Type hints offered for Excel columns: hinted columns are read straight
+# into the dtype instead of being inferred
+EXCEL_TYPE_HINTS = {"infer": None, "text": "string", "number": "float64"}
+
+
+def excel_upload_options(uploaded_file, key):
+    # Sheet, column and type pickers for an uploaded workbook; unselected
+    # columns are skipped by the reader
+    layout = data_loader.excel_layout(uploaded_file)
+    sheets = list(layout)
+    with st.expander("Sheet and columns"):
+        sheet = st.selectbox("Sheet", sheets, key=f"{key}_sheet")
+        columns = layout[sheet]
+        selected = st.multiselect("Columns to load", columns, default=columns, key=f"{key}_columns")
+        hints = st.data_editor(
+            pd.DataFrame({"Column": selected, "Type": "infer"}),
+            column_config={"Type": st.column_config.SelectboxColumn(
+                options=list(EXCEL_TYPE_HINTS), required=True,
+                help="number: cells that are not numbers are read as missing")},
+            disabled=["Column"], hide_index=True, key=f"{key}_types",
+        )
+    usecols = None if len(selected) == len(columns) else selected
+    dtype = {column: EXCEL_TYPE_HINTS[hint] for column, hint in zip(hints["Column"], hints["Type"])
+             if EXCEL_TYPE_HINTS.get(hint)}
+    return {"sheet_name": sheet, "usecols": usecols, "dtype": dtype or None}
+
+
+PAGE_SIZES = [25, 50, 100, 500]
+
+
+def _num_rows(data):
+    return len(data) if isinstance(data, pd.DataFrame) else data.num_rows
+
+
+def _read_slice(data, start, stop):
+    if isinstance(data, pd.DataFrame):
+        return data.iloc[start:stop]
+    return data.read_slice(start, stop)
+
+
+def paged_table(data, key, page_size=50):
+    # Shows one page of a DataFrame (or an on-disk store with num_rows and
+    # read_slice) so only the visible rows are sent to the browser
+    rows = _num_rows(data)
+    columns = list(data.columns)
+    nav1, nav2, nav3 = st.columns([1, 1, 3])
+    with nav1:
+        size = st.selectbox("Rows per page", PAGE_SIZES, index=PAGE_SIZES.index(page_size), key=f"{key}_size")
+    pages = max(1, -(-rows // size))
+    with nav2:
+        page = st.number_input("Page", min_value=1, max_value=pages, value=1, step=1, key=f"{key}_page")
+    start = (int(page) - 1) * size
+    stop = min(start + size, rows)
+    with nav3:
+        st.caption(f"{rows:,} rows × {len(columns)} columns · showing rows {min(start + 1, rows):,}–{stop:,} (page {int(page)} of {pages})")
+    visible = _read_slice(data, start, stop)
+    with instrumentation.span("table", "serialize", payload=visible, detail=key):
+        st.dataframe(visible)
+
+
+JOB_POLL_SECONDS = 0.5
+
+
+def show_job(job, label, render):
+    # Calls render(result) once the background job has finished. Until then a
+    # self-refreshing fragment shows its progress while the rest of the page
+    # renders normally; when the job completes the whole page reruns once.
+    if job.status == "failed":
+        st.error(f"{label} failed: {job.error}")
+        # Failures are kept for their key; only an explicit retry resubmits
+        if st.button("Retry", key=f"retry:{label}:{job.key!r}"):
+            jobs.retry(job)
+            st.rerun()
+        return
+    if job.done:
+        render(job.result)
+        return
+
+    @st.fragment(run_every=JOB_POLL_SECONDS)
+    def poll():
+        if job.done:
+            st.rerun()
+        st.progress(job.progress, text=f"{label}: {job.message or job.status} ({job.elapsed:.1f}s)")
+
+    poll()
+
+
+def show_sample_bounds(sample, bounds):
+    # Caption and confidence-bounds table (PreviewSample.bounds) for results
+    # drawn from a preview sample
+    strata = f", stratified by {sample.strata}" if sample.strata is not None else ""
+    st.caption(f"Fast preview: {sample.rows:,} of {sample.population_rows:,} rows{strata}")
+    with st.expander("Estimates with 95% confidence bounds"):
+        st.dataframe(bounds)
+
+
+def show_chart(prepared):
+    # Displays the result of charts.prepare() with its payload and timing
+    backend, output, metrics = prepared
+    with instrumentation.span("chart", "serialize", detail=metrics["chart"]) as span:
+        span.payload_bytes = metrics["payload bytes"]
+        if backend == "vega-lite":
+            st.vega_lite_chart(spec=output, width="stretch")
+        else:
+            st.image(output)
+    st.caption(f"{backend} · {metrics['rows sent']:,} aggregated rows · "
+               f"{metrics['payload bytes']:,} bytes · {metrics['seconds'] * 1000:.0f} ms")
+
+
+def show_image(png, name="image"):
+    # st.image for rendered PNG bytes, timed with its payload size
+    with instrumentation.span(name, "serialize", payload=png):
+        st.image(png)
+
+
+def download_frame(data, label, file_name, key, cache_key=None):
+    # Format picker and download button for a DataFrame (or a function
+    # returning one). Nothing is serialised on reruns: the file is written in
+    # chunks, or taken from the export cache, only when the button is clicked,
+    # and handed to Streamlit as an open file (closed once Streamlit has read
+    # it and dropped it).
+    col1, col2 = st.columns([1, 2])
+    with col1:
+        fmt = st.selectbox("Format", list(exports.FORMATS), format_func=lambda f: exports.FORMATS[f][0],
+                           key=f"{key}_format", label_visibility="collapsed")
+    _, suffix, mime = exports.FORMATS[fmt]
+    with col2:
+        st.download_button(
+            label=label,
+            data=lambda: exports.export(data, fmt, cache_key),
+            file_name=f"{file_name}{suffix}",
+            mime=mime,
+            key=f"{key}_download",
+            on_click="ignore",
+        )